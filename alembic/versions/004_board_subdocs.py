@@ -0,0 +1,37 @@
+"""Board layout flag and per-subdocument state storage.
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-02-02
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # "single" = one Y.Doc per board, "paged" = root doc + one subdoc per page/frame
+    op.add_column('boards',
+        sa.Column('layout', sa.String(length=20), nullable=False, server_default='single')
+    )
+
+    # Subdocument state storage (CRDT binary blobs), one row per (board, subdoc)
+    # Uses raw key-value storage, not ORM - see persistence.py for rationale
+    op.create_table('board_subdoc_states',
+        sa.Column('board_id', sa.String(36), sa.ForeignKey('boards.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('subdoc_id', sa.String(64), primary_key=True),
+        sa.Column('state', sa.LargeBinary, nullable=False),
+        sa.Column('updated_at', sa.DateTime, nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('board_subdoc_states')
+    op.drop_column('boards', 'layout')
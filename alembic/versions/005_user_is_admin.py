@@ -0,0 +1,27 @@
+"""Admin flag on users.
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-02-09
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Grants access to /api/v1/admin; set directly in the database
+    op.add_column('users',
+        sa.Column('is_admin', sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'is_admin')
@@ -0,0 +1,51 @@
+"""Change cursors and tombstones for todo delta sync.
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-02-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing rows get seq 0: only a full sync (since=0) returns them
+    op.add_column('teams',
+        sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0')
+    )
+    for table in ('todo_lists', 'todo_items'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.add_column(table,
+            sa.Column('change_seq', sa.Integer(), nullable=False, server_default='0')
+        )
+    op.create_index('ix_todo_lists_team_change_seq', 'todo_lists', ['team_id', 'change_seq'])
+    op.create_index('ix_todo_items_list_change_seq', 'todo_items', ['list_id', 'change_seq'])
+
+    op.create_table('tombstones',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('team_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(10), nullable=False),
+        sa.Column('object_id', sa.Integer(), nullable=False),
+        sa.Column('change_seq', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True)
+    )
+    op.create_index('ix_tombstones_team_change_seq', 'tombstones', ['team_id', 'change_seq'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tombstones_team_change_seq', table_name='tombstones')
+    op.drop_table('tombstones')
+    op.drop_index('ix_todo_items_list_change_seq', table_name='todo_items')
+    op.drop_index('ix_todo_lists_team_change_seq', table_name='todo_lists')
+    for table in ('todo_items', 'todo_lists'):
+        op.drop_column(table, 'change_seq')
+        op.drop_column(table, 'updated_at')
+    op.drop_column('teams', 'change_seq')
@@ -0,0 +1,35 @@
+"""Composite indexes for keyset pagination of list endpoints.
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-02-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns): filter column first, then the page sort key
+INDEXES = [
+    ('ix_team_members_user_team', 'team_members', ['user_id', 'team_id']),
+    ('ix_todo_lists_team', 'todo_lists', ['team_id', 'id']),
+    ('ix_todo_items_list_created', 'todo_items', ['list_id', 'created_at', 'id']),
+    ('ix_boards_owner_created', 'boards', ['owner_id', 'created_at', 'id']),
+    ('ix_board_permissions_user_board', 'board_permissions', ['user_id', 'board_id']),
+    ('ix_board_permissions_board', 'board_permissions', ['board_id', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,45 @@
+"""Todo counters on lists and teams.
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-02-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('teams', 'todo_lists'):
+        for column in ('todo_count', 'completed_count'):
+            op.add_column(table,
+                sa.Column(column, sa.Integer(), nullable=False, server_default='0')
+            )
+    op.create_index('ix_todo_items_list_open_due', 'todo_items', ['list_id', 'completed', 'due_date'])
+
+    # Backfill from existing todos (same as counters.repair_counters)
+    op.execute("""
+        UPDATE todo_lists SET
+            todo_count = (SELECT count(*) FROM todo_items WHERE todo_items.list_id = todo_lists.id),
+            completed_count = (SELECT count(*) FROM todo_items
+                               WHERE todo_items.list_id = todo_lists.id AND todo_items.completed)
+    """)
+    op.execute("""
+        UPDATE teams SET
+            todo_count = (SELECT coalesce(sum(todo_count), 0) FROM todo_lists WHERE todo_lists.team_id = teams.id),
+            completed_count = (SELECT coalesce(sum(completed_count), 0) FROM todo_lists WHERE todo_lists.team_id = teams.id)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_todo_items_list_open_due', table_name='todo_items')
+    for table in ('todo_lists', 'teams'):
+        op.drop_column(table, 'completed_count')
+        op.drop_column(table, 'todo_count')
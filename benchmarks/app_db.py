@@ -0,0 +1,25 @@
+"""
+Temporary, migrated database for benchmarks that exercise the app.
+
+Must run before anything imports `database` (directly or through `main`),
+since the engine is created from DATABASE_URL at import time.
+"""
+import os
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def use_temp_database(tmpdir: str, name: str) -> str:
+    """Point the app at a fresh SQLite file under tmpdir and migrate it to head."""
+    url = f"sqlite+aiosqlite:///{tmpdir}/{name}.db"
+    os.environ["DATABASE_URL"] = url
+    os.environ.setdefault("SECRET_KEY", f"{name}-benchmark")
+
+    from alembic import command
+    from alembic.config import Config
+
+    alembic_cfg = Config(str(ROOT / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(ROOT / "alembic"))
+    command.upgrade(alembic_cfg, "head")
+    return url
@@ -0,0 +1,165 @@
+"""
+Saving benchmark results and comparing them against a stored baseline.
+
+Result files are JSON: {"benchmark", "timestamp", "environment", "params", "results"}.
+"results" maps case names to flat dicts of numeric metrics, so runs of the
+same benchmark with the same params can be compared key by key.
+"""
+import json
+import os
+import platform
+import sys
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+BENCHMARKS_DIR = Path(__file__).parent
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+BASELINES_DIR = BENCHMARKS_DIR / "baselines"
+
+
+def environment() -> dict:
+    """Describe the machine a result was produced on."""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process (0 if unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Track the peak RSS growth while a block runs.
+
+    Polls /proc from a background thread, so allocations made by native
+    code (pycrdt's Rust core, SQLite) are counted, unlike tracemalloc.
+    """
+
+    def __init__(self, interval: float = 0.002):
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.start_bytes = 0
+        self.peak_bytes = 0
+
+    @property
+    def growth_bytes(self) -> int:
+        return max(0, self.peak_bytes - self.start_bytes)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+    def __enter__(self) -> "RssSampler":
+        self.start_bytes = self.peak_bytes = current_rss_bytes()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak_bytes = max(self.peak_bytes, current_rss_bytes())
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of a list (0.0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def write_result(benchmark: str, params: dict, results: dict, path: Optional[Path] = None) -> Path:
+    """Write a result file and return its path."""
+    if path is None:
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{benchmark}-{stamp}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "benchmark": benchmark,
+        "timestamp": datetime.utcnow().isoformat(),
+        "environment": environment(),
+        "params": params,
+        "results": results,
+    }
+    path.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n")
+    return path
+
+
+def load_result(path: Path) -> Optional[dict]:
+    """Load a result file, or None if it does not exist."""
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    lower_is_better: set[str],
+    higher_is_better: set[str],
+    tolerance: float
+) -> list[str]:
+    """
+    Compare results against a baseline result file.
+
+    Args:
+        results: Current "results" mapping
+        baseline: Loaded baseline file
+        lower_is_better: Metric names where an increase is a regression
+        higher_is_better: Metric names where a decrease is a regression
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+
+    Returns:
+        Human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+    for case, metrics in results.items():
+        base_metrics = baseline.get("results", {}).get(case)
+        if not base_metrics:
+            continue
+        for name, value in metrics.items():
+            base = base_metrics.get(name)
+            if not isinstance(base, (int, float)) or not base:
+                continue
+            change = (value - base) / base
+            if (name in lower_is_better and change > tolerance) or \
+                    (name in higher_is_better and change < -tolerance):
+                regressions.append(f"{case}.{name}: {base:.4g} -> {value:.4g} ({change:+.1%})")
+    return regressions
+
+
+def print_table(results: dict, baseline: Optional[dict] = None) -> None:
+    """Print results, with the relative change from the baseline if given."""
+    for case, metrics in results.items():
+        print(f"\n{case}")
+        base_metrics = (baseline or {}).get("results", {}).get(case, {})
+        for name, value in metrics.items():
+            line = f"  {name:<24} {value:>14.4g}"
+            base = base_metrics.get(name)
+            if isinstance(base, (int, float)) and base:
+                line += f"   ({(value - base) / base:+.1%} vs baseline)"
+            print(line)
@@ -0,0 +1,240 @@
+"""
+Canvas fan-out load generator.
+
+Starts the app in-process (uvicorn on a random local port, migrated temporary
+SQLite database), opens N simulated clients spread over M boards on
+/ws/canvas/{board_id}, and has the editors among them replay realistic
+tldraw update streams. Every update is timestamped on send and matched on
+each receiving client, giving end-to-end propagation latency through
+RoomManager's broadcast.
+
+Clients and server share one event loop, so absolute numbers include client
+overhead; compare runs made with the same parameters on the same machine.
+
+Usage:
+    python -m benchmarks.canvas_load --clients 200 --boards 10 --duration 20
+    python -m benchmarks.canvas_load --save-baseline      # store as baseline
+    python -m benchmarks.canvas_load --baseline benchmarks/baselines/canvas_load.json
+"""
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from .app_db import use_temp_database
+from .baseline import (
+    BASELINES_DIR, compare, current_rss_bytes, load_result, peak_rss_bytes,
+    percentile, print_table, write_result,
+)
+from .workloads import EditorSession
+
+DEFAULT_BASELINE = BASELINES_DIR / "canvas_load.json"
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=100, help="total simulated clients")
+    parser.add_argument("--boards", type=int, default=5, help="boards the clients are spread over")
+    parser.add_argument("--editor-ratio", type=float, default=0.2, help="fraction of clients that edit")
+    parser.add_argument("--rate", type=float, default=5.0, help="updates per second per editor")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of load")
+    parser.add_argument("--drain", type=float, default=2.0, help="seconds to wait for in-flight frames")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/...)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the result as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+
+async def create_fixtures(board_count: int) -> tuple[str, str, list[str]]:
+    """Create an editor, a viewer and boards; return (editor token, viewer token, board ids)."""
+    from auth import create_access_token, hash_password
+    from database import async_session
+    from models import Board, BoardPermission, PermissionLevel, User
+
+    async with async_session() as db:
+        editor = User(username="load_editor", email="editor@load.test", password_hash=hash_password("x"))
+        viewer = User(username="load_viewer", email="viewer@load.test", password_hash=hash_password("x"))
+        db.add_all([editor, viewer])
+        await db.flush()
+
+        board_ids = []
+        for i in range(board_count):
+            board = Board(id=str(uuid.uuid4()), owner_id=editor.id, title=f"Load {i}")
+            db.add(board)
+            db.add(BoardPermission(board_id=board.id, user_id=viewer.id, level=PermissionLevel.VIEW))
+            board_ids.append(board.id)
+        await db.commit()
+
+        return (
+            create_access_token({"sub": str(editor.id)}),
+            create_access_token({"sub": str(viewer.id)}),
+            board_ids,
+        )
+
+
+class Stats:
+    def __init__(self):
+        self.sent_at: dict[bytes, float] = {}
+        self.latencies: list[float] = []
+        self.updates_sent = 0
+        self.frames_received = 0
+        self.expected_deliveries = 0
+
+
+async def run_client(url: str, session, stats: Stats, peers: int, ready: asyncio.Event,
+                     connected: list, halt: asyncio.Event, stop: asyncio.Event,
+                     rate: float, rng: random.Random):
+    from websockets.asyncio.client import connect
+
+    async with connect(url, max_size=None) as ws:
+        await ws.recv()  # Initial sync frame
+        connected.append(ws)
+        await ready.wait()
+
+        async def receive():
+            async for frame in ws:
+                received = time.perf_counter()
+                stats.frames_received += 1
+                sent = stats.sent_at.get(frame)
+                if sent is not None:
+                    stats.latencies.append(received - sent)
+
+        receiver = asyncio.create_task(receive())
+        try:
+            if session is not None:
+                # Desynchronise editors so updates don't arrive in lockstep
+                await asyncio.sleep(rng.uniform(0, 1 / rate))
+                while not halt.is_set():
+                    update = session.next_update()
+                    if update:
+                        stats.sent_at[update] = time.perf_counter()
+                        stats.updates_sent += 1
+                        stats.expected_deliveries += peers
+                        await ws.send(update)
+                    await asyncio.sleep(rng.expovariate(rate))
+            await stop.wait()
+        finally:
+            receiver.cancel()
+
+
+async def run(args: argparse.Namespace) -> dict:
+    import uvicorn
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    serve_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    editor_token, viewer_token, board_ids = await create_fixtures(args.boards)
+    rng = random.Random(args.seed)
+    stats = Stats()
+    ready, halt, stop = asyncio.Event(), asyncio.Event(), asyncio.Event()
+    connected: list = []
+
+    editors = max(1, round(args.clients * args.editor_ratio))
+    per_board = [0] * len(board_ids)
+    for i in range(args.clients):
+        per_board[i % len(board_ids)] += 1
+
+    tasks = []
+    for i in range(args.clients):
+        board_index = i % len(board_ids)
+        is_editor = i < editors
+        token = editor_token if is_editor else viewer_token
+        url = f"ws://127.0.0.1:{port}/ws/canvas/{board_ids[board_index]}?token={token}"
+        session = EditorSession(seed=args.seed * 100_000 + i) if is_editor else None
+        tasks.append(asyncio.create_task(run_client(
+            url, session, stats, per_board[board_index] - 1, ready, connected, halt, stop,
+            args.rate, random.Random(rng.random())
+        )))
+
+    connect_started = time.perf_counter()
+    while len(connected) < args.clients:
+        failed = [t for t in tasks if t.done() and t.exception()]
+        if failed:
+            raise failed[0].exception()
+        await asyncio.sleep(0.05)
+    connect_seconds = time.perf_counter() - connect_started
+    rss_connected = current_rss_bytes()
+
+    started = time.perf_counter()
+    ready.set()
+    await asyncio.sleep(args.duration)
+    halt.set()
+    elapsed = time.perf_counter() - started
+
+    # Stop sending, give in-flight frames time to land, then tear down
+    await asyncio.sleep(args.drain)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    server.should_exit = True
+    await serve_task
+
+    latencies_ms = [latency * 1000 for latency in stats.latencies]
+    delivered = len(latencies_ms)
+    return {
+        "fanout": {
+            "p50_ms": percentile(latencies_ms, 50),
+            "p99_ms": percentile(latencies_ms, 99),
+            "max_ms": max(latencies_ms, default=0.0),
+            "updates_per_sec": stats.updates_sent / elapsed,
+            "deliveries_per_sec": delivered / elapsed,
+            "delivery_ratio": delivered / stats.expected_deliveries if stats.expected_deliveries else 1.0,
+            "connect_seconds": connect_seconds,
+            "rss_connected_mb": rss_connected / 2**20,
+            "rss_peak_mb": peak_rss_bytes() / 2**20,
+        }
+    }
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.clients < 1 or args.boards < 1 or args.rate <= 0:
+        print("clients, boards and rate must be positive", file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        use_temp_database(tmpdir, "canvas_load")
+        results = asyncio.run(run(args))
+
+    params = {
+        key: getattr(args, key)
+        for key in ("clients", "boards", "editor_ratio", "rate", "duration", "seed")
+    }
+    baseline = load_result(args.baseline)
+    if baseline and baseline.get("params") != params:
+        print(f"Baseline {args.baseline} was recorded with different params; not comparing")
+        baseline = None
+
+    print_table(results, baseline)
+    path = write_result("canvas_load", params, results, args.output)
+    print(f"\nResult written to {path}")
+    if args.save_baseline:
+        write_result("canvas_load", params, results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+
+    if baseline:
+        regressions = compare(
+            results, baseline,
+            lower_is_better={"p50_ms", "p99_ms", "rss_peak_mb"},
+            higher_is_better={"deliveries_per_sec", "delivery_ratio"},
+            tolerance=args.tolerance,
+        )
+        if regressions:
+            print("\nRegressions vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""
+BoardPersistence and pycrdt encode/decode micro-benchmarks.
+
+For each board size, builds a tldraw-shaped Y.Doc and measures against a
+migrated temporary SQLite database:
+- encode:    Doc.get_update() (what every save does)
+- save:      BoardPersistence.save (encode + upsert)
+- load:      BoardPersistence.load (select of the blob)
+- apply:     apply the loaded state to a fresh Doc
+- apply_indexed: same, with a ShapeIndex attached as Room does
+- debounced: 100 save_debounced calls in a burst, then wait for the one write
+
+Times are the median of --repeat runs; memory is the peak RSS growth during
+the operation (sampled from /proc, so pycrdt's native allocations count).
+
+Usage:
+    python -m benchmarks.persistence_bench                       # 1K..50M
+    python -m benchmarks.persistence_bench --sizes 1K,1M --repeat 5
+    python -m benchmarks.persistence_bench --shapes 100,10000
+    python -m benchmarks.persistence_bench --save-baseline
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from .app_db import use_temp_database
+from .baseline import BASELINES_DIR, RssSampler, compare, load_result, print_table, write_result
+from .workloads import build_board, shapes_for_size
+
+DEFAULT_BASELINE = BASELINES_DIR / "persistence.json"
+DEFAULT_SIZES = "1K,100K,1M,10M,50M"
+DEBOUNCE_BURST = 100
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma-separated target encoded sizes (K/M suffixes)")
+    parser.add_argument("--shapes", help="comma-separated shape counts (overrides --sizes)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement (median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="result file (default: benchmarks/results/...)")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="baseline to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="also write the result as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+
+async def measure(repeat: int, operation: Callable) -> tuple[float, int]:
+    """Run an (async or sync) operation repeat times; return (median ms, max RSS growth)."""
+    timings, growth = [], 0
+    for _ in range(repeat):
+        with RssSampler() as sampler:
+            started = time.perf_counter()
+            result = operation()
+            if asyncio.iscoroutine(result):
+                await result
+            timings.append((time.perf_counter() - started) * 1000)
+        growth = max(growth, sampler.growth_bytes)
+    return statistics.median(timings), growth
+
+
+async def bench_case(shape_count: int, args: argparse.Namespace) -> dict:
+    from pycrdt import Doc
+    from canvas.persistence import BoardPersistence
+    from canvas.spatial_index import ShapeIndex
+
+    board_id = f"bench-{shape_count}"
+    doc = build_board(shape_count, args.seed)
+    persistence = BoardPersistence()
+
+    encode_ms, encode_mem = await measure(args.repeat, doc.get_update)
+    save_ms, save_mem = await measure(args.repeat, lambda: persistence.save(board_id, doc))
+    load_ms, load_mem = await measure(args.repeat, lambda: persistence.load(board_id))
+    state = await persistence.load(board_id)
+
+    def apply():
+        Doc().apply_update(state)
+
+    def apply_indexed():
+        fresh = Doc()
+        index = ShapeIndex(fresh)
+        fresh.apply_update(state)
+        index.close()
+
+    apply_ms, apply_mem = await measure(args.repeat, apply)
+    indexed_ms, indexed_mem = await measure(args.repeat, apply_indexed)
+
+    # Burst of debounced saves: scheduling cost per call, and one write at the end
+    debounced = BoardPersistence(debounce_seconds=0.01)
+    started = time.perf_counter()
+    for _ in range(DEBOUNCE_BURST):
+        await debounced.save_debounced(board_id, doc)
+    call_us = (time.perf_counter() - started) / DEBOUNCE_BURST * 1e6
+    while debounced.pending_count:
+        await asyncio.sleep(0.001)
+    burst_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        "shapes": shape_count,
+        "state_bytes": len(state),
+        "encode_ms": encode_ms,
+        "save_ms": save_ms,
+        "load_ms": load_ms,
+        "apply_ms": apply_ms,
+        "apply_indexed_ms": indexed_ms,
+        "debounced_call_us": call_us,
+        "debounced_burst_ms": burst_ms,
+        "encode_mem_mb": encode_mem / 2**20,
+        "save_mem_mb": save_mem / 2**20,
+        "load_mem_mb": load_mem / 2**20,
+        "apply_mem_mb": apply_mem / 2**20,
+        "apply_indexed_mem_mb": indexed_mem / 2**20,
+    }
+
+
+async def run(shape_counts: list[int], labels: list[str], args: argparse.Namespace) -> dict:
+    results = {}
+    for label, shape_count in zip(labels, shape_counts):
+        print(f"{label}: {shape_count} shapes...", file=sys.stderr)
+        results[label] = await bench_case(shape_count, args)
+    return results
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.repeat < 1:
+        print("repeat must be positive", file=sys.stderr)
+        return 2
+
+    if args.shapes:
+        shape_counts = [int(v) for v in args.shapes.split(",")]
+        labels = [f"{count}_shapes" for count in shape_counts]
+    else:
+        sizes = [v.strip().upper() for v in args.sizes.split(",")]
+        shape_counts = [shapes_for_size(parse_size(size), args.seed) for size in sizes]
+        labels = [f"board_{size}" for size in sizes]
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        use_temp_database(tmpdir, "persistence_bench")
+        results = asyncio.run(run(shape_counts, labels, args))
+
+    params = {"shape_counts": shape_counts, "repeat": args.repeat, "seed": args.seed}
+    baseline = load_result(args.baseline)
+    if baseline and baseline.get("params") != params:
+        print(f"Baseline {args.baseline} was recorded with different params; not comparing")
+        baseline = None
+
+    print_table(results, baseline)
+    path = write_result("persistence", params, results, args.output)
+    print(f"\nResult written to {path}")
+    if args.save_baseline:
+        write_result("persistence", params, results, args.baseline)
+        print(f"Baseline written to {args.baseline}")
+
+    if baseline:
+        regressions = compare(
+            results, baseline,
+            lower_is_better={
+                "encode_ms", "save_ms", "load_ms", "apply_ms", "apply_indexed_ms",
+                "debounced_call_us", "encode_mem_mb", "save_mem_mb", "load_mem_mb",
+                "apply_mem_mb", "apply_indexed_mem_mb",
+            },
+            higher_is_better=set(),
+            tolerance=args.tolerance,
+        )
+        if regressions:
+            print("\nRegressions vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
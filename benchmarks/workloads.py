@@ -0,0 +1,141 @@
+"""
+Synthetic tldraw workloads for canvas benchmarks.
+
+Produces records and Yjs updates in the same layout the frontend writes:
+a Y.Array named "tldraw" of {key, val} entries managed with YKeyValue
+semantics (setting a key appends a new entry and deletes the old one).
+"""
+import random
+from typing import Optional
+from pycrdt import Array, Doc
+
+SHAPE_TYPES = ("geo", "note", "text", "draw", "todo")
+
+
+def make_shape(rng: random.Random, shape_id: str, page_id: str = "page:page") -> dict:
+    """Build a plausible tldraw shape record."""
+    shape_type = rng.choice(SHAPE_TYPES)
+    record = {
+        "id": shape_id,
+        "typeName": "shape",
+        "type": shape_type,
+        "x": rng.uniform(-5000, 5000),
+        "y": rng.uniform(-5000, 5000),
+        "rotation": 0,
+        "index": f"a{rng.randrange(1, 10_000)}",
+        "parentId": page_id,
+        "isLocked": False,
+        "opacity": 1,
+        "meta": {},
+    }
+    if shape_type == "draw":
+        points = [{"x": rng.uniform(0, 300), "y": rng.uniform(0, 300), "z": 0.5} for _ in range(rng.randrange(10, 120))]
+        record["props"] = {"color": "black", "size": "m", "segments": [{"type": "free", "points": points}]}
+    elif shape_type == "todo":
+        record["props"] = {
+            "w": 280, "h": 100, "title": f"Task {shape_id}", "completed": False,
+            "dueDate": None, "assigneeId": None, "assigneeName": None,
+            "priority": "medium", "backendId": None, "listId": None,
+        }
+    else:
+        record["props"] = {
+            "w": rng.uniform(50, 400), "h": rng.uniform(50, 400),
+            "color": rng.choice(("black", "blue", "red", "green")),
+            "text": "lorem ipsum " * rng.randrange(0, 20),
+        }
+    return record
+
+
+def kv_set(store: Array, key: str, value: dict, positions: dict[str, int]) -> None:
+    """YKeyValue.set: append the new entry, then delete the superseded one."""
+    store.append({"key": key, "val": value})
+    old = positions.get(key)
+    positions[key] = len(store) - 1
+    if old is not None:
+        del store[old]
+        for other, index in positions.items():
+            if index > old:
+                positions[other] = index - 1
+
+
+def kv_delete(store: Array, key: str, positions: dict[str, int]) -> None:
+    """YKeyValue.delete."""
+    old = positions.pop(key, None)
+    if old is None:
+        return
+    del store[old]
+    for other, index in positions.items():
+        if index > old:
+            positions[other] = index - 1
+
+
+def build_board(shape_count: int, seed: int = 0) -> Doc:
+    """Build a Y.Doc holding a board with the given number of shapes."""
+    rng = random.Random(seed)
+    doc = Doc()
+    store = doc.get("tldraw", type=Array)
+    with doc.transaction():
+        store.append({"key": "page:page", "val": {"id": "page:page", "typeName": "page", "name": "Page 1"}})
+        for i in range(shape_count):
+            shape_id = f"shape:{seed}-{i}"
+            store.append({"key": shape_id, "val": make_shape(rng, shape_id)})
+    return doc
+
+
+def shapes_for_size(target_bytes: int, seed: int = 0) -> int:
+    """Estimate how many shapes make an encoded board of roughly target_bytes."""
+    sample = 200
+    per_shape = max(1, len(build_board(sample, seed).get_update()) // sample)
+    return max(1, target_bytes // per_shape)
+
+
+class EditorSession:
+    """
+    One simulated editor producing a realistic stream of tldraw updates.
+
+    Mostly moves/resizes of the editor's own shapes, with occasional
+    creates and deletes, like a user working on a board.
+    """
+
+    def __init__(self, seed: int, initial_shapes: int = 5):
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self._doc = Doc()
+        self._store = self._doc.get("tldraw", type=Array)
+        self._positions: dict[str, int] = {}
+        self._shapes: dict[str, dict] = {}
+        self._counter = 0
+        self._pending: list[bytes] = []
+        self._doc.observe(lambda event: self._pending.append(event.update))
+        for _ in range(initial_shapes):
+            self._create()
+        self._pending.clear()
+
+    def _create(self) -> None:
+        self._counter += 1
+        shape_id = f"shape:editor{self._seed}-{self._counter}"
+        record = make_shape(self._rng, shape_id)
+        self._shapes[shape_id] = record
+        kv_set(self._store, shape_id, record, self._positions)
+
+    def next_update(self) -> Optional[bytes]:
+        """Perform one edit and return the resulting Yjs update."""
+        roll = self._rng.random()
+        with self._doc.transaction():
+            if roll < 0.05 or not self._shapes:
+                self._create()
+            elif roll < 0.08 and len(self._shapes) > 1:
+                shape_id = self._rng.choice(list(self._shapes))
+                del self._shapes[shape_id]
+                kv_delete(self._store, shape_id, self._positions)
+            else:
+                shape_id = self._rng.choice(list(self._shapes))
+                record = dict(self._shapes[shape_id])
+                record["x"] += self._rng.uniform(-20, 20)
+                record["y"] += self._rng.uniform(-20, 20)
+                self._shapes[shape_id] = record
+                kv_set(self._store, shape_id, record, self._positions)
+
+        update = self._pending[-1] if self._pending else None
+        self._pending.clear()
+        return update
@@ -1,11 +1,15 @@
 from .persistence import BoardPersistence
+from .render import BoardRenderer
 from .room_manager import RoomManager, Room
+from .spatial_index import ShapeIndex
 from .websocket_handler import handle_canvas_websocket, verify_canvas_access
 
 __all__ = [
     "BoardPersistence",
+    "BoardRenderer",
     "RoomManager",
     "Room",
+    "ShapeIndex",
     "handle_canvas_websocket",
     "verify_canvas_access",
 ]
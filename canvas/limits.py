@@ -0,0 +1,114 @@
+"""
+Per-connection inbound limits for canvas sockets.
+
+Each connection gets two token buckets (messages/s and bytes/s) and a maximum
+frame size. A client that exceeds its rate is first throttled (the receive
+loop sleeps until the bucket refills, which applies backpressure through the
+socket) and is disconnected only when it keeps flooding past the allowed
+throttle delay. This keeps one runaway editor from monopolising the event
+loop that every room on the worker shares.
+"""
+import time
+from typing import Optional
+
+import config
+
+# Close codes sent to clients that exceed their limits
+CLOSE_FRAME_TOO_LARGE = 1009  # RFC 6455 "Message Too Big"
+CLOSE_RATE_LIMITED = 4029     # Application range, mirrors HTTP 429
+
+
+class TokenBucket:
+    """
+    Token bucket allowing a sustained rate with a bounded burst.
+
+    Tokens may go negative: the deficit tells the caller how long to wait
+    before the consumed amount would have been allowed.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (burst size)
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+
+    def consume(self, amount: float) -> float:
+        """
+        Take tokens from the bucket.
+
+        Args:
+            amount: Tokens to consume
+
+        Returns:
+            Seconds until the bucket is back in credit (0 if within limits)
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= amount
+        if self._tokens >= 0:
+            return 0.0
+        return -self._tokens / self.rate
+
+
+class InboundLimiter:
+    """Message-rate, byte-rate and frame-size limits for one connection."""
+
+    def __init__(
+        self,
+        max_frame_bytes: Optional[int] = None,
+        messages_per_second: Optional[float] = None,
+        bytes_per_second: Optional[float] = None,
+        burst_seconds: Optional[float] = None,
+        max_throttle_seconds: Optional[float] = None
+    ):
+        """
+        Args default to the CANVAS_* settings in config.py.
+
+        Args:
+            max_frame_bytes: Largest accepted frame
+            messages_per_second: Sustained message rate
+            bytes_per_second: Sustained byte rate
+            burst_seconds: Burst allowance, in seconds of sustained rate
+            max_throttle_seconds: Longest delay before the client is disconnected
+        """
+        if max_frame_bytes is None:
+            max_frame_bytes = config.CANVAS_MAX_FRAME_BYTES
+        if messages_per_second is None:
+            messages_per_second = config.CANVAS_MAX_MESSAGES_PER_SECOND
+        if bytes_per_second is None:
+            bytes_per_second = config.CANVAS_MAX_BYTES_PER_SECOND
+        if burst_seconds is None:
+            burst_seconds = config.CANVAS_RATE_BURST_SECONDS
+        if max_throttle_seconds is None:
+            max_throttle_seconds = config.CANVAS_MAX_THROTTLE_SECONDS
+
+        self.max_frame_bytes = max_frame_bytes
+        self.max_throttle_seconds = max_throttle_seconds
+        self._messages = TokenBucket(messages_per_second, messages_per_second * burst_seconds)
+        self._bytes = TokenBucket(
+            bytes_per_second, max(bytes_per_second * burst_seconds, max_frame_bytes)
+        )
+
+    def admit(self, size: int) -> tuple[Optional[int], float]:
+        """
+        Account for an inbound frame.
+
+        Args:
+            size: Frame size in bytes
+
+        Returns:
+            Tuple of (close code or None, seconds to throttle before processing)
+        """
+        if size > self.max_frame_bytes:
+            return CLOSE_FRAME_TOO_LARGE, 0.0
+
+        delay = max(self._messages.consume(1), self._bytes.consume(size))
+        if delay > self.max_throttle_seconds:
+            return CLOSE_RATE_LIMITED, 0.0
+        return None, delay
@@ -0,0 +1,161 @@
+"""
+Canvas metrics in Prometheus text exposition format.
+
+Hot paths only touch preallocated objects: counters add to a float, and
+histograms bump one slot of a fixed bucket list found with bisect. Nothing is
+locked (the event loop is single-threaded) and no label sets are built per
+update. Per-room values live as plain attributes on Room and are only turned
+into labelled samples when /metrics is scraped.
+"""
+from bisect import bisect_left
+from typing import Iterable, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .room_manager import RoomManager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Counter:
+    """Monotonically increasing value."""
+
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        yield f"{self.name} {_format_value(self.value)}"
+
+
+class Histogram:
+    """Fixed-bucket histogram (cumulative counts are computed at scrape time)."""
+
+    __slots__ = ("name", "help", "buckets", "counts", "sum", "count")
+
+    def __init__(self, name: str, help: str, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        # One slot per bucket plus +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{_format_value(bound)}"}} {cumulative}'
+        yield f'{self.name}_bucket{{le="+Inf"}} {self.count}'
+        yield f"{self.name}_sum {_format_value(self.sum)}"
+        yield f"{self.name}_count {self.count}"
+
+
+# Process-wide metrics
+UPDATES = Counter("canvas_updates_total", "Yjs updates applied from clients")
+UPDATE_BYTES = Counter("canvas_update_bytes_total", "Bytes of Yjs updates applied from clients")
+BROADCAST_FRAMES = Counter("canvas_broadcast_frames_total", "Frames sent to room clients")
+ROOMS_LOADED = Counter("canvas_rooms_loaded_total", "Rooms loaded into memory")
+ROOMS_UNLOADED = Counter("canvas_rooms_unloaded_total", "Rooms unloaded after inactivity")
+CONNECTIONS_LIMITED = Counter(
+    "canvas_connections_limited_total", "Canvas sockets closed for exceeding inbound limits"
+)
+ROOM_LOAD_SECONDS = Histogram("canvas_room_load_seconds", "Time to load a room from persistence")
+SAVE_SECONDS = Histogram("canvas_persistence_save_seconds", "Time to encode and save a document")
+SAVE_FAILURES = Counter("canvas_persistence_save_failures_total", "Failed document saves")
+SAVED_BYTES = Counter("canvas_persistence_saved_bytes_total", "Bytes written by document saves")
+TODO_PROJECTION_WRITES = Counter(
+    "canvas_todo_projection_writes_total", "TODO items written from canvas shape edits"
+)
+TODO_PROJECTION_FAILURES = Counter(
+    "canvas_todo_projection_failures_total", "Failed TODO projection transactions"
+)
+
+PROCESS_METRICS = (
+    UPDATES, UPDATE_BYTES, BROADCAST_FRAMES, ROOMS_LOADED, ROOMS_UNLOADED,
+    CONNECTIONS_LIMITED, ROOM_LOAD_SECONDS, SAVE_SECONDS, SAVE_FAILURES, SAVED_BYTES,
+    TODO_PROJECTION_WRITES, TODO_PROJECTION_FAILURES,
+)
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _gauge(name: str, help: str, value: float) -> Iterable[str]:
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} gauge"
+    yield f"{name} {_format_value(value)}"
+
+
+def render(room_manager: Optional["RoomManager"] = None) -> str:
+    """
+    Render all metrics in Prometheus text format.
+
+    Args:
+        room_manager: Live room manager to collect gauges and per-room series from
+
+    Returns:
+        Exposition text
+    """
+    lines: list[str] = []
+    for metric in PROCESS_METRICS:
+        lines.extend(metric.render())
+
+    if room_manager is not None:
+        rooms = room_manager.rooms()
+        lines.extend(_gauge("canvas_rooms", "Rooms held in memory", len(rooms)))
+        lines.extend(_gauge(
+            "canvas_clients", "Connected canvas clients", sum(r.client_count for r in rooms)
+        ))
+        lines.extend(_gauge(
+            "canvas_relay_clients", "Overflow viewers served by relay tiers",
+            sum(len(r.relay.clients) for r in rooms)
+        ))
+        lines.extend(_gauge(
+            "canvas_pending_saves", "Documents with a debounced save pending",
+            room_manager.persistence.pending_count
+        ))
+
+        per_room = (
+            ("canvas_room_clients", "gauge", "Connected clients per room",
+             lambda r: r.client_count),
+            ("canvas_room_updates_total", "counter", "Updates applied per room",
+             lambda r: r.updates_total),
+            ("canvas_room_update_bytes_total", "counter", "Update bytes applied per room",
+             lambda r: r.update_bytes_total),
+            ("canvas_room_doc_bytes", "gauge", "Last known encoded document size per room",
+             lambda r: room_manager.persistence.saved_size(r.board_id, r.subdoc_id)),
+        )
+        for name, kind, help, getter in per_room:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for room in rooms:
+                labels = f'board_id="{_escape(room.board_id)}",subdoc="{_escape(room.subdoc_id or "")}"'
+                lines.append(f"{name}{{{labels}}} {_format_value(getter(room))}")
+
+    lines.append("")
+    return "\n".join(lines)
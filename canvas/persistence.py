@@ -9,14 +9,25 @@ Design note: Uses raw SQL instead of ORM for board_states table because:
 - No relationships, no complex queries, no joins needed
 - Binary BLOB handling is more direct with raw SQL
 - This is intentional, not a missing model
+
+Paged boards (BoardLayout.PAGED) additionally store one row per subdocument
+in board_subdoc_states, keyed by (board_id, subdoc_id). Root documents of
+paged boards still live in board_states.
 """
 from datetime import datetime
 from typing import Optional
 import asyncio
+import time
 from sqlalchemy import text
 from pycrdt import Doc
 from database import async_session
 
+from . import metrics
+
+
+def _state_key(board_id: str, subdoc_id: Optional[str]) -> str:
+    return board_id if subdoc_id is None else f"{board_id}/{subdoc_id}"
+
 
 class BoardPersistence:
     """
@@ -33,26 +44,73 @@ class BoardPersistence:
         """
         self._debounce_seconds = debounce_seconds
         self._pending_saves: dict[str, asyncio.Task] = {}
+        # Encoded size of each document as last loaded/saved (for metrics)
+        self._saved_sizes: dict[str, int] = {}
+        # time.monotonic() at which each document's last successful save was encoded
+        self._encoded_at: dict[str, float] = {}
+
+    @property
+    def pending_count(self) -> int:
+        """Number of documents with a debounced save pending."""
+        return len(self._pending_saves)
+
+    def saved_size(self, board_id: str, subdoc_id: Optional[str] = None) -> int:
+        """Encoded size in bytes of a document as last loaded or saved."""
+        return self._saved_sizes.get(_state_key(board_id, subdoc_id), 0)
+
+    def encoded_at(self, board_id: str, subdoc_id: Optional[str] = None) -> Optional[float]:
+        """time.monotonic() when the last successful save of a document was encoded."""
+        return self._encoded_at.get(_state_key(board_id, subdoc_id))
+
+    def is_pending(self, board_id: str, subdoc_id: Optional[str] = None) -> bool:
+        """True if a debounced save is scheduled for a document."""
+        return _state_key(board_id, subdoc_id) in self._pending_saves
+
+    def cancel_pending(self, board_id: str, subdoc_id: Optional[str] = None) -> None:
+        """Cancel a scheduled debounced save (e.g. before saving immediately)."""
+        task = self._pending_saves.pop(_state_key(board_id, subdoc_id), None)
+        if task is not None:
+            task.cancel()
 
-    async def load(self, board_id: str) -> Optional[bytes]:
+    def forget(self, board_id: str, subdoc_id: Optional[str] = None) -> None:
+        """Cancel a document's pending save and drop its size and save time (on unload)."""
+        self.cancel_pending(board_id, subdoc_id)
+        key = _state_key(board_id, subdoc_id)
+        self._saved_sizes.pop(key, None)
+        self._encoded_at.pop(key, None)
+
+    async def load(self, board_id: str, subdoc_id: Optional[str] = None) -> Optional[bytes]:
         """
         Load Y.Doc state from database.
 
         Args:
             board_id: The board UUID
+            subdoc_id: Subdocument id for paged boards, None for the root doc
 
         Returns:
             Binary Y.Doc state or None if board has no saved state
         """
         async with async_session() as session:
-            result = await session.execute(
-                text("SELECT state FROM board_states WHERE board_id = :board_id"),
-                {"board_id": board_id}
-            )
+            if subdoc_id is None:
+                result = await session.execute(
+                    text("SELECT state FROM board_states WHERE board_id = :board_id"),
+                    {"board_id": board_id}
+                )
+            else:
+                result = await session.execute(
+                    text(
+                        "SELECT state FROM board_subdoc_states "
+                        "WHERE board_id = :board_id AND subdoc_id = :subdoc_id"
+                    ),
+                    {"board_id": board_id, "subdoc_id": subdoc_id}
+                )
             row = result.fetchone()
-            return row[0] if row else None
+            if not row:
+                return None
+            self._saved_sizes[_state_key(board_id, subdoc_id)] = len(row[0])
+            return row[0]
 
-    async def save(self, board_id: str, ydoc: Doc) -> None:
+    async def save(self, board_id: str, ydoc: Doc, subdoc_id: Optional[str] = None) -> None:
         """
         Save compacted Y.Doc state to database.
 
@@ -62,30 +120,64 @@ class BoardPersistence:
         Args:
             board_id: The board UUID
             ydoc: The Y.Doc to persist
+            subdoc_id: Subdocument id for paged boards, None for the root doc
         """
+        started = time.perf_counter()
+        try:
+            await self._write_state(board_id, ydoc, subdoc_id)
+        except Exception:
+            metrics.SAVE_FAILURES.inc()
+            raise
+        finally:
+            metrics.SAVE_SECONDS.observe(time.perf_counter() - started)
+
+    async def _write_state(self, board_id: str, ydoc: Doc, subdoc_id: Optional[str]) -> None:
         # get_update() returns binary that can be applied to reconstruct the doc
         # This is more compact than logging individual updates
+        encoded_at = time.monotonic()
         state = ydoc.get_update()
 
         async with async_session() as session:
             # Upsert: insert or replace existing state
-            await session.execute(
-                text("""
-                INSERT INTO board_states (board_id, state, updated_at)
-                VALUES (:board_id, :state, :updated_at)
-                ON CONFLICT(board_id) DO UPDATE SET
-                    state = excluded.state,
-                    updated_at = excluded.updated_at
-                """),
-                {
-                    "board_id": board_id,
-                    "state": state,
-                    "updated_at": datetime.utcnow()
-                }
-            )
+            if subdoc_id is None:
+                await session.execute(
+                    text("""
+                    INSERT INTO board_states (board_id, state, updated_at)
+                    VALUES (:board_id, :state, :updated_at)
+                    ON CONFLICT(board_id) DO UPDATE SET
+                        state = excluded.state,
+                        updated_at = excluded.updated_at
+                    """),
+                    {
+                        "board_id": board_id,
+                        "state": state,
+                        "updated_at": datetime.utcnow()
+                    }
+                )
+            else:
+                await session.execute(
+                    text("""
+                    INSERT INTO board_subdoc_states (board_id, subdoc_id, state, updated_at)
+                    VALUES (:board_id, :subdoc_id, :state, :updated_at)
+                    ON CONFLICT(board_id, subdoc_id) DO UPDATE SET
+                        state = excluded.state,
+                        updated_at = excluded.updated_at
+                    """),
+                    {
+                        "board_id": board_id,
+                        "subdoc_id": subdoc_id,
+                        "state": state,
+                        "updated_at": datetime.utcnow()
+                    }
+                )
             await session.commit()
 
-    async def save_debounced(self, board_id: str, ydoc: Doc) -> None:
+        key = _state_key(board_id, subdoc_id)
+        self._saved_sizes[key] = len(state)
+        self._encoded_at[key] = encoded_at
+        metrics.SAVED_BYTES.inc(len(state))
+
+    async def save_debounced(self, board_id: str, ydoc: Doc, subdoc_id: Optional[str] = None) -> None:
         """
         Save with debouncing to reduce database writes.
 
@@ -95,21 +187,61 @@ class BoardPersistence:
         Args:
             board_id: The board UUID
             ydoc: The Y.Doc to persist
+            subdoc_id: Subdocument id for paged boards, None for the root doc
         """
+        key = _state_key(board_id, subdoc_id)
+
         # Cancel existing pending save for this board
-        if board_id in self._pending_saves:
-            self._pending_saves[board_id].cancel()
+        if key in self._pending_saves:
+            self._pending_saves[key].cancel()
 
         async def delayed_save():
             await asyncio.sleep(self._debounce_seconds)
-            await self.save(board_id, ydoc)
-            self._pending_saves.pop(board_id, None)
+            try:
+                await self.save(board_id, ydoc, subdoc_id)
+            finally:
+                # Failed saves are counted in metrics; don't leave a stale entry
+                if self._pending_saves.get(key) is task:
+                    del self._pending_saves[key]
 
-        self._pending_saves[board_id] = asyncio.create_task(delayed_save())
+        task = asyncio.create_task(delayed_save())
+        self._pending_saves[key] = task
+
+    async def list_subdocs(self, board_id: str) -> list[tuple[str, int, datetime]]:
+        """
+        List persisted subdocuments of a paged board without loading their state.
+
+        Args:
+            board_id: The board UUID
+
+        Returns:
+            List of (subdoc_id, state size in bytes, updated_at)
+        """
+        async with async_session() as session:
+            result = await session.execute(
+                text(
+                    "SELECT subdoc_id, length(state), updated_at FROM board_subdoc_states "
+                    "WHERE board_id = :board_id ORDER BY subdoc_id"
+                ),
+                {"board_id": board_id}
+            )
+            return [(row[0], row[1], row[2]) for row in result.fetchall()]
+
+    async def has_subdoc(self, board_id: str, subdoc_id: str) -> bool:
+        """True if a subdocument of a board has persisted state."""
+        async with async_session() as session:
+            result = await session.execute(
+                text(
+                    "SELECT 1 FROM board_subdoc_states "
+                    "WHERE board_id = :board_id AND subdoc_id = :subdoc_id"
+                ),
+                {"board_id": board_id, "subdoc_id": subdoc_id}
+            )
+            return result.first() is not None
 
     async def delete(self, board_id: str) -> None:
         """
-        Delete persisted state for a board.
+        Delete persisted state for a board, including its subdocuments.
 
         Args:
             board_id: The board UUID
@@ -119,6 +251,10 @@ class BoardPersistence:
                 text("DELETE FROM board_states WHERE board_id = :board_id"),
                 {"board_id": board_id}
             )
+            await session.execute(
+                text("DELETE FROM board_subdoc_states WHERE board_id = :board_id"),
+                {"board_id": board_id}
+            )
             await session.commit()
 
     async def flush_pending(self) -> None:
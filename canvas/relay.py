@@ -0,0 +1,55 @@
+"""
+Overflow relay tier for crowded rooms.
+
+Once a room holds more than its client cap, further view-only clients are
+attached to the room's RelayTier instead of Room.clients. Updates for relay
+viewers are queued and fanned out as one merged Yjs update per tick, so the
+per-update broadcast loop that editors wait on stays bounded by the cap no
+matter how many people are watching.
+"""
+from typing import Any
+from pycrdt import merge_updates
+
+from . import metrics
+
+
+class RelayTier:
+    """Batched, lower-cadence fan-out to the overflow viewers of one room."""
+
+    def __init__(self):
+        self.clients: set[Any] = set()
+        self._pending: list[bytes] = []
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def enqueue(self, update: bytes) -> None:
+        """Queue an update for the next flush (dropped if nobody is watching)."""
+        if self.clients:
+            self._pending.append(update)
+
+    async def flush(self) -> int:
+        """
+        Send all queued updates as a single merged update.
+
+        Returns:
+            Number of bytes sent per client (0 if nothing was pending)
+        """
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, []
+        frame = pending[0] if len(pending) == 1 else merge_updates(*pending)
+
+        # Viewers may leave (remove_client) while sends are awaited
+        sent = 0
+        for client in list(self.clients):
+            try:
+                await client.send_bytes(frame)
+                sent += 1
+            except Exception:
+                self.clients.discard(client)
+
+        metrics.BROADCAST_FRAMES.inc(sent)
+        return len(frame)
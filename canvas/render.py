@@ -0,0 +1,371 @@
+"""
+Server-side rendering of boards to SVG and PNG.
+
+Turns the tldraw store of a Y.Doc into a static SVG so the board list can show
+previews and thin clients can export without loading the whole board.
+
+Design notes:
+- Rendering runs in a ProcessPoolExecutor: decoding a large document and
+  building the SVG is CPU-bound and would otherwise stall the event loop that
+  serves every canvas socket. Workers receive the encoded document, not the Doc
+- Results are cached per (room, format, size, page) and reused while the
+  document fingerprint is unchanged. The fingerprint is the state vector plus
+  the delete set: a state vector alone doesn't change when shapes are only
+  deleted, which tldraw does on every shape removal
+- PNG needs the optional cairosvg package (imported lazily); SVG always works
+- Shapes are drawn approximately (geometry, colour, text), not pixel-identical
+  to tldraw's own export
+"""
+import asyncio
+import importlib.util
+import math
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from xml.sax.saxutils import escape
+from pycrdt import Array, Doc
+
+import config
+from .spatial_index import Bounds, ShapeIndex
+from .store import STORE_ARRAY_NAME
+
+FORMATS = {"svg": "image/svg+xml", "png": "image/png"}
+
+# Large but finite: GridIndex works in integer cell coordinates
+_EVERYWHERE: Bounds = (-1e12, -1e12, 1e12, 1e12)
+_PADDING = 32.0
+
+# tldraw's default (light theme) palette
+COLORS = {
+    "black": "#1d1d1d",
+    "grey": "#9fa8b2",
+    "light-violet": "#e085f4",
+    "violet": "#ae3ec9",
+    "blue": "#4465e9",
+    "light-blue": "#4ba1f1",
+    "yellow": "#f1ac4b",
+    "orange": "#e16919",
+    "green": "#099268",
+    "light-green": "#4cb05e",
+    "light-red": "#f87777",
+    "red": "#e03131",
+    "white": "#ffffff",
+}
+STROKE_WIDTHS = {"s": 2.0, "m": 3.5, "l": 5.0, "xl": 10.0}
+FONT_SIZES = {"s": 18, "m": 24, "l": 36, "xl": 44}
+PRIORITY_COLORS = {"high": "#e03131", "medium": "#f1ac4b", "low": "#4cb05e"}
+
+
+class RendererUnavailable(Exception):
+    """The requested output format needs an optional dependency that is missing."""
+
+
+def png_available() -> bool:
+    """True if cairosvg is installed, so PNG output can be produced."""
+    return importlib.util.find_spec("cairosvg") is not None
+
+
+def _num(value, default: float = 0.0) -> float:
+    return float(value) if isinstance(value, (int, float)) else default
+
+
+def _color(props: dict) -> str:
+    return COLORS.get(props.get("color"), COLORS["black"])
+
+
+def _plain_text(props: dict) -> str:
+    """Text of a shape, from the plain text prop or tldraw's rich text document."""
+    text = props.get("text")
+    if isinstance(text, str):
+        return text
+
+    def walk(node) -> str:
+        if not isinstance(node, dict):
+            return ""
+        if node.get("type") == "text":
+            return str(node.get("text") or "")
+        parts = [walk(child) for child in node.get("content") or []]
+        return ("\n" if node.get("type") == "doc" else "").join(parts)
+
+    return walk(props.get("richText"))
+
+
+def _text(text: str, x: float, y: float, size: float, fill: str, anchor: str = "start") -> str:
+    if not text:
+        return ""
+    lines = text.split("\n")
+    spans = "".join(
+        f'<tspan x="{x:.1f}" dy="{0 if i == 0 else size * 1.3:.1f}">{escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (
+        f'<text x="{x:.1f}" y="{y:.1f}" font-family="sans-serif" font-size="{size}" '
+        f'fill="{fill}" text-anchor="{anchor}" dominant-baseline="hanging">{spans}</text>'
+    )
+
+
+def _polyline(points: list[tuple[float, float]], stroke: str, width: float, opacity: float = 1.0) -> str:
+    if not points:
+        return ""
+    coords = " ".join(f"{x:.1f},{y:.1f}" for x, y in points)
+    return (
+        f'<polyline points="{coords}" fill="none" stroke="{stroke}" stroke-width="{width}" '
+        f'stroke-linecap="round" stroke-linejoin="round" stroke-opacity="{opacity}"/>'
+    )
+
+
+def _shape_body(record: dict) -> str:
+    """SVG for a shape in its own coordinate space."""
+    props = record.get("props") or {}
+    shape_type = record.get("type")
+    w, h = _num(props.get("w")), _num(props.get("h"))
+    stroke = _color(props)
+    width = STROKE_WIDTHS.get(props.get("size"), STROKE_WIDTHS["m"])
+    font = FONT_SIZES.get(props.get("size"), FONT_SIZES["m"])
+
+    if shape_type == "geo":
+        fill = "none" if props.get("fill", "none") == "none" else stroke
+        fill_opacity = 0.25 if props.get("fill") == "semi" else 0.5
+        style = f'fill="{fill}" fill-opacity="{fill_opacity}" stroke="{stroke}" stroke-width="{width}"'
+        if props.get("geo") in ("ellipse", "oval"):
+            body = f'<ellipse cx="{w / 2:.1f}" cy="{h / 2:.1f}" rx="{w / 2:.1f}" ry="{h / 2:.1f}" {style}/>'
+        else:
+            body = f'<rect width="{w:.1f}" height="{h:.1f}" rx="4" {style}/>'
+        return body + _text(_plain_text(props), w / 2, h / 2 - font / 2, font, COLORS["black"], "middle")
+
+    if shape_type == "note":
+        size = w or 200.0
+        return (
+            f'<rect width="{size:.1f}" height="{h or size:.1f}" rx="6" fill="{stroke}" fill-opacity="0.35"/>'
+            + _text(_plain_text(props), 16, 16, font, COLORS["black"])
+        )
+
+    if shape_type == "text":
+        return _text(_plain_text(props), 0, 0, font, stroke)
+
+    if shape_type in ("draw", "highlight"):
+        highlight = shape_type == "highlight"
+        return "".join(
+            _polyline(
+                [(_num(p.get("x")), _num(p.get("y"))) for p in segment.get("points") or []],
+                stroke, width * (4 if highlight else 1), 0.5 if highlight else 1.0
+            )
+            for segment in props.get("segments") or []
+        )
+
+    if shape_type == "line":
+        handles = props.get("points")
+        if isinstance(handles, dict):
+            ordered = sorted(handles.values(), key=lambda p: str(p.get("index") or ""))
+            return _polyline([(_num(p.get("x")), _num(p.get("y"))) for p in ordered], stroke, width)
+        return ""
+
+    if shape_type == "arrow":
+        start, end = props.get("start") or {}, props.get("end") or {}
+        x1, y1, x2, y2 = _num(start.get("x")), _num(start.get("y")), _num(end.get("x")), _num(end.get("y"))
+        angle = math.atan2(y2 - y1, x2 - x1)
+        head = [
+            (x2 - 14 * math.cos(angle - 0.45), y2 - 14 * math.sin(angle - 0.45)),
+            (x2, y2),
+            (x2 - 14 * math.cos(angle + 0.45), y2 - 14 * math.sin(angle + 0.45)),
+        ]
+        return _polyline([(x1, y1), (x2, y2)], stroke, width) + _polyline(head, stroke, width)
+
+    if shape_type == "frame":
+        return (
+            f'<rect width="{w:.1f}" height="{h:.1f}" fill="#ffffff" stroke="{COLORS["grey"]}" stroke-width="1"/>'
+            + _text(str(props.get("name") or ""), 0, -20, 14, COLORS["grey"])
+        )
+
+    if shape_type == "todo":
+        accent = PRIORITY_COLORS.get(props.get("priority"), PRIORITY_COLORS["medium"])
+        check = '<path d="M15 25 l5 5 l10 -10" fill="none" stroke="#1d1d1d" stroke-width="2"/>' \
+            if props.get("completed") else ""
+        return (
+            f'<rect width="{w:.1f}" height="{h:.1f}" rx="8" fill="#ffffff" stroke="#d0d4d9" stroke-width="1"/>'
+            f'<rect width="4" height="{h:.1f}" fill="{accent}"/>'
+            '<rect x="12" y="16" width="20" height="20" rx="3" fill="none" stroke="#1d1d1d" stroke-width="1.5"/>'
+            + check
+            + _text(str(props.get("title") or ""), 44, 18, 16, COLORS["black"])
+        )
+
+    # Images, embeds, bookmarks and unknown shapes: outline placeholder
+    if w or h:
+        return (
+            f'<rect width="{w:.1f}" height="{h:.1f}" fill="#f3f4f6" stroke="{COLORS["grey"]}" '
+            f'stroke-width="1" stroke-dasharray="6 4"/>'
+        )
+    return ""
+
+
+def _first_page_id(doc: Doc) -> Optional[str]:
+    pages = {}
+    for entry in doc.get(STORE_ARRAY_NAME, type=Array):
+        value = entry.get("val") if isinstance(entry, dict) else None
+        if isinstance(value, dict) and value.get("typeName") == "page":
+            pages[entry.get("key")] = value
+    if not pages:
+        return None
+    first = min(pages.values(), key=lambda p: (str(p.get("index") or ""), str(p.get("id") or "")))
+    return first.get("id")
+
+
+def render_svg(state: bytes, size: int = 512, page_id: Optional[str] = None) -> str:
+    """
+    Render an encoded board document to SVG.
+
+    Args:
+        state: Encoded Y.Doc (as stored by BoardPersistence)
+        size: Longest side of the output in pixels
+        page_id: tldraw page to render (default: the first page)
+
+    Returns:
+        SVG document text
+    """
+    doc = Doc()
+    index = ShapeIndex(doc)
+    if state:
+        doc.apply_update(state)
+    index.close()
+
+    if page_id is None:
+        page_id = _first_page_id(doc)
+    records = index.query(_EVERYWHERE, page_id)
+
+    elements = []
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for record in records:
+        bounds = index.get_bounds(record["id"])
+        transform = index.page_transform(record["id"])
+        body = _shape_body(record)
+        if bounds is None or transform is None or not body:
+            continue
+        min_x, min_y = min(min_x, bounds[0]), min(min_y, bounds[1])
+        max_x, max_y = max(max_x, bounds[2]), max(max_y, bounds[3])
+        x, y, rotation = transform
+        opacity = _num(record.get("opacity"), 1.0)
+        elements.append(
+            f'<g transform="translate({x:.1f} {y:.1f}) rotate({math.degrees(rotation):.2f})"'
+            + (f' opacity="{opacity}"' if opacity < 1 else "")
+            + f">{body}</g>"
+        )
+
+    if not elements:
+        min_x, min_y, max_x, max_y = 0.0, 0.0, 1.0, 1.0
+    min_x, min_y = min_x - _PADDING, min_y - _PADDING
+    view_w, view_h = max_x - min_x + _PADDING, max_y - min_y + _PADDING
+    scale = size / max(view_w, view_h)
+    width, height = max(1, round(view_w * scale)), max(1, round(view_h * scale))
+
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="{min_x:.1f} {min_y:.1f} {view_w:.1f} {view_h:.1f}">'
+        f'<rect x="{min_x:.1f}" y="{min_y:.1f}" width="{view_w:.1f}" height="{view_h:.1f}" fill="#ffffff"/>'
+        + "".join(elements)
+        + "</svg>"
+    )
+
+
+def render_png(svg: str) -> bytes:
+    """Rasterize SVG with cairosvg."""
+    try:
+        import cairosvg
+    except ImportError:
+        raise RendererUnavailable("PNG rendering requires cairosvg")
+    return cairosvg.svg2png(bytestring=svg.encode())
+
+
+def render(state: bytes, fmt: str = "svg", size: int = 512, page_id: Optional[str] = None) -> bytes:
+    """Render an encoded document to the given format (runs in worker processes)."""
+    svg = render_svg(state, size, page_id)
+    if fmt == "png":
+        return render_png(svg)
+    return svg.encode()
+
+
+def document_fingerprint(ydoc: Doc) -> bytes:
+    """State vector plus delete set: changes whenever the document content does."""
+    state_vector = ydoc.get_state()
+    # Diff against our own state vector carries no structs, only the delete set
+    return state_vector + ydoc.get_update(state_vector)
+
+
+class BoardRenderer:
+    """Renders documents in a process pool and caches the latest result per view."""
+
+    def __init__(self, max_workers: Optional[int] = None, cache_size: Optional[int] = None):
+        """
+        Args:
+            max_workers: Worker processes (default: config.CANVAS_RENDER_WORKERS)
+            cache_size: Rendered views kept in memory (default: config.CANVAS_RENDER_CACHE_SIZE)
+        """
+        self._max_workers = config.CANVAS_RENDER_WORKERS if max_workers is None else max_workers
+        self._cache_size = config.CANVAS_RENDER_CACHE_SIZE if cache_size is None else cache_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # (doc key, format, size, page) -> (fingerprint, rendered bytes), in LRU order
+        self._cache: OrderedDict[tuple, tuple[bytes, bytes]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self._max_workers)
+        return self._executor
+
+    async def render(
+        self,
+        doc_key: str,
+        ydoc: Doc,
+        fmt: str = "svg",
+        size: int = 512,
+        page_id: Optional[str] = None
+    ) -> bytes:
+        """
+        Render a document, reusing the cached result if it hasn't changed.
+
+        Args:
+            doc_key: Stable key of the document (e.g. the room key)
+            ydoc: The live Y.Doc
+            fmt: "svg" or "png"
+            size: Longest side of the output in pixels
+            page_id: tldraw page to render (default: the first page)
+
+        Returns:
+            Rendered image bytes
+
+        Raises:
+            RendererUnavailable: PNG requested without cairosvg installed
+        """
+        if fmt == "png" and not png_available():
+            raise RendererUnavailable("PNG rendering requires cairosvg")
+
+        view = (doc_key, fmt, size, page_id)
+        fingerprint = document_fingerprint(ydoc)
+        cached = self._cache.get(view)
+        if cached is not None and cached[0] == fingerprint:
+            self._cache.move_to_end(view)
+            return cached[1]
+
+        # Concurrent requests for the same view and content share one render
+        inflight_key = (view, fingerprint)
+        future = self._inflight.get(inflight_key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(
+                self._get_executor(), render, ydoc.get_update(), fmt, size, page_id
+            )
+            self._inflight[inflight_key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(inflight_key, None))
+
+        data = await asyncio.shield(future)
+        self._cache[view] = (fingerprint, data)
+        self._cache.move_to_end(view)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return data
+
+    def close(self) -> None:
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
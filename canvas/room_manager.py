@@ -6,29 +6,91 @@ Manages Y.Doc instances per board with:
 - Automatic persistence on changes (debounced)
 - Cleanup after inactivity
 - Client tracking per room
+- Spatial index of shapes for viewport queries
+- Optional subdocument rooms for paged boards (one Y.Doc per page/frame)
+- Overflow relay tier for view-only clients above a per-room cap
+- Server-side projection of TODO shape edits into todo_items
 """
 import asyncio
+import logging
+import math
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from pycrdt import Doc
 from fastapi import WebSocket
 
+import config
+from . import metrics
 from .persistence import BoardPersistence
+from .relay import RelayTier
+from .spatial_index import Bounds, ShapeIndex
+from .todo_projection import TodoProjection
+
+logger = logging.getLogger(__name__)
+
+# Close code for server-initiated disconnects (clients should reconnect)
+SERVER_CLOSE_CODE = 1012  # Service Restart
+
+
+def room_key(board_id: str, subdoc_id: Optional[str] = None) -> str:
+    """Key of a room: the board id, or "board_id/subdoc_id" for subdocuments."""
+    return board_id if subdoc_id is None else f"{board_id}/{subdoc_id}"
 
 
 class Room:
     """A single board room with its Y.Doc and connected clients."""
 
-    def __init__(self, board_id: str, ydoc: Doc):
+    # Time constant of the exponentially decayed update rate
+    RATE_WINDOW_SECONDS = 60.0
+
+    def __init__(self, board_id: str, ydoc: Doc, subdoc_id: Optional[str] = None):
         self.board_id = board_id
+        self.subdoc_id = subdoc_id
+        self.key = room_key(board_id, subdoc_id)
         self.ydoc = ydoc
         self.clients: set[WebSocket] = set()
+        # View-only clients beyond the room's client cap
+        self.relay = RelayTier()
         self.last_activity = datetime.utcnow()
+        # Plain counters, rendered by canvas.metrics at scrape time
+        self.updates_total = 0
+        self.update_bytes_total = 0
+        # time.monotonic() of the last applied update (compared with save times)
+        self.last_update_time: Optional[float] = None
+        self._decayed_updates = 0.0
+        # Observes ydoc, so must exist before persisted state is applied
+        self.shape_index = ShapeIndex(ydoc)
+        self.todo_projection = TodoProjection(ydoc)
 
     def touch(self):
         """Update last activity timestamp."""
         self.last_activity = datetime.utcnow()
 
+    def record_update(self, size: int):
+        """Count an applied update of the given size."""
+        now = time.monotonic()
+        if self.last_update_time is not None:
+            self._decayed_updates *= math.exp(
+                (self.last_update_time - now) / self.RATE_WINDOW_SECONDS
+            )
+        self._decayed_updates += 1
+        self.last_update_time = now
+        self.updates_total += 1
+        self.update_bytes_total += size
+
+    def update_rate(self) -> float:
+        """Updates per second, exponentially averaged over RATE_WINDOW_SECONDS."""
+        if self.last_update_time is None:
+            return 0.0
+        idle = time.monotonic() - self.last_update_time
+        return self._decayed_updates * math.exp(-idle / self.RATE_WINDOW_SECONDS) / self.RATE_WINDOW_SECONDS
+
+    @property
+    def client_count(self) -> int:
+        """Clients in the room, including overflow relay viewers."""
+        return len(self.clients) + len(self.relay.clients)
+
 
 class RoomManager:
     """
@@ -39,31 +101,82 @@ class RoomManager:
     - Auto-persist: Changes saved to database (debounced)
     - Auto-cleanup: Rooms unloaded after inactivity
     - Reconnection support: New connections get full current state (SYNC-05)
+    - Subdocuments: paged boards get one lazily loaded room per subdoc_id
+    - Overflow relay: view-only clients beyond client_cap receive batched
+      updates every relay_interval seconds from a single relay task
+    - TODO projection: edits to linked TODO shapes are written to todo_items
+      in batches by a single projection task
+
+    Rooms are keyed by room_key(board_id, subdoc_id); every method taking a
+    board_id also accepts an optional subdoc_id to address a subdocument room.
     """
 
     INACTIVITY_TIMEOUT = timedelta(minutes=30)
     CLEANUP_INTERVAL = timedelta(minutes=5)
 
-    def __init__(self, persistence: BoardPersistence):
+    def __init__(
+        self,
+        persistence: BoardPersistence,
+        client_cap: Optional[int] = None,
+        relay_interval: Optional[float] = None
+    ):
+        """
+        Args:
+            persistence: Persistence layer for Y.Doc state
+            client_cap: Direct clients per room before viewers overflow to the
+                relay tier (default: config.CANVAS_ROOM_CLIENT_CAP)
+            relay_interval: Seconds between relay flushes
+                (default: config.CANVAS_RELAY_INTERVAL_SECONDS)
+        """
         self._persistence = persistence
         self._rooms: dict[str, Room] = {}
         self._cleanup_task: Optional[asyncio.Task] = None
+        self._relay_task: Optional[asyncio.Task] = None
+        self._projection_task: Optional[asyncio.Task] = None
+        self._client_cap = config.CANVAS_ROOM_CLIENT_CAP if client_cap is None else client_cap
+        self._relay_interval = (
+            config.CANVAS_RELAY_INTERVAL_SECONDS if relay_interval is None else relay_interval
+        )
+
+    @property
+    def persistence(self) -> BoardPersistence:
+        """The persistence layer backing this manager's rooms."""
+        return self._persistence
+
+    def rooms(self) -> list[Room]:
+        """Snapshot of rooms currently held in memory."""
+        return list(self._rooms.values())
+
+    def get_room(self, board_id: str, subdoc_id: Optional[str] = None) -> Optional[Room]:
+        """Return a room if it is loaded, without loading it."""
+        return self._rooms.get(room_key(board_id, subdoc_id))
+
+    def is_dirty(self, room: Room) -> bool:
+        """True if the room has updates newer than its last successful save."""
+        if room.last_update_time is None:
+            return False
+        encoded_at = self._persistence.encoded_at(room.board_id, room.subdoc_id)
+        return encoded_at is None or room.last_update_time > encoded_at
 
     async def start(self):
-        """Start the background cleanup task."""
+        """Start the background cleanup, relay and TODO projection tasks."""
         self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+        self._relay_task = asyncio.create_task(self._relay_loop())
+        self._projection_task = asyncio.create_task(self._projection_loop())
 
     async def stop(self):
-        """Stop cleanup and flush pending persistence."""
-        if self._cleanup_task:
-            self._cleanup_task.cancel()
-            try:
-                await self._cleanup_task
-            except asyncio.CancelledError:
-                pass
+        """Stop background tasks and flush pending persistence."""
+        for task in (self._cleanup_task, self._relay_task, self._projection_task):
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await self._flush_projections()
         await self._persistence.flush_pending()
 
-    async def get_or_create_room(self, board_id: str) -> Room:
+    async def get_or_create_room(self, board_id: str, subdoc_id: Optional[str] = None) -> Room:
         """
         Get existing room or create new one.
 
@@ -74,56 +187,85 @@ class RoomManager:
 
         Args:
             board_id: The board UUID
+            subdoc_id: Subdocument id for paged boards, None for the root doc
 
         Returns:
             Room instance with Y.Doc
         """
-        if board_id in self._rooms:
-            room = self._rooms[board_id]
+        key = room_key(board_id, subdoc_id)
+        if key in self._rooms:
+            room = self._rooms[key]
             room.touch()
             return room
 
+        started = time.perf_counter()
+
         # Create new Y.Doc
         ydoc = Doc()
+        room = Room(board_id, ydoc, subdoc_id)
 
         # Load persisted state if exists (enables reconnection to get full state)
-        state = await self._persistence.load(board_id)
+        state = await self._persistence.load(board_id, subdoc_id)
         if state:
             ydoc.apply_update(state)
 
-        room = Room(board_id, ydoc)
-        self._rooms[board_id] = room
+        self._rooms[key] = room
+        metrics.ROOMS_LOADED.inc()
+        metrics.ROOM_LOAD_SECONDS.observe(time.perf_counter() - started)
         return room
 
-    async def add_client(self, board_id: str, websocket: WebSocket) -> Room:
+    async def add_client(
+        self,
+        board_id: str,
+        websocket: WebSocket,
+        subdoc_id: Optional[str] = None,
+        read_only: bool = False
+    ) -> Room:
         """
         Add a client to a room.
 
+        Editors always join directly. Read-only clients join the relay tier
+        once the room already holds client_cap direct clients.
+
         Args:
             board_id: The board UUID
             websocket: The client's WebSocket connection
+            subdoc_id: Subdocument id for paged boards, None for the root doc
+            read_only: True if the client cannot send updates
 
         Returns:
             The room the client joined
         """
-        room = await self.get_or_create_room(board_id)
-        room.clients.add(websocket)
+        room = await self.get_or_create_room(board_id, subdoc_id)
+        if read_only and len(room.clients) >= self._client_cap:
+            room.relay.clients.add(websocket)
+        else:
+            room.clients.add(websocket)
         room.touch()
         return room
 
-    def remove_client(self, board_id: str, websocket: WebSocket):
+    def remove_client(self, board_id: str, websocket: WebSocket, subdoc_id: Optional[str] = None):
         """
         Remove a client from a room.
 
         Args:
             board_id: The board UUID
             websocket: The client's WebSocket connection
+            subdoc_id: Subdocument id for paged boards, None for the root doc
         """
-        if board_id in self._rooms:
-            room = self._rooms[board_id]
+        key = room_key(board_id, subdoc_id)
+        if key in self._rooms:
+            room = self._rooms[key]
             room.clients.discard(websocket)
-
-    async def broadcast(self, board_id: str, data: bytes, exclude: Optional[WebSocket] = None):
+            room.relay.clients.discard(websocket)
+
+    async def broadcast(
+        self,
+        board_id: str,
+        data: bytes,
+        exclude: Optional[WebSocket] = None,
+        subdoc_id: Optional[str] = None
+    ):
         """
         Broadcast binary data to all clients in a room.
 
@@ -131,24 +273,40 @@ class RoomManager:
             board_id: The board UUID
             data: Binary data to send
             exclude: Optional WebSocket to exclude from broadcast
+            subdoc_id: Subdocument id for paged boards, None for the root doc
         """
-        if board_id not in self._rooms:
+        key = room_key(board_id, subdoc_id)
+        if key not in self._rooms:
             return
 
-        room = self._rooms[board_id]
+        room = self._rooms[key]
         dead_clients = set()
+        sent = 0
 
         for client in room.clients:
             if client != exclude:
                 try:
                     await client.send_bytes(data)
+                    sent += 1
                 except Exception:
                     dead_clients.add(client)
 
+        metrics.BROADCAST_FRAMES.inc(sent)
+
         # Clean up dead connections
         room.clients -= dead_clients
 
-    async def apply_update(self, board_id: str, update: bytes, source: WebSocket):
+        # Overflow viewers get it in the next batched relay flush
+        room.relay.enqueue(data)
+
+    async def apply_update(
+        self,
+        board_id: str,
+        update: bytes,
+        source: WebSocket,
+        subdoc_id: Optional[str] = None,
+        user_id: Optional[int] = None
+    ):
         """
         Apply a Y.Doc update and broadcast to other clients.
 
@@ -156,33 +314,196 @@ class RoomManager:
             board_id: The board UUID
             update: Binary Yjs update
             source: The WebSocket that sent the update
+            subdoc_id: Subdocument id for paged boards, None for the root doc
+            user_id: User the update is applied for; TODO shape edits are
+                only projected to todo_items when set
         """
-        if board_id not in self._rooms:
+        key = room_key(board_id, subdoc_id)
+        if key not in self._rooms:
             return
 
-        room = self._rooms[board_id]
-        room.ydoc.apply_update(update)
+        room = self._rooms[key]
+        room.todo_projection.editor_id = user_id
+        try:
+            room.ydoc.apply_update(update)
+        finally:
+            room.todo_projection.editor_id = None
         room.touch()
+        room.record_update(len(update))
+        metrics.UPDATES.inc()
+        metrics.UPDATE_BYTES.inc(len(update))
 
         # Broadcast to other clients
-        await self.broadcast(board_id, update, exclude=source)
+        await self.broadcast(board_id, update, exclude=source, subdoc_id=subdoc_id)
 
         # Debounced persistence
-        await self._persistence.save_debounced(board_id, room.ydoc)
+        await self._persistence.save_debounced(board_id, room.ydoc, subdoc_id)
 
-    def get_state(self, board_id: str) -> Optional[bytes]:
+    def get_state(self, board_id: str, subdoc_id: Optional[str] = None) -> Optional[bytes]:
         """
         Get current Y.Doc state for a room.
 
         Args:
             board_id: The board UUID
+            subdoc_id: Subdocument id for paged boards, None for the root doc
 
         Returns:
             Binary state or None if room doesn't exist
         """
-        if board_id not in self._rooms:
+        key = room_key(board_id, subdoc_id)
+        if key not in self._rooms:
             return None
-        return self._rooms[board_id].ydoc.get_state()
+        return self._rooms[key].ydoc.get_state()
+
+    async def has_subdoc(self, board_id: str, subdoc_id: str) -> bool:
+        """True if a subdocument is loaded or has persisted state."""
+        if self.get_room(board_id, subdoc_id) is not None:
+            return True
+        return await self._persistence.has_subdoc(board_id, subdoc_id)
+
+    async def query_shapes(
+        self,
+        board_id: str,
+        bounds: Bounds,
+        page_id: Optional[str] = None,
+        subdoc_id: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Get shapes intersecting a page-space region of a board.
+
+        Loads the room if needed, so boards with no live clients can be queried.
+
+        Args:
+            board_id: The board UUID
+            bounds: (min_x, min_y, max_x, max_y) in page coordinates
+            page_id: Optional tldraw page id to restrict results
+            subdoc_id: Subdocument id for paged boards, None for the root doc
+
+        Returns:
+            List of tldraw shape records
+        """
+        room = await self.get_or_create_room(board_id, subdoc_id)
+        return room.shape_index.query(bounds, page_id)
+
+    async def flush_room(self, board_id: str, subdoc_id: Optional[str] = None) -> bool:
+        """
+        Save a room now instead of waiting for its debounced save.
+
+        Args:
+            board_id: The board UUID
+            subdoc_id: Subdocument id for paged boards, None for the root doc
+
+        Returns:
+            False if the room is not loaded
+        """
+        room = self.get_room(board_id, subdoc_id)
+        if room is None:
+            return False
+        self._persistence.cancel_pending(board_id, subdoc_id)
+        await self._persistence.save(board_id, room.ydoc, subdoc_id)
+        return True
+
+    async def disconnect_clients(
+        self,
+        board_id: str,
+        subdoc_id: Optional[str] = None,
+        code: int = SERVER_CLOSE_CODE
+    ) -> int:
+        """
+        Close every client connection of a room, including relay viewers.
+
+        Args:
+            board_id: The board UUID
+            subdoc_id: Subdocument id for paged boards, None for the root doc
+            code: WebSocket close code sent to clients
+
+        Returns:
+            Number of clients disconnected
+        """
+        room = self.get_room(board_id, subdoc_id)
+        if room is None:
+            return 0
+        clients = room.clients | room.relay.clients
+        room.clients.clear()
+        room.relay.clients.clear()
+        for client in clients:
+            try:
+                await client.close(code=code)
+            except Exception:
+                pass  # Already gone
+        return len(clients)
+
+    async def unload_room(self, board_id: str, subdoc_id: Optional[str] = None) -> bool:
+        """
+        Disconnect a room's clients, save it and drop it from memory.
+
+        Clients that reconnect get the room reloaded from persistence; if one
+        rejoins before the final save completes, the room stays loaded.
+
+        Args:
+            board_id: The board UUID
+            subdoc_id: Subdocument id for paged boards, None for the root doc
+
+        Returns:
+            False if the room is not loaded
+        """
+        if self.get_room(board_id, subdoc_id) is None:
+            return False
+        await self.disconnect_clients(board_id, subdoc_id)
+        self._persistence.cancel_pending(board_id, subdoc_id)
+        await self._unload(room_key(board_id, subdoc_id))
+        return True
+
+    async def _unload(self, key: str):
+        room = self._rooms.get(key)
+        if room is None:
+            return
+        # The room stays registered until it is saved, so a client
+        # reconnecting meanwhile rejoins it instead of loading older state
+        await self._flush_projection(room)
+        # Rooms only ever read (REST queries, thumbnails, view-only clients)
+        # have nothing to write
+        if self.is_dirty(room):
+            await self._persistence.save(room.board_id, room.ydoc, room.subdoc_id)
+        if self._rooms.get(key) is not room or room.client_count or self.is_dirty(room):
+            return  # Rejoined or edited during the save; keep it loaded
+
+        del self._rooms[key]
+        room.shape_index.close()
+        room.todo_projection.close()
+        await self._flush_projection(room)
+        self._persistence.forget(room.board_id, room.subdoc_id)
+        metrics.ROOMS_UNLOADED.inc()
+
+    async def _relay_loop(self):
+        """Background task flushing every room's relay tier on one timer."""
+        while True:
+            await asyncio.sleep(self._relay_interval)
+            for room in list(self._rooms.values()):
+                if not room.relay.has_pending:
+                    continue
+                try:
+                    await room.relay.flush()
+                except Exception:
+                    # One room's failure must not stop fan-out for the others
+                    logger.exception("Relay flush failed for room %s", room.key)
+
+    async def _flush_projection(self, room: Room):
+        try:
+            await room.todo_projection.flush()
+        except Exception:
+            pass  # Counted in metrics and re-queued for the next flush
+
+    async def _flush_projections(self):
+        for room in list(self._rooms.values()):
+            if room.todo_projection.has_pending:
+                await self._flush_projection(room)
+
+    async def _projection_loop(self):
+        """Background task writing queued TODO shape edits on one timer."""
+        while True:
+            await asyncio.sleep(config.CANVAS_TODO_PROJECTION_INTERVAL_SECONDS)
+            await self._flush_projections()
 
     async def _cleanup_loop(self):
         """Background task to unload inactive rooms."""
@@ -192,12 +513,10 @@ class RoomManager:
             now = datetime.utcnow()
             to_unload = []
 
-            for board_id, room in self._rooms.items():
+            for key, room in self._rooms.items():
                 # Only unload if no clients and inactive
-                if not room.clients and (now - room.last_activity) > self.INACTIVITY_TIMEOUT:
-                    to_unload.append(board_id)
+                if not room.client_count and (now - room.last_activity) > self.INACTIVITY_TIMEOUT:
+                    to_unload.append(key)
 
-            for board_id in to_unload:
-                room = self._rooms.pop(board_id)
-                # Final save before unloading
-                await self._persistence.save(board_id, room.ydoc)
+            for key in to_unload:
+                await self._unload(key)
@@ -0,0 +1,315 @@
+"""
+Spatial index of tldraw shapes held in a board's Y.Doc.
+
+Shapes are indexed incrementally from tldraw store changes (see
+canvas.store), so the server can answer "which shapes intersect this region"
+without re-reading the document.
+
+Design notes:
+- Uniform grid (spatial hash) rather than an R-tree: tldraw updates are mostly
+  small moves of a few shapes, and a grid makes insert/remove O(cells touched)
+  with no rebalancing
+- Bounds are kept in page space: child shapes of frames/groups are resolved
+  through their parent chain, and descendants are re-indexed when a parent moves
+- Only records with typeName == "shape" are indexed; records are written by
+  any editor, so shapes with non-numeric or non-finite geometry are skipped
+- Items spanning more than MAX_CELLS_PER_ITEM cells are kept in an oversized
+  list checked by every query, so one huge shape can't fill the grid
+"""
+import math
+from typing import Iterable, Optional
+from pycrdt import Doc
+
+from .store import StoreObserver
+
+Bounds = tuple[float, float, float, float]  # (min_x, min_y, max_x, max_y)
+
+
+def _number(value, default: float = 0.0) -> float:
+    """A finite number field of a shape record; missing means default."""
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"not a finite number: {value!r}")
+    return float(value)
+
+
+def bounds_intersect(a: Bounds, b: Bounds) -> bool:
+    """Return True if two axis-aligned bounds overlap (edges inclusive)."""
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+class GridIndex:
+    """Uniform grid spatial hash mapping item ids to axis-aligned bounds."""
+
+    MAX_CELLS_PER_ITEM = 1024
+
+    def __init__(self, cell_size: float = 512.0):
+        """
+        Args:
+            cell_size: Width/height of a grid cell in page units
+        """
+        self._cell_size = cell_size
+        self._cells: dict[tuple[int, int], set[str]] = {}
+        self._bounds: dict[str, Bounds] = {}
+        # Items too large to hash into cells; every query checks them
+        self._oversized: set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._bounds)
+
+    def _cell_count(self, bounds: Bounds) -> int:
+        size = self._cell_size
+        return (
+            (math.floor(bounds[2] / size) - math.floor(bounds[0] / size) + 1)
+            * (math.floor(bounds[3] / size) - math.floor(bounds[1] / size) + 1)
+        )
+
+    def _cells_for(self, bounds: Bounds) -> Iterable[tuple[int, int]]:
+        size = self._cell_size
+        x0, x1 = math.floor(bounds[0] / size), math.floor(bounds[2] / size)
+        y0, y1 = math.floor(bounds[1] / size), math.floor(bounds[3] / size)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield (cx, cy)
+
+    def insert(self, item_id: str, bounds: Bounds) -> None:
+        """Insert or move an item."""
+        if item_id in self._bounds:
+            self.remove(item_id)
+        self._bounds[item_id] = bounds
+        if self._cell_count(bounds) > self.MAX_CELLS_PER_ITEM:
+            self._oversized.add(item_id)
+            return
+        for cell in self._cells_for(bounds):
+            self._cells.setdefault(cell, set()).add(item_id)
+
+    def remove(self, item_id: str) -> None:
+        """Remove an item if present."""
+        bounds = self._bounds.pop(item_id, None)
+        if bounds is None:
+            return
+        if item_id in self._oversized:
+            self._oversized.discard(item_id)
+            return
+        for cell in self._cells_for(bounds):
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(item_id)
+                if not members:
+                    del self._cells[cell]
+
+    def get(self, item_id: str) -> Optional[Bounds]:
+        """Return the stored bounds for an item."""
+        return self._bounds.get(item_id)
+
+    def query(self, bounds: Bounds) -> set[str]:
+        """Return ids of all items whose bounds intersect the given bounds."""
+        # Huge viewports would touch more cells than there are items
+        if self._cell_count(bounds) > len(self._cells):
+            return {
+                item_id for item_id, item_bounds in self._bounds.items()
+                if bounds_intersect(item_bounds, bounds)
+            }
+
+        found = {
+            item_id for item_id in self._oversized
+            if bounds_intersect(self._bounds[item_id], bounds)
+        }
+        for cell in self._cells_for(bounds):
+            for item_id in self._cells.get(cell, ()):
+                if item_id not in found and bounds_intersect(self._bounds[item_id], bounds):
+                    found.add(item_id)
+        return found
+
+
+def _local_points(record: dict) -> list[tuple[float, float]]:
+    """
+    Corner/outline points of a shape in its own coordinate space.
+
+    Raises:
+        ValueError: If the geometry is malformed
+    """
+    props = record.get("props") or {}
+    if not isinstance(props, dict):
+        raise ValueError("props must be an object")
+    w = props.get("w")
+    h = props.get("h")
+    if w is not None or h is not None:
+        w = _number(w)
+        h = _number(h)
+        return [(0.0, 0.0), (w, 0.0), (w, h), (0.0, h)]
+
+    def point_of(point) -> tuple[float, float]:
+        if not isinstance(point, dict):
+            raise ValueError("point must be an object")
+        return _number(point.get("x")), _number(point.get("y"))
+
+    points: list[tuple[float, float]] = []
+    # draw/highlight shapes: segments of points
+    segments = props.get("segments") or []
+    if not isinstance(segments, list):
+        raise ValueError("segments must be a list")
+    for segment in segments:
+        segment_points = (segment.get("points") or []) if isinstance(segment, dict) else None
+        if not isinstance(segment_points, list):
+            raise ValueError("segment points must be a list")
+        points.extend(point_of(point) for point in segment_points)
+    # line shapes: dict of handles keyed by index
+    line_points = props.get("points")
+    if isinstance(line_points, dict):
+        points.extend(point_of(point) for point in line_points.values())
+    # arrows: start/end terminals with x/y
+    for terminal in ("start", "end"):
+        point = props.get(terminal)
+        if isinstance(point, dict) and "x" in point and "y" in point:
+            points.append(point_of(point))
+
+    return points or [(0.0, 0.0)]
+
+
+def _transform(
+    points: list[tuple[float, float]], x: float, y: float, rotation: float
+) -> list[tuple[float, float]]:
+    if not rotation:
+        return [(x + px, y + py) for px, py in points]
+    cos_r, sin_r = math.cos(rotation), math.sin(rotation)
+    return [(x + px * cos_r - py * sin_r, y + px * sin_r + py * cos_r) for px, py in points]
+
+
+class ShapeIndex(StoreObserver):
+    """
+    Incrementally maintained spatial index over a Y.Doc tldraw store.
+
+    Attach it to a Doc before applying the persisted state (see StoreObserver).
+    """
+
+    MAX_PARENT_DEPTH = 32
+
+    def __init__(self, ydoc: Doc, cell_size: float = 512.0):
+        """
+        Args:
+            ydoc: The board's Y.Doc
+            cell_size: Grid cell size in page units
+        """
+        self._grid = GridIndex(cell_size)
+        self._records: dict[str, dict] = {}
+        self._children: dict[str, set[str]] = {}
+        self._pages: dict[str, Optional[str]] = {}
+        super().__init__(ydoc)
+
+    def __len__(self) -> int:
+        return len(self._grid)
+
+    def _put(self, key: str, record) -> None:
+        if not isinstance(record, dict) or record.get("typeName") != "shape":
+            self._drop(key)
+            return
+
+        try:
+            # Parents are validated when they are put, so a valid record stays valid
+            self._page_transform(record)
+            _local_points(record)
+        except ValueError:
+            self._drop(key)
+            return
+
+        previous = self._records.get(key)
+        if previous is not None and previous.get("parentId") != record.get("parentId"):
+            self._unlink_child(key, previous.get("parentId"))
+
+        self._records[key] = record
+        parent_id = record.get("parentId")
+        if isinstance(parent_id, str) and parent_id.startswith("shape:"):
+            self._children.setdefault(parent_id, set()).add(key)
+
+        self._reindex_subtree(key)
+
+    def _drop(self, key: str) -> None:
+        record = self._records.pop(key, None)
+        if record is None:
+            return
+        self._unlink_child(key, record.get("parentId"))
+        self._grid.remove(key)
+        self._pages.pop(key, None)
+        # Orphaned children keep their last known page bounds until they change
+
+    def _unlink_child(self, key: str, parent_id) -> None:
+        siblings = self._children.get(parent_id)
+        if siblings is not None:
+            siblings.discard(key)
+            if not siblings:
+                del self._children[parent_id]
+
+    def _page_transform(self, record: dict) -> tuple[float, float, float, Optional[str]]:
+        """Resolve (x, y, rotation, page_id) of a shape in page space."""
+        x = _number(record.get("x"))
+        y = _number(record.get("y"))
+        rotation = _number(record.get("rotation"))
+        parent_id = record.get("parentId")
+
+        for _ in range(self.MAX_PARENT_DEPTH):
+            parent = self._records.get(parent_id) if isinstance(parent_id, str) else None
+            if parent is None:
+                break
+            parent_rotation = _number(parent.get("rotation"))
+            (x, y), = _transform([(x, y)], _number(parent.get("x")), _number(parent.get("y")), parent_rotation)
+            rotation += parent_rotation
+            parent_id = parent.get("parentId")
+
+        page_id = parent_id if isinstance(parent_id, str) and parent_id.startswith("page:") else None
+        return x, y, rotation, page_id
+
+    def _reindex_subtree(self, key: str) -> None:
+        stack = [key]
+        seen = set()
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            record = self._records.get(current)
+            if record is None:
+                continue
+            x, y, rotation, page_id = self._page_transform(record)
+            points = _transform(_local_points(record), x, y, rotation)
+            xs = [p[0] for p in points]
+            ys = [p[1] for p in points]
+            bounds = (min(xs), min(ys), max(xs), max(ys))
+            if all(math.isfinite(v) for v in bounds):
+                self._grid.insert(current, bounds)
+            else:
+                # Finite fields that overflow once combined
+                self._grid.remove(current)
+            self._pages[current] = page_id
+            stack.extend(self._children.get(current, ()))
+
+    def page_transform(self, shape_id: str) -> Optional[tuple[float, float, float]]:
+        """Page-space (x, y, rotation) of a shape's origin, if indexed."""
+        record = self._records.get(shape_id)
+        if record is None:
+            return None
+        x, y, rotation, _ = self._page_transform(record)
+        return x, y, rotation
+
+    def get_bounds(self, shape_id: str) -> Optional[Bounds]:
+        """Page-space bounds of a shape, if indexed."""
+        return self._grid.get(shape_id)
+
+    def query(self, bounds: Bounds, page_id: Optional[str] = None) -> list[dict]:
+        """
+        Return shape records intersecting the given page-space bounds.
+
+        Args:
+            bounds: (min_x, min_y, max_x, max_y) in page coordinates
+            page_id: Optional tldraw page id ("page:...") to restrict results
+
+        Returns:
+            Shape records sorted by tldraw fractional index
+        """
+        ids = self._grid.query(bounds)
+        if page_id is not None:
+            ids = {shape_id for shape_id in ids if self._pages.get(shape_id) == page_id}
+        records = [self._records[shape_id] for shape_id in ids]
+        records.sort(key=lambda r: (str(r.get("index") or ""), str(r.get("id") or "")))
+        return records
@@ -0,0 +1,97 @@
+"""
+Incremental mirror of the tldraw store held in a board's Y.Doc.
+
+The frontend stores tldraw records in a Y.Array named "tldraw" using the
+YKeyValue layout ({key, val} entries, last entry for a key wins). Setting a
+key appends the new entry and then deletes the superseded one, so a record is
+only gone once every entry for its key has been deleted.
+
+StoreObserver follows that array from Y.Array change events and reports
+record-level puts and drops to subclasses. Records come from any editor, so
+a subclass failing on one is logged and skipped: observers run inside
+apply_update, and an exception there would fail every later load of the
+persisted document.
+"""
+import logging
+from typing import Optional
+from pycrdt import Array, Doc
+
+STORE_ARRAY_NAME = "tldraw"
+
+logger = logging.getLogger(__name__)
+
+
+class StoreObserver:
+    """
+    Base class for views derived from the tldraw store.
+
+    Attach it to a Doc before applying the persisted state: the initial load
+    arrives as a single insert event and goes through the same code path as
+    live updates.
+    """
+
+    def __init__(self, ydoc: Doc):
+        # Mirror of the Y.Array key order, needed to resolve positional deletes
+        self._keys: list[Optional[str]] = []
+        self._key_counts: dict[str, int] = {}
+
+        store = ydoc.get(STORE_ARRAY_NAME, type=Array)
+        self._subscription = store.observe(self._on_change)
+        self._store = store
+
+    def close(self) -> None:
+        """Stop observing the document."""
+        if self._subscription is not None:
+            self._store.unobserve(self._subscription)
+            self._subscription = None
+
+    def _put(self, key: str, record) -> None:
+        """A record was set (created or replaced)."""
+        raise NotImplementedError
+
+    def _drop(self, key: str) -> None:
+        """A record was removed."""
+        raise NotImplementedError
+
+    def _on_change(self, event) -> None:
+        position = 0
+        for op in event.delta:
+            if "retain" in op:
+                position += op["retain"]
+            elif "insert" in op:
+                entries = op["insert"]
+                keys = [self._entry_key(entry) for entry in entries]
+                self._keys[position:position] = keys
+                position += len(keys)
+                for key, entry in zip(keys, entries):
+                    if key is None:
+                        continue
+                    self._key_counts[key] = self._key_counts.get(key, 0) + 1
+                    self._apply(self._put, key, entry.get("val"))
+            elif "delete" in op:
+                removed = self._keys[position:position + op["delete"]]
+                del self._keys[position:position + op["delete"]]
+                for key in removed:
+                    if key is None:
+                        continue
+                    remaining = self._key_counts.get(key, 1) - 1
+                    if remaining > 0:
+                        # YKeyValue deletes the superseded entry after pushing the new one
+                        self._key_counts[key] = remaining
+                    else:
+                        self._key_counts.pop(key, None)
+                        self._apply(self._drop, key)
+
+    def _apply(self, handler, key: str, *args) -> None:
+        try:
+            handler(key, *args)
+        except Exception:
+            logger.exception("%s failed on store record %r", type(self).__name__, key)
+
+    @staticmethod
+    def _entry_key(entry) -> Optional[str]:
+        if isinstance(entry, dict):
+            key = entry.get("key")
+            if isinstance(key, str):
+                return key
+        return None
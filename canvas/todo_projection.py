@@ -0,0 +1,216 @@
+"""
+Server-side projection of canvas TODO shapes into todo_items.
+
+TODO shapes linked to a backend item (props.backendId) are watched in the
+room's Y.Doc. Edits made by connected users are queued per item (last write
+wins) and written by RoomManager's projection loop in one transaction per
+room, instead of every browser calling PUT/DELETE /todos itself.
+
+Rules:
+- Only changes applied on behalf of a user are projected, and only to items
+  in teams that user belongs to. Loading persisted state, or a shape being
+  linked to a freshly created item (backendId set), only records a baseline
+- Creating items stays client-side: the creating browser needs the new id
+  to link the shape
+- Deleting a linked shape deletes the item, as the client-side sync did
+- Each write enqueues the same todo_updated / todo_deleted team event the
+  REST routes do, in the same transaction, so team pages see canvas edits
+"""
+import math
+from datetime import datetime, timezone
+from typing import Optional
+from pycrdt import Doc
+from sqlalchemy import select, delete
+
+from changes import next_change_seq, stamp, add_tombstone, TOMBSTONE_TODO
+from counters import adjust_list_counters, team_counter_values
+from database import async_session
+from models import TodoItem, TodoList, TeamMember, User
+from outbox import enqueue_team_event, outbox_dispatcher
+from schemas import TodoResponse
+
+from . import metrics
+from .store import StoreObserver
+
+# Projected shape props -> TodoItem columns
+TodoFields = tuple[str, bool, Optional[datetime], Optional[int]]  # title, completed, due_date, assigned_to
+
+DELETED = None
+
+
+def _parse_due_date(value) -> Optional[datetime]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    # Stored naive in UTC, like the REST API
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _integral(value) -> Optional[int]:
+    """A finite, integral JSON number that fits an id column, as an int, else None."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    if not math.isfinite(value) or value != int(value) or abs(value) >= 2 ** 63:
+        return None
+    return int(value)
+
+
+def todo_fields(record) -> Optional[tuple[int, TodoFields]]:
+    """(backend id, fields) of a linked TODO shape record, else None."""
+    if not isinstance(record, dict) or record.get("typeName") != "shape" or record.get("type") != "todo":
+        return None
+    props = record.get("props")
+    if not isinstance(props, dict):
+        return None
+    backend_id = _integral(props.get("backendId"))
+    if backend_id is None:
+        return None
+
+    title = props.get("title")
+    if not isinstance(title, str) or not title.strip():
+        return None
+    return backend_id, (
+        title[:200],
+        bool(props.get("completed")),
+        _parse_due_date(props.get("dueDate")),
+        _integral(props.get("assigneeId")),
+    )
+
+
+class TodoProjection(StoreObserver):
+    """Queues TodoItem writes for TODO shapes edited in one room."""
+
+    def __init__(self, ydoc: Doc):
+        """
+        Args:
+            ydoc: The room's Y.Doc (attach before applying persisted state)
+        """
+        # Shape key -> (backend id, fields) as last seen
+        self._linked: dict[str, tuple[int, TodoFields]] = {}
+        # Backend id -> (editing user id, fields or DELETED)
+        self._pending: dict[int, tuple[int, Optional[TodoFields]]] = {}
+        # Set by RoomManager around apply_update; observers run synchronously
+        self.editor_id: Optional[int] = None
+        super().__init__(ydoc)
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+
+    def _put(self, key: str, record) -> None:
+        linked = todo_fields(record)
+        previous = self._linked.get(key)
+        if linked is None:
+            # No longer a linked TODO (or invalid); stop tracking, don't delete the item
+            self._linked.pop(key, None)
+            return
+
+        self._linked[key] = linked
+        backend_id, fields = linked
+        if self.editor_id is None or previous is None or previous[0] != backend_id:
+            return  # Baseline only (load, server-side change, or newly linked)
+        if previous[1] != fields:
+            self._pending[backend_id] = (self.editor_id, fields)
+
+    def _drop(self, key: str) -> None:
+        previous = self._linked.pop(key, None)
+        if previous is not None and self.editor_id is not None:
+            self._pending[previous[0]] = (self.editor_id, DELETED)
+
+    async def flush(self) -> int:
+        """
+        Write queued changes in one transaction.
+
+        Changes for items that no longer exist, or that the editing user may
+        not modify, are dropped. On a database error the changes are
+        re-queued (unless newer ones arrived meanwhile).
+
+        Returns:
+            Number of items written
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+
+        try:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(TodoItem, TodoList.team_id)
+                    .join(TodoList, TodoList.id == TodoItem.list_id)
+                    .where(TodoItem.id.in_(pending))
+                )
+                items = {item.id: (item, team_id) for item, team_id in result.all()}
+
+                editors = {user_id for user_id, _ in pending.values()}
+                result = await db.execute(
+                    select(TeamMember.user_id, TeamMember.team_id)
+                    .where(TeamMember.user_id.in_(editors))
+                )
+                memberships = set(result.all())
+
+                written = 0
+                updated: list[tuple[int, TodoItem, TodoFields]] = []
+                deleted: list[tuple[int, TodoItem]] = []
+                # team_id -> {list_id: [todos, completed] counter deltas}
+                counts: dict[int, dict[int, list[int]]] = {}
+                for backend_id, (user_id, fields) in pending.items():
+                    found = items.get(backend_id)
+                    if found is None or (user_id, found[1]) not in memberships:
+                        continue
+                    item, team_id = found
+                    delta = counts.setdefault(team_id, {}).setdefault(item.list_id, [0, 0])
+                    if fields is DELETED:
+                        deleted.append((team_id, item))
+                        delta[0] -= 1
+                        delta[1] -= bool(item.completed)
+                    else:
+                        delta[1] += fields[1] - bool(item.completed)
+                        updated.append((team_id, item, fields))
+                    written += 1
+
+                # One change cursor per team written to, taken with the team's counters
+                seqs: dict[int, int] = {}
+                for team_id, lists in counts.items():
+                    seqs[team_id] = await next_change_seq(db, team_id, **team_counter_values(
+                        sum(todos for todos, _ in lists.values()),
+                        sum(completed for _, completed in lists.values())
+                    ))
+                    for list_id, (todos, completed) in lists.items():
+                        await adjust_list_counters(db, list_id, todos, completed)
+                for team_id, item, fields in updated:
+                    item.title, item.completed, item.due_date, item.assigned_to = fields
+                    stamp(item, seqs[team_id])
+                for team_id, item in deleted:
+                    add_tombstone(db, team_id, TOMBSTONE_TODO, item.id, seqs[team_id])
+                if deleted:
+                    await db.execute(delete(TodoItem).where(TodoItem.id.in_([item.id for _, item in deleted])))
+                await db.flush()
+
+                assignee_ids = {item.assigned_to for _, item, _ in updated if item.assigned_to is not None}
+                usernames = {}
+                if assignee_ids:
+                    result = await db.execute(select(User.id, User.username).where(User.id.in_(assignee_ids)))
+                    usernames = dict(result.all())
+                for team_id, item, _ in updated:
+                    response = TodoResponse.model_validate(item).model_copy(
+                        update={"assignee_username": usernames.get(item.assigned_to)}
+                    )
+                    enqueue_team_event(db, team_id, "todo_updated", response.model_dump(mode="json"))
+                for team_id, item in deleted:
+                    enqueue_team_event(db, team_id, "todo_deleted", {"id": item.id, "list_id": item.list_id})
+                await db.commit()
+        except Exception:
+            metrics.TODO_PROJECTION_FAILURES.inc()
+            for backend_id, change in pending.items():
+                self._pending.setdefault(backend_id, change)
+            raise
+
+        if written:
+            outbox_dispatcher.notify()
+        metrics.TODO_PROJECTION_WRITES.inc(written)
+        return written
@@ -14,18 +14,100 @@ On reconnection:
 - Server sends FULL current state (from memory or loaded from DB)
 - Client merges with its local state via CRDT
 - No data loss due to CRDT merge semantics
+
+Paged boards (BoardLayout.PAGED) also accept connections per subdocument;
+each subdocument is synced exactly like a board, as its own room.
 """
+import asyncio
+import re
 from fastapi import WebSocket, WebSocketDisconnect
 from jose import JWTError, jwt
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from config import SECRET_KEY, ALGORITHM
 from database import async_session
-from models import User, Board, BoardPermission, PermissionLevel, AuditLog
+from heartbeat import heartbeat, EMPTY_UPDATE
+from models import User, Board, BoardLayout, BoardPermission, PermissionLevel, AuditLog
 
+from . import metrics
+from .limits import InboundLimiter
 from .room_manager import RoomManager
 
+# tldraw ids look like "page:abc123" / "shape:xyz"; kept short for the row key
+SUBDOC_ID_PATTERN = re.compile(r"^[A-Za-z0-9:_\-]{1,64}$")
+
+
+async def board_supports_subdocs(board_id: str) -> bool:
+    """Check that a board uses the paged (subdocument) layout."""
+    async with async_session() as db:
+        result = await db.execute(select(Board.layout).where(Board.id == board_id))
+        return result.scalar_one_or_none() == BoardLayout.PAGED.value
+
+
+async def get_board_permission(db: AsyncSession, user_id: int, board: Board) -> Optional[str]:
+    """
+    Resolve a user's permission level on a board.
+
+    Args:
+        db: Database session
+        user_id: The user id
+        board: The loaded board
+
+    Returns:
+        Permission level value, or None if the user has no access
+    """
+    board_id = board.id
+
+    # Owner has full edit access
+    if board.owner_id == user_id:
+        return PermissionLevel.EDIT.value
+
+    # Check explicit permission
+    result = await db.execute(
+        select(BoardPermission).where(
+            BoardPermission.board_id == board_id,
+            BoardPermission.user_id == user_id
+        )
+    )
+    perm = result.scalar_one_or_none()
+    if perm:
+        return perm.level.value
+
+    # Check public access if no explicit permission
+    if board.is_public:
+        result = await db.execute(
+            select(BoardPermission).where(
+                BoardPermission.board_id == board_id,
+                BoardPermission.user_id == None  # noqa: E711
+            )
+        )
+        public_perm = result.scalar_one_or_none()
+        if public_perm:
+            return public_perm.level.value
+
+    return None
+
+
+def log_canvas_access(
+    db: AsyncSession,
+    user_id: int,
+    board_id: str,
+    permission_level: str,
+    request_ip: Optional[str] = None,
+    user_agent: Optional[str] = None
+) -> None:
+    """Add an access entry to the audit trail (caller commits)."""
+    db.add(AuditLog(
+        user_id=user_id,
+        board_id=board_id,
+        action="access",
+        permission_level=permission_level,
+        ip_address=request_ip,
+        user_agent=user_agent
+    ))
+
 
 async def verify_canvas_access(
     token: str,
@@ -69,48 +151,12 @@ async def verify_canvas_access(
             return None, None
 
         # Check permissions
-        permission_level = None
-
-        # Owner has full edit access
-        if board.owner_id == user_id:
-            permission_level = PermissionLevel.EDIT.value
-        else:
-            # Check explicit permission
-            result = await db.execute(
-                select(BoardPermission).where(
-                    BoardPermission.board_id == board_id,
-                    BoardPermission.user_id == user_id
-                )
-            )
-            perm = result.scalar_one_or_none()
-            if perm:
-                permission_level = perm.level.value
-
-            # Check public access if no explicit permission
-            if not permission_level and board.is_public:
-                result = await db.execute(
-                    select(BoardPermission).where(
-                        BoardPermission.board_id == board_id,
-                        BoardPermission.user_id == None  # noqa: E711
-                    )
-                )
-                public_perm = result.scalar_one_or_none()
-                if public_perm:
-                    permission_level = public_perm.level.value
-
+        permission_level = await get_board_permission(db, user_id, board)
         if not permission_level:
             return user, None
 
         # Log access for audit trail
-        audit = AuditLog(
-            user_id=user_id,
-            board_id=board_id,
-            action="access",
-            permission_level=permission_level,
-            ip_address=request_ip,
-            user_agent=user_agent
-        )
-        db.add(audit)
+        log_canvas_access(db, user_id, board_id, permission_level, request_ip, user_agent)
         await db.commit()
 
         return user, permission_level
@@ -120,7 +166,8 @@ async def handle_canvas_websocket(
     websocket: WebSocket,
     board_id: str,
     token: str,
-    room_manager: RoomManager
+    room_manager: RoomManager,
+    subdoc_id: Optional[str] = None
 ):
     """
     Handle WebSocket connection for canvas sync.
@@ -135,6 +182,7 @@ async def handle_canvas_websocket(
         board_id: The board UUID
         token: JWT token for authentication
         room_manager: The room manager instance
+        subdoc_id: Subdocument to sync (paged boards only), None for the root doc
     """
     # Get client info for audit
     request_ip = None
@@ -155,11 +203,19 @@ async def handle_canvas_websocket(
         await websocket.close(code=4003)  # Forbidden
         return
 
+    if subdoc_id is not None:
+        if not SUBDOC_ID_PATTERN.match(subdoc_id) or not await board_supports_subdocs(board_id):
+            await websocket.close(code=4004)  # No such subdocument
+            return
+
     # Accept connection
     await websocket.accept()
 
     # Join room (loads state from DB if room was unloaded)
-    room = await room_manager.add_client(board_id, websocket)
+    room = await room_manager.add_client(
+        board_id, websocket, subdoc_id,
+        read_only=permission != PermissionLevel.EDIT.value
+    )
 
     # Send current state (sync step 1) - THIS IS THE RECONNECTION MECHANISM
     # Every connection (new or reconnect) receives full Y.Doc state
@@ -168,15 +224,34 @@ async def handle_canvas_websocket(
     if state:
         await websocket.send_bytes(state)
 
+    # Per-connection rate and frame-size limits
+    limiter = InboundLimiter()
+    heartbeat.watch(websocket, EMPTY_UPDATE, lambda: room_manager.remove_client(board_id, websocket, subdoc_id))
+
     try:
         while True:
             # Receive Yjs update (binary)
             data = await websocket.receive_bytes()
+            heartbeat.beat(websocket)
+
+            close_code, delay = limiter.admit(len(data))
+            if close_code is not None:
+                metrics.CONNECTIONS_LIMITED.inc()
+                room_manager.remove_client(board_id, websocket, subdoc_id)
+                await websocket.close(code=close_code)
+                return
+            if delay:
+                # Throttle: stop reading so the client sees backpressure
+                await asyncio.sleep(delay)
+            if data == EMPTY_UPDATE:
+                continue  # Heartbeat reply
 
             # Only apply updates if user has edit permission
             if permission == PermissionLevel.EDIT.value:
-                await room_manager.apply_update(board_id, data, websocket)
+                await room_manager.apply_update(board_id, data, websocket, subdoc_id, user.id)
             # View/comment users receive updates but can't send
 
     except WebSocketDisconnect:
-        room_manager.remove_client(board_id, websocket)
+        room_manager.remove_client(board_id, websocket, subdoc_id)
+    finally:
+        heartbeat.unwatch(websocket)
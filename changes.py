@@ -0,0 +1,57 @@
+"""
+Per-team change cursors for delta sync (GET /teams/{team_id}/changes).
+
+Every transaction that writes a team's lists or todos takes the team's next
+change_seq (one UPDATE ... RETURNING on the team row) and stamps it, with
+updated_at, on each row it touches. Deletions leave a Tombstone carrying the
+same seq. A client that synced up to cursor N then only needs rows and
+tombstones with change_seq > N.
+
+The UPDATE locks the team row until commit, so a team's seqs are handed out
+in commit order and a reader never sees seq N+1 before N is committed.
+Deleting a list implicitly deletes its todos; only the list gets a tombstone.
+Member joins take a seq too, without rows: change_seq is also the version
+behind the team's ETags (see conditional.py).
+"""
+from datetime import datetime
+from typing import Union
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Team, TodoItem, TodoList, Tombstone
+
+TOMBSTONE_LIST = "list"
+TOMBSTONE_TODO = "todo"
+
+
+async def next_change_seq(db: AsyncSession, team_id: int, **values) -> int:
+    """
+    Take the team's next change cursor (call once per transaction).
+
+    Args:
+        values: Other team columns to set in the same UPDATE (see
+            counters.next_change_seq_with_counters)
+    """
+    result = await db.execute(
+        update(Team)
+        .where(Team.id == team_id)
+        .values(change_seq=Team.change_seq + 1, **values)
+        .returning(Team.change_seq)
+    )
+    return result.scalar_one()
+
+
+def stamp(row: Union[TodoList, TodoItem], seq: int):
+    """Mark a list or todo as changed at seq."""
+    for column, value in stamp_values(seq).items():
+        setattr(row, column, value)
+
+
+def stamp_values(seq: int) -> dict:
+    """Column values marking a row changed at seq, for UPDATE statements."""
+    return {"change_seq": seq, "updated_at": datetime.utcnow()}
+
+
+def add_tombstone(db: AsyncSession, team_id: int, kind: str, object_id: int, seq: int):
+    """Record a deleted list or todo."""
+    db.add(Tombstone(team_id=team_id, kind=kind, object_id=object_id, change_seq=seq))
@@ -0,0 +1,47 @@
+"""
+Conditional GET (ETag / If-None-Match) for polled read endpoints.
+
+Endpoints build their ETag from a version number that comes back with the
+authorization query, Team.change_seq, which every change to a team's lists,
+todos or members bumps. A request whose If-None-Match matches gets an empty
+304 before any rows are loaded or serialized.
+"""
+from typing import Optional
+from fastapi import Request, Response, status
+
+from models import Team
+
+
+def make_etag(*parts) -> str:
+    # Weak: the body is equivalent, not byte-identical (it may be compressed)
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def team_etag(kind: str, object_id: int, team: Team) -> str:
+    """ETag of a team resource; created_at tells apart teams that reused an id."""
+    created = int(team.created_at.timestamp()) if team.created_at else 0
+    return make_etag(kind, object_id, created, team.change_seq)
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match lists etag (weak comparison) or is *."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+
+def check_etag(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Return a 304 response if the client has this version; otherwise set the
+    ETag header on the endpoint's response and return None.
+    """
+    if if_none_match(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+    return None
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -26,6 +26,48 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = int(os.getenv("ACCESS_TOKEN_EXPIRE_HOURS", "24"))
 
+# Paginated list endpoints: page size when ?limit= is omitted, and its maximum
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", "100"))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "500"))
+
+# Most operations accepted by one POST /lists/{list_id}/todos:batch request
+TODO_BATCH_MAX_OPERATIONS = int(os.getenv("TODO_BATCH_MAX_OPERATIONS", "500"))
+
+# GET /teams/{team_id}/bundle responses at least this large are gzipped
+# for clients that accept it
+BUNDLE_GZIP_MIN_BYTES = int(os.getenv("BUNDLE_GZIP_MIN_BYTES", "1024"))
+
+# Team WebSocket broadcasts: sockets that don't accept a frame within this
+# many seconds are dropped so one slow client can't delay the whole team
+TEAM_WS_SEND_TIMEOUT_SECONDS = float(os.getenv("TEAM_WS_SEND_TIMEOUT_SECONDS", "5"))
+
+# Team presence: online/offline changes within the window go out as one
+# presence_delta per team; a full presence_snapshot is sent on a slower timer
+PRESENCE_COALESCE_SECONDS = float(os.getenv("PRESENCE_COALESCE_SECONDS", "1"))
+PRESENCE_SNAPSHOT_INTERVAL_SECONDS = float(os.getenv("PRESENCE_SNAPSHOT_INTERVAL_SECONDS", "60"))
+
+# Team events kept per team for replay to clients reconnecting with last_seq
+TEAM_EVENT_BUFFER_SIZE = int(os.getenv("TEAM_EVENT_BUFFER_SIZE", "256"))
+# A team's buffer is dropped once it has no sockets and no event or
+# disconnect for this long; later reconnects resync instead of replaying
+TEAM_EVENT_REPLAY_SECONDS = float(os.getenv("TEAM_EVENT_REPLAY_SECONDS", "300"))
+
+# Team WebSocket handshakes: decoded tokens and team memberships are cached
+# in memory for this long (at most this many entries each)
+WS_AUTH_CACHE_TTL_SECONDS = float(os.getenv("WS_AUTH_CACHE_TTL_SECONDS", "60"))
+WS_AUTH_CACHE_SIZE = int(os.getenv("WS_AUTH_CACHE_SIZE", "10000"))
+
+# Team event outbox: events per dispatch transaction, and how often the
+# dispatcher polls for events it wasn't notified about
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_POLL_INTERVAL_SECONDS = float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+
+# WebSocket heartbeat (team, canvas and multiplex sockets)
+# Every socket is pinged once per interval; sockets that send nothing for
+# HEARTBEAT_MAX_MISSED pings in a row are dropped as dead
+HEARTBEAT_INTERVAL_SECONDS = float(os.getenv("HEARTBEAT_INTERVAL_SECONDS", "25"))
+HEARTBEAT_MAX_MISSED = int(os.getenv("HEARTBEAT_MAX_MISSED", "2"))
+
 # MinIO Object Storage Configuration
 # Used for canvas asset uploads (images, files)
 MINIO_URL = os.getenv("MINIO_URL", "http://localhost:9000")
@@ -33,3 +75,30 @@ MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY", "minioadmin")
 MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
 MINIO_PUBLIC_URL = os.getenv("MINIO_PUBLIC_URL", "http://localhost:9000")
 MINIO_BUCKET = os.getenv("MINIO_BUCKET", "canvas-assets")
+
+# Canvas WebSocket inbound limits (per connection)
+# Frames larger than the limit close the socket with 1009; clients above the
+# rate are throttled, then closed with 4029 once throttling exceeds the maximum.
+# The frame limit is also uvicorn's --ws-max-size (Dockerfile, main.py).
+CANVAS_MAX_FRAME_BYTES = int(os.getenv("CANVAS_MAX_FRAME_BYTES", str(1024 * 1024)))
+CANVAS_MAX_MESSAGES_PER_SECOND = float(os.getenv("CANVAS_MAX_MESSAGES_PER_SECOND", "60"))
+CANVAS_MAX_BYTES_PER_SECOND = float(os.getenv("CANVAS_MAX_BYTES_PER_SECOND", str(512 * 1024)))
+CANVAS_RATE_BURST_SECONDS = float(os.getenv("CANVAS_RATE_BURST_SECONDS", "2"))
+CANVAS_MAX_THROTTLE_SECONDS = float(os.getenv("CANVAS_MAX_THROTTLE_SECONDS", "2"))
+
+# Canvas room fan-out
+# View-only clients beyond the cap are served by a relay tier that sends one
+# merged update per interval instead of every update as it happens.
+CANVAS_ROOM_CLIENT_CAP = int(os.getenv("CANVAS_ROOM_CLIENT_CAP", "50"))
+CANVAS_RELAY_INTERVAL_SECONDS = float(os.getenv("CANVAS_RELAY_INTERVAL_SECONDS", "0.5"))
+
+# Seconds between batched writes of canvas TODO shape edits to todo_items
+CANVAS_TODO_PROJECTION_INTERVAL_SECONDS = float(os.getenv("CANVAS_TODO_PROJECTION_INTERVAL_SECONDS", "1"))
+
+# Server-side board rendering (thumbnails/exports)
+# Worker processes for rendering, and how many rendered views to keep cached
+CANVAS_RENDER_WORKERS = int(os.getenv("CANVAS_RENDER_WORKERS", "2"))
+CANVAS_RENDER_CACHE_SIZE = int(os.getenv("CANVAS_RENDER_CACHE_SIZE", "256"))
+
+# Bearer token required to scrape /metrics (unset = /metrics disabled; its series name live board ids)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
@@ -0,0 +1,169 @@
+"""
+Denormalized todo counters on lists and teams.
+
+TodoList and Team carry todo_count and completed_count, so summary views
+("12/40 done") read one row per list instead of every todo. Each todo write
+adjusts the counters of its list and team in its own transaction
+(next_change_seq_with_counters): the team's deltas ride on the UPDATE that
+takes the team's change_seq, so a write costs one extra statement, on the
+list row. Single-todo routes pass SQL deltas computed from the row's current
+value (completed_delta), so they need no extra read; batch writers pass the
+deltas of the rows they loaded.
+
+Overdue is not stored: it changes with the clock, not with writes.
+count_overdue counts open todos past their due date with one grouped query
+over ix_todo_items_list_open_due.
+
+repair_counters recomputes every counter from todo_items (POST
+/admin/counters/repair), for rows written before the counters existed or
+counters that drifted.
+"""
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple, Union
+from sqlalchemy import case, func, select, update, false as sa_false, true as sa_true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement
+
+from changes import next_change_seq
+from models import Team, TodoItem, TodoList
+
+Delta = Union[int, ColumnElement]
+
+
+def _completed_now(todo_id: int) -> ColumnElement:
+    # 1 if the todo is currently completed, else 0
+    return case(
+        (select(TodoItem.completed).where(TodoItem.id == todo_id).scalar_subquery(), 1),
+        else_=0
+    )
+
+
+def completed_delta(todo_id: int, completed: Optional[bool]) -> ColumnElement:
+    """
+    completed_count delta, as SQL, of setting one todo's completed.
+
+    Run it before the todo's own UPDATE/DELETE: it reads the current value.
+
+    Args:
+        todo_id: The todo being written
+        completed: New value; None when the todo is being deleted
+    """
+    if completed is None:
+        return -_completed_now(todo_id)
+    return int(completed) - _completed_now(todo_id)
+
+
+def toggled_delta(todo_id: int) -> ColumnElement:
+    """completed_count delta, as SQL, of flipping one todo's completed."""
+    return 1 - 2 * _completed_now(todo_id)
+
+
+def _counter_values(model, todos: Delta, completed: Delta) -> dict:
+    if isinstance(todos, int) and isinstance(completed, int) and todos == completed == 0:
+        return {}
+    return {
+        "todo_count": model.todo_count + todos,
+        "completed_count": model.completed_count + completed,
+    }
+
+
+def team_counter_values(todos: Delta = 0, completed: Delta = 0) -> dict:
+    """Team counter deltas as UPDATE values, for next_change_seq(db, team_id, **values)."""
+    return _counter_values(Team, todos, completed)
+
+
+async def adjust_list_counters(db: AsyncSession, list_id: int, todos: Delta = 0, completed: Delta = 0):
+    """Add deltas to a list's todo_count and completed_count."""
+    values = _counter_values(TodoList, todos, completed)
+    if values:
+        await db.execute(
+            update(TodoList)
+            .where(TodoList.id == list_id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+
+async def next_change_seq_with_counters(
+    db: AsyncSession,
+    team_id: int,
+    list_id: int,
+    todos: Delta = 0,
+    completed: Delta = 0
+) -> int:
+    """
+    Take the team's next change_seq and add deltas to a list's and the team's
+    todo_count and completed_count.
+
+    Returns:
+        The change_seq (as next_change_seq)
+    """
+    seq = await next_change_seq(db, team_id, **team_counter_values(todos, completed))
+    await adjust_list_counters(db, list_id, todos, completed)
+    return seq
+
+
+def removed_list_counter_values(list_id: int) -> dict:
+    """
+    Team counter values taking a list's counters off its team, for
+    next_change_seq(db, team_id, **values) before deleting the list.
+    """
+    def list_value(column):
+        return select(column).where(TodoList.id == list_id).scalar_subquery()
+
+    return team_counter_values(-list_value(TodoList.todo_count), -list_value(TodoList.completed_count))
+
+
+async def count_overdue(db: AsyncSession, list_ids: Iterable[int], now: Optional[datetime] = None) -> Dict[int, int]:
+    """Open todos past their due date, per list (lists with none are left out)."""
+    now = now or datetime.utcnow()
+    result = await db.execute(
+        select(TodoItem.list_id, func.count())
+        .where(
+            TodoItem.list_id.in_(list(list_ids)),
+            TodoItem.completed == sa_false(),
+            TodoItem.due_date < now
+        )
+        .group_by(TodoItem.list_id)
+    )
+    return dict(result.all())
+
+
+async def repair_counters(db: AsyncSession, team_id: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Recompute list and team counters from todo_items (one team, or all).
+
+    Returns:
+        (lists, teams) rows rewritten
+    """
+    def todo_total(*conditions):
+        return (
+            select(func.count())
+            .where(TodoItem.list_id == TodoList.id, *conditions)
+            .correlate(TodoList)
+            .scalar_subquery()
+        )
+
+    def list_total(column):
+        return (
+            select(func.coalesce(func.sum(column), 0))
+            .where(TodoList.team_id == Team.id)
+            .correlate(Team)
+            .scalar_subquery()
+        )
+
+    lists = update(TodoList).values(
+        todo_count=todo_total(),
+        completed_count=todo_total(TodoItem.completed == sa_true())
+    )
+    teams = update(Team).values(
+        todo_count=list_total(TodoList.todo_count),
+        completed_count=list_total(TodoList.completed_count)
+    )
+    if team_id is not None:
+        lists = lists.where(TodoList.team_id == team_id)
+        teams = teams.where(Team.id == team_id)
+
+    lists_result = await db.execute(lists.execution_options(synchronize_session=False))
+    teams_result = await db.execute(teams.execution_options(synchronize_session=False))
+    return lists_result.rowcount, teams_result.rowcount
@@ -1,11 +1,7 @@
 import { useEffect, useRef, useCallback } from 'react'
 import { Editor, type TLShapeId } from 'tldraw'
 import type { TodoShape } from './shapes/todo/types'
-import {
-  createTodo,
-  updateTodo,
-  deleteTodo,
-} from '../../services/todoApi'
+import { createTodo } from '../../services/todoApi'
 
 /**
  * WebSocket event types for TODO synchronization.
@@ -23,41 +19,14 @@ export interface TodoWebSocketEvent {
   }
 }
 
-/**
- * Debounce helper for update calls.
- * Groups rapid changes to prevent excessive API calls.
- */
-function debounce<TArgs extends unknown[]>(
-  fn: (...args: TArgs) => void,
-  delay: number
-): { (...args: TArgs): void; cancel: () => void } {
-  let timeoutId: ReturnType<typeof setTimeout> | null = null
-
-  const debounced = (...args: TArgs) => {
-    if (timeoutId) {
-      clearTimeout(timeoutId)
-    }
-    timeoutId = setTimeout(() => {
-      fn(...args)
-      timeoutId = null
-    }, delay)
-  }
-
-  debounced.cancel = () => {
-    if (timeoutId) {
-      clearTimeout(timeoutId)
-      timeoutId = null
-    }
-  }
-
-  return debounced
-}
-
 /**
  * Hook for bidirectional sync between canvas TODO shapes and backend API.
  *
  * Features:
- * - Canvas -> Backend: Creates/updates/deletes TODOs in backend when shapes change
+ * - Canvas -> Backend: Creates TODOs in backend for new shapes and links them
+ *   via backendId. Edits and deletions of linked shapes are written by the
+ *   server from the shared Y.Doc (canvas/todo_projection.py), once per change
+ *   rather than once per connected browser
  * - Backend -> Canvas: Updates shapes when receiving WebSocket events
  * - Echo loop prevention: Uses source:'user' filter and mergeRemoteChanges()
  *
@@ -124,55 +93,6 @@ export function useTodoSync(
     [editor, token]
   )
 
-  /**
-   * Handle updating a TODO in backend.
-   * Debounced to prevent excessive calls during rapid edits.
-   */
-  const debouncedUpdate = useRef(
-    debounce(
-      async (backendId: number, data: TodoShape['props'], authToken: string) => {
-        try {
-          await updateTodo(
-            backendId,
-            {
-              title: data.title,
-              completed: data.completed,
-              assigned_to: data.assigneeId ?? undefined,
-              due_date: data.dueDate ?? undefined,
-            },
-            authToken
-          )
-        } catch (error) {
-          console.error('Failed to update TODO in backend:', error)
-        }
-      },
-      500
-    )
-  )
-
-  const handleUpdate = useCallback(
-    (todo: TodoShape) => {
-      if (!todo.props.backendId) return
-      debouncedUpdate.current(todo.props.backendId, todo.props, token)
-    },
-    [token]
-  )
-
-  /**
-   * Handle deleting a TODO from backend.
-   */
-  const handleDelete = useCallback(
-    async (backendId: number) => {
-      try {
-        await deleteTodo(backendId, token)
-      } catch (error) {
-        console.error('Failed to delete TODO from backend:', error)
-        // Shape is already gone from canvas, backend may have been deleted already
-      }
-    },
-    [token]
-  )
-
   /**
    * Canvas -> Backend sync via store.listen.
    *
@@ -194,37 +114,12 @@ export function useTodoSync(
             }
           }
         })
-
-        // Handle updated TODO shapes
-        Object.values(changes.updated).forEach(([, to]) => {
-          if (to.typeName === 'shape' && (to as TodoShape).type === 'todo') {
-            const todo = to as TodoShape
-            // Only update in backend if has backendId (linked to backend)
-            if (todo.props.backendId) {
-              handleUpdate(todo)
-            }
-          }
-        })
-
-        // Handle removed TODO shapes
-        Object.values(changes.removed).forEach((record) => {
-          if (record.typeName === 'shape' && (record as TodoShape).type === 'todo') {
-            const todo = record as TodoShape
-            // Only delete from backend if has backendId (was linked)
-            if (todo.props.backendId) {
-              handleDelete(todo.props.backendId)
-            }
-          }
-        })
       },
       { source: 'user', scope: 'document' } // CRITICAL: source:'user' prevents echo loop
     )
 
-    return () => {
-      unsub()
-      debouncedUpdate.current.cancel()
-    }
-  }, [editor, defaultListId, handleCreate, handleUpdate, handleDelete])
+    return unsub
+  }, [editor, defaultListId, handleCreate])
 
   /**
    * Backend -> Canvas sync via CustomEvent.
@@ -56,13 +56,18 @@ export class TodoApiError extends Error {
 }
 
 /**
- * Helper to make authenticated API requests.
+ * Response header carrying the cursor of the next page of a paginated list.
  */
-async function apiRequest<T>(
+const NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+/**
+ * Helper to make authenticated API requests; throws TodoApiError on failure.
+ */
+async function apiFetch(
   path: string,
   token: string,
   options: RequestInit = {}
-): Promise<T> {
+): Promise<Response> {
   const response = await fetch(`${config.apiUrl}${path}`, {
     ...options,
     headers: {
@@ -83,6 +88,19 @@ async function apiRequest<T>(
     throw new TodoApiError(errorMessage, response.status)
   }
 
+  return response
+}
+
+/**
+ * Helper to make authenticated API requests returning JSON.
+ */
+async function apiRequest<T>(
+  path: string,
+  token: string,
+  options: RequestInit = {}
+): Promise<T> {
+  const response = await apiFetch(path, token, options)
+
   // Handle 204 No Content (e.g., DELETE)
   if (response.status === 204) {
     return undefined as T
@@ -173,7 +191,9 @@ export async function toggleTodo(
 }
 
 /**
- * Fetch all TODO items in a list.
+ * Fetch all TODO items in a list, newest first.
+ *
+ * The endpoint is paginated; follows X-Next-Cursor until the last page.
  *
  * @param listId - ID of the list to fetch TODOs from
  * @param token - JWT authentication token
@@ -183,11 +203,15 @@ export async function fetchListTodos(
   listId: number,
   token: string
 ): Promise<BackendTodoItem[]> {
-  return apiRequest<BackendTodoItem[]>(
-    `/lists/${listId}/todos`,
-    token,
-    { method: 'GET' }
-  )
+  const todos: BackendTodoItem[] = []
+  let cursor: string | null = null
+  do {
+    const query: string = cursor ? `?cursor=${encodeURIComponent(cursor)}` : ''
+    const response = await apiFetch(`/lists/${listId}/todos${query}`, token, { method: 'GET' })
+    todos.push(...(await response.json() as BackendTodoItem[]))
+    cursor = response.headers.get(NEXT_CURSOR_HEADER)
+  } while (cursor)
+  return todos
 }
 
 /**
@@ -0,0 +1,171 @@
+"""
+Heartbeat and zombie-socket reaping for team, canvas and multiplex sockets.
+
+One timer task pings every watched socket each HEARTBEAT_INTERVAL_SECONDS
+instead of one task per socket. Any frame received from a socket counts as
+its pong, so active clients never need to answer explicitly; idle clients
+reply to the ping. A socket that stays silent for HEARTBEAT_MAX_MISSED pings
+(or whose ping can't be sent) is reaped: its on_dead callback unregisters it
+from the team/room so it stops receiving broadcast work, and it is closed
+with HEARTBEAT_CLOSE_CODE.
+
+Ping frames follow each socket's protocol:
+- Team and multiplex sockets: the text frame {"event": "ping"}; clients may
+  answer {"action": "pong"}
+- Canvas sockets: an empty Yjs update (a no-op for the client's Y.Doc);
+  clients may answer with the same frame
+"""
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, Optional, Set, Union
+from fastapi import WebSocket
+
+from config import HEARTBEAT_INTERVAL_SECONDS, HEARTBEAT_MAX_MISSED
+
+TEXT_PING = '{"event":"ping"}'
+# Yjs v1 update with no structs and an empty delete set
+EMPTY_UPDATE = b"\x00\x00"
+
+# Close code for reaped sockets (clients should reconnect)
+HEARTBEAT_CLOSE_CODE = 4408
+
+OnDead = Callable[[], Optional[Awaitable[None]]]
+
+logger = logging.getLogger(__name__)
+
+
+class _Watched:
+    __slots__ = ("ping", "on_dead", "missed")
+
+    def __init__(self, ping: Union[str, bytes], on_dead: OnDead):
+        self.ping = ping
+        self.on_dead = on_dead
+        self.missed = 0
+
+
+async def _send_ping(websocket: WebSocket, ping: Union[str, bytes], timeout: float) -> bool:
+    try:
+        if isinstance(ping, bytes):
+            await asyncio.wait_for(websocket.send_bytes(ping), timeout)
+        else:
+            await asyncio.wait_for(websocket.send_text(ping), timeout)
+        return True
+    except Exception:
+        return False
+
+
+class HeartbeatScheduler:
+    """Pings watched sockets from a single task and reaps silent ones."""
+
+    def __init__(self, interval: Optional[float] = None, max_missed: Optional[int] = None):
+        """
+        Args:
+            interval: Seconds between pings (default: HEARTBEAT_INTERVAL_SECONDS)
+            max_missed: Consecutive unanswered pings before a socket is reaped
+                (default: HEARTBEAT_MAX_MISSED)
+        """
+        self._interval = HEARTBEAT_INTERVAL_SECONDS if interval is None else interval
+        self._max_missed = HEARTBEAT_MAX_MISSED if max_missed is None else max_missed
+        self._sockets: Dict[WebSocket, _Watched] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Background closes of reaped sockets (referenced so they aren't collected)
+        self._closing: Set[asyncio.Task] = set()
+
+    def __len__(self) -> int:
+        return len(self._sockets)
+
+    async def start(self):
+        """Start the heartbeat task."""
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the heartbeat task; watched sockets are left open."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def watch(self, websocket: WebSocket, ping: Union[str, bytes], on_dead: OnDead):
+        """
+        Start pinging a socket.
+
+        Args:
+            websocket: The accepted socket
+            ping: Frame to send as ping (TEXT_PING or EMPTY_UPDATE)
+            on_dead: Called (and awaited if it returns an awaitable) when the
+                socket is reaped, before it is closed
+        """
+        self._sockets[websocket] = _Watched(ping, on_dead)
+
+    def unwatch(self, websocket: WebSocket):
+        """Stop pinging a socket (on disconnect)."""
+        self._sockets.pop(websocket, None)
+
+    def beat(self, websocket: WebSocket):
+        """Record that a frame arrived from a socket."""
+        watched = self._sockets.get(websocket)
+        if watched is not None:
+            watched.missed = 0
+
+    async def tick(self) -> int:
+        """
+        Reap sockets that missed too many pings, then ping the rest.
+
+        Returns:
+            Number of sockets reaped
+        """
+        dead = [ws for ws, watched in self._sockets.items() if watched.missed >= self._max_missed]
+        alive = [ws for ws in self._sockets if ws not in dead]
+
+        results = await asyncio.gather(*(
+            _send_ping(ws, self._sockets[ws].ping, self._interval) for ws in alive
+        ))
+        for ws, sent in zip(alive, results):
+            watched = self._sockets.get(ws)
+            if watched is None:
+                continue  # Disconnected while the ping was in flight
+            if sent:
+                watched.missed += 1
+            else:
+                dead.append(ws)
+
+        for ws in dead:
+            await self._reap(ws)
+        return len(dead)
+
+    async def _reap(self, websocket: WebSocket):
+        watched = self._sockets.pop(websocket, None)
+        if watched is None:
+            return
+        try:
+            result = watched.on_dead()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            # Still close it, and reap the rest of this tick's sockets
+            logger.exception("Heartbeat on_dead callback failed")
+        task = asyncio.create_task(self._close_quietly(websocket))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_quietly(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=HEARTBEAT_CLOSE_CODE), self._interval)
+        except Exception:
+            pass  # Already gone
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.tick()
+            except Exception:
+                # Keep pinging and reaping on the next tick
+                logger.exception("Heartbeat tick failed")
+
+
+heartbeat = HeartbeatScheduler()
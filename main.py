@@ -1,19 +1,23 @@
+import hmac
 from contextlib import asynccontextmanager
+from typing import Optional
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse
-from jose import JWTError, jwt
+from fastapi.responses import RedirectResponse, Response
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from config import SECRET_KEY, ALGORITHM
-from database import init_db, async_session
-from sqlalchemy import select
-from models import User, TeamMember
+from config import METRICS_TOKEN
+from database import init_db
 from websocket import manager
-from routers import auth, teams, lists, todos, boards
+from ws_auth import handshake_cache
+from heartbeat import heartbeat, TEXT_PING
+from outbox import outbox_dispatcher
+from routers import auth, teams, lists, todos, changes, boards, admin
 from rate_limit import limiter
-from canvas import BoardPersistence, RoomManager, handle_canvas_websocket
+from canvas import BoardPersistence, BoardRenderer, RoomManager, handle_canvas_websocket
+from canvas import metrics as canvas_metrics
+from multiplex import handle_multiplex_websocket
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -23,8 +27,16 @@ async def lifespan(app: FastAPI):
     room_manager = RoomManager(persistence)
     await room_manager.start()
     app.state.room_manager = room_manager
+    await manager.start()
+    await heartbeat.start()
+    await outbox_dispatcher.start()
+    app.state.board_renderer = BoardRenderer()
     yield
     # Cleanup on shutdown
+    app.state.board_renderer.close()
+    await outbox_dispatcher.stop()
+    await heartbeat.stop()
+    await manager.stop()
     await room_manager.stop()
 
 app = FastAPI(title="Collaborative TODO", lifespan=lifespan)
@@ -41,7 +53,9 @@ app.include_router(auth.router, prefix=API_V1_PREFIX)
 app.include_router(teams.router, prefix=API_V1_PREFIX)
 app.include_router(lists.router, prefix=API_V1_PREFIX)
 app.include_router(todos.router, prefix=API_V1_PREFIX)
+app.include_router(changes.router, prefix=API_V1_PREFIX)
 app.include_router(boards.router, prefix=API_V1_PREFIX)
+app.include_router(admin.router, prefix=API_V1_PREFIX)
 
 # Page routes
 @app.get("/")
@@ -69,45 +83,47 @@ async def team_page(request: Request, team_id: int):
 async def health():
     return {"status": "ok"}
 
+# Prometheus scrape endpoint
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    # Per-room series are labelled with board ids, so scraping always needs the token
+    if not METRICS_TOKEN:
+        return Response(status_code=404)
+    supplied = request.headers.get("authorization", "").encode()
+    if not hmac.compare_digest(supplied, f"Bearer {METRICS_TOKEN}".encode()):
+        return Response(status_code=401)
+    room_manager = getattr(request.app.state, "room_manager", None)
+    return Response(canvas_metrics.render(room_manager), media_type=canvas_metrics.CONTENT_TYPE)
+
 # WebSocket endpoint
 @app.websocket("/ws/teams/{team_id}")
 async def websocket_endpoint(
     websocket: WebSocket,
     team_id: int,
-    token: str = Query(...)
+    token: str = Query(...),
+    last_seq: Optional[int] = Query(None)
 ):
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
-    except JWTError:
+    identity = await handshake_cache.user_for_token(token)
+    if identity is None:
         await websocket.close(code=4001)
         return
+    user_id, username = identity
+
+    if not await handshake_cache.is_member(user_id, team_id):
+        await websocket.close(code=4003)
+        return
 
-    async with async_session() as db:
-        result = await db.execute(select(User).where(User.id == user_id))
-        user = result.scalar_one_or_none()
-        if not user:
-            await websocket.close(code=4001)
-            return
-
-        result = await db.execute(
-            select(TeamMember).where(
-                TeamMember.user_id == user_id,
-                TeamMember.team_id == team_id
-            )
-        )
-        if not result.scalar_one_or_none():
-            await websocket.close(code=4003)
-            return
-
-    await manager.connect(websocket, team_id, user_id, user.username)
+    await manager.connect(websocket, team_id, user_id, username, last_seq)
+    heartbeat.watch(websocket, TEXT_PING, lambda: manager.disconnect(websocket))
 
     try:
         while True:
             await websocket.receive_text()
+            heartbeat.beat(websocket)
     except WebSocketDisconnect:
-        manager.disconnect(websocket, team_id, user_id, user.username)
-        await manager.broadcast_offline(team_id, user_id, user.username)
+        manager.disconnect(websocket)
+    finally:
+        heartbeat.unwatch(websocket)
 
 
 @app.websocket("/ws/canvas/{board_id}")
@@ -133,6 +149,49 @@ async def canvas_websocket_endpoint(
     )
 
 
+@app.websocket("/ws/canvas/{board_id}/subdocs/{subdoc_id}")
+async def canvas_subdoc_websocket_endpoint(
+    websocket: WebSocket,
+    board_id: str,
+    subdoc_id: str,
+    token: str = Query(...)
+):
+    """
+    WebSocket endpoint for one subdocument (page/frame) of a paged board.
+
+    Same protocol and permissions as /ws/canvas/{board_id}; the subdocument
+    is loaded lazily on first subscription and persisted in its own row.
+    """
+    await handle_canvas_websocket(
+        websocket,
+        board_id,
+        token,
+        websocket.app.state.room_manager,
+        subdoc_id=subdoc_id
+    )
+
+
+@app.websocket("/ws")
+async def multiplex_websocket_endpoint(
+    websocket: WebSocket,
+    token: str = Query(...)
+):
+    """
+    Multiplexed WebSocket carrying team and board channels.
+
+    Authenticates once per connection; clients subscribe/unsubscribe to
+    "team:{team_id}" and "board:{board_id}" channels (see multiplex.py).
+    """
+    await handle_multiplex_websocket(
+        websocket,
+        token,
+        manager,
+        websocket.app.state.room_manager
+    )
+
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    from config import CANVAS_MAX_FRAME_BYTES
+    # Reject oversized frames at the protocol layer before they are buffered
+    uvicorn.run(app, host="0.0.0.0", port=8000, ws_max_size=CANVAS_MAX_FRAME_BYTES)
@@ -1,11 +1,17 @@
 from datetime import datetime
 from enum import Enum as PyEnum
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Enum, Index, UniqueConstraint, false as sa_false
 from sqlalchemy.orm import relationship
 from database import Base
 import secrets
 
 
+class BoardLayout(str, PyEnum):
+    """How a board's CRDT state is partitioned."""
+    SINGLE = "single"  # One Y.Doc for the whole board
+    PAGED = "paged"    # Root Y.Doc plus one subdocument per page/frame
+
+
 class PermissionLevel(str, PyEnum):
     """Permission levels for board access."""
     VIEW = "view"
@@ -19,6 +25,7 @@ class User(Base):
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     password_hash = Column(String(255), nullable=False)
+    is_admin = Column(Boolean, nullable=False, default=False, server_default=sa_false())
     created_at = Column(DateTime, default=datetime.utcnow)
 
     memberships = relationship("TeamMember", back_populates="user")
@@ -29,6 +36,12 @@ class Team(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
     invite_code = Column(String(20), unique=True, index=True, default=lambda: secrets.token_urlsafe(10))
+    # Last change cursor handed out for the team's lists and todos (see changes.py);
+    # also bumped when a member joins, so it doubles as the team's ETag version
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Todos in all of the team's lists (see counters.py)
+    todo_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
 
     members = relationship("TeamMember", back_populates="team", cascade="all, delete-orphan")
@@ -36,6 +49,10 @@ class Team(Base):
 
 class TeamMember(Base):
     __tablename__ = "team_members"
+    __table_args__ = (
+        # list_my_teams pages
+        Index('ix_team_members_user_team', 'user_id', 'team_id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -47,17 +64,34 @@ class TeamMember(Base):
 
 class TodoList(Base):
     __tablename__ = "todo_lists"
+    __table_args__ = (
+        Index('ix_todo_lists_team_change_seq', 'team_id', 'change_seq'),
+        # get_team_lists pages
+        Index('ix_todo_lists_team', 'team_id', 'id'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     team_id = Column(Integer, ForeignKey("teams.id"), nullable=False)
     name = Column(String(100), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
+    # Kept in step with todo_items by every todo write (see counters.py)
+    todo_count = Column(Integer, nullable=False, default=0, server_default="0")
+    completed_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     team = relationship("Team", back_populates="lists")
     items = relationship("TodoItem", back_populates="list", cascade="all, delete-orphan")
 
 class TodoItem(Base):
     __tablename__ = "todo_items"
+    __table_args__ = (
+        Index('ix_todo_items_list_change_seq', 'list_id', 'change_seq'),
+        # get_list_todos pages (newest first)
+        Index('ix_todo_items_list_created', 'list_id', 'created_at', 'id'),
+        # Overdue counts (open todos by due date)
+        Index('ix_todo_items_list_open_due', 'list_id', 'completed', 'due_date'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     list_id = Column(Integer, ForeignKey("todo_lists.id"), nullable=False)
@@ -67,18 +101,51 @@ class TodoItem(Base):
     assigned_to = Column(Integer, ForeignKey("users.id"), nullable=True)
     due_date = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0")
 
     list = relationship("TodoList", back_populates="items")
     assignee = relationship("User", foreign_keys=[assigned_to])
 
 
+class Tombstone(Base):
+    """Record of a deleted list or todo, so delta sync can report the deletion."""
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index('ix_tombstones_team_change_seq', 'team_id', 'change_seq'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    team_id = Column(Integer, nullable=False)
+    kind = Column(String(10), nullable=False)  # "list" or "todo"
+    object_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow)
+
+
+class OutboxEvent(Base):
+    """Team WebSocket event committed with the change it describes; see outbox.py."""
+    __tablename__ = "team_event_outbox"
+
+    id = Column(Integer, primary_key=True)
+    team_id = Column(Integer, nullable=False)  # No FK: events for a deleted team are just dropped
+    event = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Board(Base):
     __tablename__ = "boards"
+    __table_args__ = (
+        # list_boards pages (newest first)
+        Index('ix_boards_owner_created', 'owner_id', 'created_at', 'id'),
+    )
 
     id = Column(String(36), primary_key=True)  # UUID stored as string for SQLite compatibility
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     title = Column(String(200), nullable=False, default="Untitled Board")
     is_public = Column(Boolean, default=False)
+    layout = Column(String(20), nullable=False, default=BoardLayout.SINGLE.value, server_default=BoardLayout.SINGLE.value)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     owner = relationship("User")
@@ -89,6 +156,9 @@ class BoardPermission(Base):
     __tablename__ = "board_permissions"
     __table_args__ = (
         UniqueConstraint('board_id', 'user_id', name='uq_board_user_permission'),
+        # list_boards (boards shared with a user) and list_permissions pages
+        Index('ix_board_permissions_user_board', 'user_id', 'board_id'),
+        Index('ix_board_permissions_board', 'board_id', 'id'),
     )
 
     id = Column(Integer, primary_key=True, index=True)
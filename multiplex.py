@@ -0,0 +1,335 @@
+"""
+Multiplexed WebSocket carrying several boards and team channels.
+
+One socket per user instead of one per team plus one per open board. The
+token is resolved once per connection and team subscriptions are authorized
+through the same handshake cache as /ws/teams (ws_auth.py); board
+subscriptions run their own permission query.
+
+Protocol (text frames are JSON):
+- Client -> server
+    {"action": "subscribe", "channel": "team:<team_id>", "last_seq": <int, optional>}
+    {"action": "subscribe", "channel": "board:<board_id>"}
+    {"action": "subscribe", "channel": "board:<board_id>/<subdoc_id>"}
+    {"action": "unsubscribe", "channel": "<channel>"}
+    {"action": "pong"} (optional reply to a ping; any frame counts)
+- Server -> client
+    {"event": "subscribed", "channel": ..., "handle": <int, boards only>}
+    {"event": "unsubscribed", "channel": ..., "code": <int, if server-initiated>}
+    {"event": "error", "channel": ..., "code": <close-code style int>, "detail": ...}
+    Team events as on /ws/teams/{team_id}, plus a "channel" key
+    {"event": "ping"} (heartbeat.py)
+- Binary frames (both directions) carry Yjs updates for board channels,
+  prefixed with the 2-byte big-endian channel handle.
+
+Channels are adapters that look like WebSockets to ConnectionManager and
+RoomManager, so both keep their existing broadcast code paths.
+"""
+import asyncio
+import json
+from typing import Optional, Union
+from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import select
+
+from database import async_session
+from heartbeat import heartbeat, TEXT_PING
+from models import Board, PermissionLevel
+from websocket import ConnectionManager
+from ws_auth import handshake_cache
+from canvas import RoomManager
+from canvas import metrics as canvas_metrics
+from canvas.limits import InboundLimiter
+from canvas.websocket_handler import (
+    SUBDOC_ID_PATTERN, board_supports_subdocs, get_board_permission, log_canvas_access
+)
+
+MAX_CHANNELS_PER_CONNECTION = 64
+HANDLE_BYTES = 2
+
+
+class TeamChannel:
+    """Team event channel; quacks like the WebSocket ConnectionManager expects."""
+
+    def __init__(self, connection: "MultiplexConnection", name: str, team_id: int):
+        self.connection = connection
+        self.name = name
+        self.team_id = team_id
+
+    async def accept(self):
+        """The underlying socket is already accepted."""
+
+    async def send_json(self, message: dict):
+        await self.connection.websocket.send_json({"channel": self.name, **message})
+
+    async def send_text(self, text: str):
+        """Forward a pre-encoded JSON object, adding the channel key first."""
+        body = text[1:].lstrip()
+        separator = "" if body.startswith("}") else ","
+        await self.connection.websocket.send_text(
+            f'{{"channel":{json.dumps(self.name)}{separator}{body}'
+        )
+
+    async def close(self, code: int = 1000):
+        """Server-side unsubscribe; the rest of the socket stays open."""
+        await self.connection.drop(self, code)
+
+
+class BoardChannel:
+    """Board CRDT channel; quacks like the WebSocket RoomManager expects."""
+
+    def __init__(
+        self,
+        connection: "MultiplexConnection",
+        name: str,
+        handle: int,
+        board_id: str,
+        subdoc_id: Optional[str],
+        permission: str
+    ):
+        self.connection = connection
+        self.name = name
+        self.handle = handle
+        self.board_id = board_id
+        self.subdoc_id = subdoc_id
+        self.permission = permission
+        self._prefix = handle.to_bytes(HANDLE_BYTES, "big")
+
+    async def send_bytes(self, data: bytes):
+        await self.connection.websocket.send_bytes(self._prefix + data)
+
+    async def close(self, code: int = 1000):
+        """Server-side unsubscribe; the rest of the socket stays open."""
+        await self.connection.drop(self, code)
+
+
+Channel = Union[TeamChannel, BoardChannel]
+
+
+class MultiplexConnection:
+    """State of one multiplexed socket: the user and their subscriptions."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        user_id: int,
+        username: str,
+        team_manager: ConnectionManager,
+        room_manager: RoomManager
+    ):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.username = username
+        self._team_manager = team_manager
+        self._room_manager = room_manager
+        self._channels: dict[str, Channel] = {}
+        self._boards_by_handle: dict[int, BoardChannel] = {}
+        self._next_handle = 1
+
+    async def send_error(self, channel: Optional[str], code: int, detail: str):
+        await self.websocket.send_json({
+            "event": "error",
+            "channel": channel,
+            "code": code,
+            "detail": detail
+        })
+
+    async def handle_text(self, text: str):
+        try:
+            message = json.loads(text)
+            action = message["action"]
+            if action == "pong":
+                return  # Heartbeat reply; receiving it was enough
+            channel = message["channel"]
+        except (ValueError, TypeError, KeyError):
+            await self.send_error(None, 4400, "Expected {\"action\": ..., \"channel\": ...}")
+            return
+
+        if not isinstance(channel, str):
+            await self.send_error(None, 4400, "channel must be a string")
+        elif action == "subscribe":
+            await self.subscribe(channel, message.get("last_seq"))
+        elif action == "unsubscribe":
+            await self.unsubscribe(channel)
+        else:
+            await self.send_error(channel, 4400, f"Unknown action: {action}")
+
+    async def handle_bytes(self, data: bytes):
+        if len(data) < HANDLE_BYTES:
+            return
+        channel = self._boards_by_handle.get(int.from_bytes(data[:HANDLE_BYTES], "big"))
+        if channel is None:
+            return
+
+        # Only apply updates if user has edit permission
+        if channel.permission == PermissionLevel.EDIT.value:
+            await self._room_manager.apply_update(
+                channel.board_id, data[HANDLE_BYTES:], channel, channel.subdoc_id, self.user_id
+            )
+
+    async def subscribe(self, name: str, last_seq: Optional[int] = None):
+        if name in self._channels:
+            await self.send_error(name, 4409, "Already subscribed")
+            return
+        if len(self._channels) >= MAX_CHANNELS_PER_CONNECTION:
+            await self.send_error(name, 4429, "Too many channels")
+            return
+
+        kind, _, target = name.partition(":")
+        if kind == "team":
+            await self._subscribe_team(name, target, last_seq)
+        elif kind == "board":
+            await self._subscribe_board(name, target)
+        else:
+            await self.send_error(name, 4404, "Unknown channel type")
+
+    async def _subscribe_team(self, name: str, target: str, last_seq: Optional[int]):
+        try:
+            team_id = int(target)
+        except ValueError:
+            await self.send_error(name, 4404, "Invalid team id")
+            return
+        if last_seq is not None and (not isinstance(last_seq, int) or isinstance(last_seq, bool)):
+            await self.send_error(name, 4400, "last_seq must be an integer")
+            return
+
+        if not await handshake_cache.is_member(self.user_id, team_id):
+            await self.send_error(name, 4003, "Not a team member")
+            return
+
+        channel = TeamChannel(self, name, team_id)
+        self._channels[name] = channel
+        await self.websocket.send_json({"event": "subscribed", "channel": name})
+        await self._team_manager.connect(channel, team_id, self.user_id, self.username, last_seq)
+
+    async def _subscribe_board(self, name: str, target: str):
+        board_id, _, subdoc_id = target.partition("/")
+        subdoc_id = subdoc_id or None
+        if subdoc_id is not None and not SUBDOC_ID_PATTERN.match(subdoc_id):
+            await self.send_error(name, 4004, "Invalid subdocument id")
+            return
+
+        handle = self._allocate_handle()
+        if handle is None:
+            await self.send_error(name, 4429, "No free channel handles")
+            return
+
+        request_ip = self.websocket.client.host if self.websocket.client else None
+        user_agent = self.websocket.headers.get("user-agent")
+        async with async_session() as db:
+            result = await db.execute(select(Board).where(Board.id == board_id))
+            board = result.scalar_one_or_none()
+            permission = await get_board_permission(db, self.user_id, board) if board else None
+            if not permission:
+                await self.send_error(name, 4003, "Board access denied")
+                return
+            log_canvas_access(db, self.user_id, board_id, permission, request_ip, user_agent)
+            await db.commit()
+
+        if subdoc_id is not None and not await board_supports_subdocs(board_id):
+            await self.send_error(name, 4004, "Board does not use the paged layout")
+            return
+
+        channel = BoardChannel(self, name, handle, board_id, subdoc_id, permission)
+        self._channels[name] = channel
+        self._boards_by_handle[handle] = channel
+        await self.websocket.send_json({"event": "subscribed", "channel": name, "handle": handle})
+
+        # Same initial sync as /ws/canvas/{board_id}
+        room = await self._room_manager.add_client(
+            board_id, channel, subdoc_id,
+            read_only=permission != PermissionLevel.EDIT.value
+        )
+        state = room.ydoc.get_state()
+        if state:
+            await channel.send_bytes(state)
+
+    def _allocate_handle(self) -> Optional[int]:
+        limit = 1 << (8 * HANDLE_BYTES)
+        for _ in range(limit - 1):
+            handle = self._next_handle
+            self._next_handle = handle + 1 if handle + 1 < limit else 1
+            if handle not in self._boards_by_handle:
+                return handle
+        return None
+
+    async def unsubscribe(self, name: str):
+        channel = self._channels.get(name)
+        if channel is None:
+            await self.send_error(name, 4404, "Not subscribed")
+            return
+        await self._release(channel)
+        await self.websocket.send_json({"event": "unsubscribed", "channel": name})
+
+    async def _release(self, channel: Channel):
+        self._channels.pop(channel.name, None)
+        if isinstance(channel, TeamChannel):
+            self._team_manager.disconnect(channel)
+        else:
+            self._boards_by_handle.pop(channel.handle, None)
+            self._room_manager.remove_client(channel.board_id, channel, channel.subdoc_id)
+
+    async def drop(self, channel: Channel, code: int):
+        """Unsubscribe a channel on the server's initiative."""
+        if self._channels.get(channel.name) is not channel:
+            return
+        await self._release(channel)
+        await self.websocket.send_json({"event": "unsubscribed", "channel": channel.name, "code": code})
+
+    async def close(self):
+        """Release every subscription (on disconnect)."""
+        for channel in list(self._channels.values()):
+            await self._release(channel)
+
+
+async def handle_multiplex_websocket(
+    websocket: WebSocket,
+    token: str,
+    team_manager: ConnectionManager,
+    room_manager: RoomManager
+):
+    """
+    Handle a multiplexed WebSocket connection.
+
+    Args:
+        websocket: FastAPI WebSocket
+        token: JWT token for authentication
+        team_manager: Team event connection manager
+        room_manager: Canvas room manager
+    """
+    identity = await handshake_cache.user_for_token(token)
+    if identity is None:
+        await websocket.close(code=4001)  # Unauthorized
+        return
+
+    await websocket.accept()
+    connection = MultiplexConnection(websocket, *identity, team_manager, room_manager)
+    # One budget for the whole socket, shared by all of its channels
+    limiter = InboundLimiter()
+    heartbeat.watch(websocket, TEXT_PING, connection.close)
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            heartbeat.beat(websocket)
+
+            data = message.get("bytes")
+            text = message.get("text")
+            close_code, delay = limiter.admit(len(data) if data is not None else len(text or ""))
+            if close_code is not None:
+                canvas_metrics.CONNECTIONS_LIMITED.inc()
+                await websocket.close(code=close_code)
+                break
+            if delay:
+                await asyncio.sleep(delay)
+
+            if data is not None:
+                await connection.handle_bytes(data)
+            elif text is not None:
+                await connection.handle_text(text)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        heartbeat.unwatch(websocket)
+        await connection.close()
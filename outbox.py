@@ -0,0 +1,119 @@
+"""
+Transactional outbox for team WebSocket events.
+
+Routers add the event to the same session as the change it describes
+(enqueue_team_event), so it is committed, or rolled back, together with it.
+OutboxDispatcher drains committed events in id order and in batches to
+ConnectionManager.broadcast_todo_event, then deletes them. Delivery is
+at-least-once: a crash between broadcasting a batch and deleting it sends
+that batch again on restart.
+
+The dispatcher is woken right after a commit (notify) and also polls every
+OUTBOX_POLL_INTERVAL_SECONDS, which picks up anything a notify missed.
+"""
+import asyncio
+import json
+from typing import Optional
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import OUTBOX_BATCH_SIZE, OUTBOX_POLL_INTERVAL_SECONDS
+from database import async_session
+from models import OutboxEvent
+from websocket import ConnectionManager, manager
+
+
+def enqueue_team_event(db: AsyncSession, team_id: int, event: str, data: dict):
+    """Add a team event to the session; it is sent once the session commits."""
+    db.add(OutboxEvent(team_id=team_id, event=event, payload=json.dumps(data)))
+
+
+class OutboxDispatcher:
+    """Single background task broadcasting committed outbox events."""
+
+    def __init__(
+        self,
+        team_manager: ConnectionManager,
+        batch_size: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ):
+        """
+        Args:
+            team_manager: Team socket registry events are broadcast through
+            batch_size: Events read and deleted per transaction
+                (default: OUTBOX_BATCH_SIZE)
+            poll_interval: Seconds between polls when not notified
+                (default: OUTBOX_POLL_INTERVAL_SECONDS)
+        """
+        self._team_manager = team_manager
+        self._batch_size = OUTBOX_BATCH_SIZE if batch_size is None else batch_size
+        self._poll_interval = OUTBOX_POLL_INTERVAL_SECONDS if poll_interval is None else poll_interval
+        # Created by start(), in the loop that runs the dispatcher
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start the dispatch task."""
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the dispatch task and send whatever is already committed."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wake = None
+        await self.dispatch()
+
+    def notify(self):
+        """Wake the dispatcher (call after committing enqueued events)."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def dispatch(self) -> int:
+        """
+        Broadcast and delete committed events until the outbox is empty.
+
+        Returns:
+            Number of events sent
+        """
+        sent = 0
+        while True:
+            async with async_session() as db:
+                result = await db.execute(
+                    select(OutboxEvent).order_by(OutboxEvent.id).limit(self._batch_size)
+                )
+                events = result.scalars().all()
+                if not events:
+                    return sent
+
+                for event in events:
+                    await self._team_manager.broadcast_todo_event(
+                        event.team_id, event.event, json.loads(event.payload)
+                    )
+                await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([e.id for e in events])))
+                await db.commit()
+
+            sent += len(events)
+            if len(events) < self._batch_size:
+                return sent
+
+    async def _loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.dispatch()
+            except Exception:
+                # Database unavailable: events stay queued for the next round
+                await asyncio.sleep(self._poll_interval)
+
+
+outbox_dispatcher = OutboxDispatcher(manager)
@@ -0,0 +1,95 @@
+"""
+Keyset pagination for list endpoints.
+
+Each paginated endpoint reads its rows in a fixed order over a unique key
+(sort column(s) ending in the primary key). The cursor is the last returned
+row's key, base64url-encoded JSON that clients treat as opaque, and the next
+page starts strictly after it: WHERE (created_at, id) < (:c, :i) instead of
+OFFSET, so with an index on (filter column, key...) every page costs the same
+no matter how deep it is.
+
+Responses stay plain JSON arrays; the cursor for the next page is sent in
+the X-Next-Cursor header, which is absent on the last page.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import DateTime, Select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import PAGE_SIZE_DEFAULT, PAGE_SIZE_MAX
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """?cursor= and ?limit= query parameters (use as Depends())."""
+
+    def __init__(
+        self,
+        cursor: Optional[str] = Query(None, description="Value of a previous page's X-Next-Cursor header"),
+        limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX)
+    ):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    data = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Key values from a cursor made for these columns; 400 if it isn't one."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [
+            datetime.fromisoformat(value) if isinstance(column.type, DateTime) else value
+            for column, value in zip(columns, values)
+        ]
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    columns: Sequence,
+    page: PageParams,
+    response: Response,
+    descending: bool = False
+) -> list:
+    """
+    Run one page of a query, ordered by columns.
+
+    Args:
+        db: Session to run the query in
+        query: Filtered select of a single entity
+        columns: Sort key of the entity, ending in its primary key
+        page: Cursor and limit from the request
+        response: Receives the X-Next-Cursor header when more rows follow
+        descending: Sort newest/highest first
+
+    Returns:
+        Up to page.limit entities
+    """
+    if page.cursor:
+        key = tuple_(*columns)
+        after = tuple_(*decode_cursor(page.cursor, columns))
+        query = query.where(key < after if descending else key > after)
+    order = [column.desc() for column in columns] if descending else list(columns)
+
+    # One extra row tells whether there is a next page
+    result = await db.execute(query.order_by(*order).limit(page.limit + 1))
+    rows = list(result.scalars().all())
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [getattr(rows[-1], column.key) for column in columns]
+        )
+    return rows
@@ -1 +1 @@
-from . import auth, teams, lists, todos, boards
+from . import auth, teams, lists, todos, changes, boards, admin
@@ -0,0 +1,109 @@
+"""
+Operator endpoints for live canvas rooms and todo counter repair.
+
+Requires a user with is_admin set (there is no API to grant it; set the
+column directly in the database). Listing only reads counters RoomManager and
+BoardPersistence already keep, so it never encodes a document; flush and
+unload save the room like the debounced save would.
+"""
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import get_current_admin
+from counters import repair_counters
+from database import get_db
+from models import User
+from schemas import AdminRoomResponse, AdminRoomActionResponse, AdminCounterRepairResponse
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+
+@router.get("/rooms", response_model=List[AdminRoomResponse])
+async def list_rooms(request: Request, admin: User = Depends(get_current_admin)):
+    """List rooms held in memory, busiest first."""
+    room_manager = request.app.state.room_manager
+    persistence = room_manager.persistence
+    rooms = sorted(
+        room_manager.rooms(),
+        key=lambda room: (room.client_count, room.last_activity),
+        reverse=True
+    )
+    return [
+        AdminRoomResponse(
+            board_id=room.board_id,
+            subdoc_id=room.subdoc_id,
+            clients=len(room.clients),
+            relay_clients=len(room.relay.clients),
+            doc_bytes=persistence.saved_size(room.board_id, room.subdoc_id),
+            dirty=room_manager.is_dirty(room),
+            save_pending=persistence.is_pending(room.board_id, room.subdoc_id),
+            last_activity=room.last_activity,
+            updates_total=room.updates_total,
+            updates_per_second=room.update_rate()
+        )
+        for room in rooms
+    ]
+
+
+def get_loaded_room_or_404(request: Request, board_id: str, subdoc_id: Optional[str]):
+    room = request.app.state.room_manager.get_room(board_id, subdoc_id)
+    if room is None:
+        raise HTTPException(status_code=404, detail="Room not loaded")
+    return room
+
+
+@router.post("/rooms/{board_id}/flush", response_model=AdminRoomActionResponse)
+async def flush_room(
+    board_id: str,
+    request: Request,
+    subdoc: Optional[str] = Query(None),
+    admin: User = Depends(get_current_admin)
+):
+    """Save a room now instead of waiting for its debounced save."""
+    get_loaded_room_or_404(request, board_id, subdoc)
+    await request.app.state.room_manager.flush_room(board_id, subdoc)
+    return AdminRoomActionResponse(board_id=board_id, subdoc_id=subdoc, action="flush")
+
+
+@router.post("/rooms/{board_id}/unload", response_model=AdminRoomActionResponse)
+async def unload_room(
+    board_id: str,
+    request: Request,
+    subdoc: Optional[str] = Query(None),
+    admin: User = Depends(get_current_admin)
+):
+    """Disconnect a room's clients, save it and drop it from memory."""
+    room = get_loaded_room_or_404(request, board_id, subdoc)
+    clients = room.client_count
+    await request.app.state.room_manager.unload_room(board_id, subdoc)
+    return AdminRoomActionResponse(
+        board_id=board_id, subdoc_id=subdoc, action="unload", clients_disconnected=clients
+    )
+
+
+@router.post("/rooms/{board_id}/disconnect", response_model=AdminRoomActionResponse)
+async def disconnect_room(
+    board_id: str,
+    request: Request,
+    subdoc: Optional[str] = Query(None),
+    admin: User = Depends(get_current_admin)
+):
+    """Close every client connection of a room; the room stays loaded."""
+    get_loaded_room_or_404(request, board_id, subdoc)
+    clients = await request.app.state.room_manager.disconnect_clients(board_id, subdoc)
+    return AdminRoomActionResponse(
+        board_id=board_id, subdoc_id=subdoc, action="disconnect", clients_disconnected=clients
+    )
+
+
+@router.post("/counters/repair", response_model=AdminCounterRepairResponse)
+async def repair_todo_counters(
+    team_id: Optional[int] = Query(None),
+    admin: User = Depends(get_current_admin),
+    db: AsyncSession = Depends(get_db)
+):
+    """Rebuild list and team todo counters from the todos (one team, or all)."""
+    lists, teams = await repair_counters(db, team_id)
+    await db.commit()
+    return AdminCounterRepairResponse(team_id=team_id, lists=lists, teams=teams)
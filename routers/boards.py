@@ -3,20 +3,26 @@ Board management endpoints.
 
 Provides CRUD operations for boards, permission sharing, and file uploads.
 """
+import math
 import uuid
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from sqlalchemy import select
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.responses import Response
+from sqlalchemy import select, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from database import get_db
 from auth import get_current_user
-from models import User, Board, BoardPermission, PermissionLevel, AuditLog
+from models import User, Board, BoardLayout, BoardPermission, PermissionLevel, AuditLog
 from schemas import (
-    BoardCreate, BoardResponse,
+    BoardCreate, BoardResponse, SubdocResponse,
     BoardPermissionCreate, BoardPermissionResponse,
-    ShareLinkResponse,
+    ShareLinkResponse, BoardShapesResponse,
     UploadUrlRequest, UploadUrlResponse
 )
+from canvas.render import FORMATS, RendererUnavailable
+from canvas.websocket_handler import SUBDOC_ID_PATTERN
+from pagination import PageParams, paginate
 import config
 
 # Lazy import boto3 to avoid startup failure if not installed
@@ -57,7 +63,8 @@ async def create_board(
         id=str(uuid.uuid4()),
         owner_id=user.id,
         title=board_data.title,
-        is_public=board_data.is_public
+        is_public=board_data.is_public,
+        layout=board_data.layout
     )
     db.add(board)
 
@@ -76,42 +83,25 @@ async def create_board(
 
 @router.get("", response_model=list[BoardResponse])
 async def list_boards(
+    response: Response,
+    page: PageParams = Depends(),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
-    """List boards user owns or has access to."""
-    # Get owned boards
-    result = await db.execute(
-        select(Board).where(Board.owner_id == user.id)
+    """List boards user owns or has access to, newest first (paginated)."""
+    shared = select(BoardPermission.board_id).where(BoardPermission.user_id == user.id)
+    return await paginate(
+        db,
+        select(Board).where(or_(Board.owner_id == user.id, Board.id.in_(shared))),
+        (Board.created_at, Board.id),
+        page,
+        response,
+        descending=True
     )
-    owned = result.scalars().all()
-
-    # Get boards with explicit permission
-    result = await db.execute(
-        select(Board)
-        .join(BoardPermission)
-        .where(BoardPermission.user_id == user.id)
-    )
-    shared = result.scalars().all()
-
-    # Combine and deduplicate
-    board_ids = set()
-    boards = []
-    for board in list(owned) + list(shared):
-        if board.id not in board_ids:
-            boards.append(board)
-            board_ids.add(board.id)
 
-    return boards
 
-
-@router.get("/{board_id}", response_model=BoardResponse)
-async def get_board(
-    board_id: str,
-    user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
-):
-    """Get a specific board."""
+async def get_viewable_board(board_id: str, user: User, db: AsyncSession) -> Board:
+    """Load a board, raising 404/403 unless the user can at least view it."""
     result = await db.execute(select(Board).where(Board.id == board_id))
     board = result.scalar_one_or_none()
 
@@ -134,6 +124,140 @@ async def get_board(
     return board
 
 
+def parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """Parse a "min_x,min_y,max_x,max_y" query value into bounds."""
+    try:
+        values = [float(v) for v in bbox.split(",")]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be four numbers")
+    if len(values) != 4 or not all(math.isfinite(v) for v in values):
+        raise HTTPException(status_code=400, detail="bbox must be four numbers")
+    min_x, min_y, max_x, max_y = values
+    if min_x > max_x or min_y > max_y:
+        raise HTTPException(status_code=400, detail="bbox min must not exceed max")
+    return min_x, min_y, max_x, max_y
+
+
+async def get_existing_subdoc(request: Request, board_id: str, subdoc_id: str) -> str:
+    """
+    Check a page of a paged board names an existing subdocument.
+
+    Read endpoints must not create rooms for arbitrary ids: an unloaded room
+    would otherwise be persisted as a new, empty subdocument.
+
+    Raises:
+        HTTPException: 400 if the id is malformed, 404 if no such subdocument
+    """
+    if not SUBDOC_ID_PATTERN.match(subdoc_id):
+        raise HTTPException(status_code=400, detail="Invalid page id")
+    if not await request.app.state.room_manager.has_subdoc(board_id, subdoc_id):
+        raise HTTPException(status_code=404, detail="Page not found")
+    return subdoc_id
+
+
+@router.get("/{board_id}", response_model=BoardResponse)
+async def get_board(
+    board_id: str,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a specific board."""
+    return await get_viewable_board(board_id, user, db)
+
+
+@router.get("/{board_id}/shapes", response_model=BoardShapesResponse)
+async def get_board_shapes(
+    board_id: str,
+    request: Request,
+    bbox: str = Query(..., description="Viewport as min_x,min_y,max_x,max_y in page coordinates"),
+    page: Optional[str] = Query(None, description="tldraw page id, e.g. page:abc"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get shapes intersecting a viewport.
+
+    Served from the room's in-memory spatial index, so clients of huge boards
+    can fetch only what is visible instead of syncing the whole document.
+    Paged boards keep each page in its own subdocument, so page is required.
+    """
+    bounds = parse_bbox(bbox)
+    board = await get_viewable_board(board_id, user, db)
+
+    room_manager = request.app.state.room_manager
+    if board.layout == BoardLayout.PAGED.value:
+        if not page:
+            raise HTTPException(status_code=400, detail="page is required for paged boards")
+        subdoc_id = await get_existing_subdoc(request, board_id, page)
+        shapes = await room_manager.query_shapes(board_id, bounds, subdoc_id=subdoc_id)
+    else:
+        shapes = await room_manager.query_shapes(board_id, bounds, page)
+    return BoardShapesResponse(board_id=board_id, bbox=list(bounds), shapes=shapes)
+
+
+@router.get("/{board_id}/thumbnail", response_class=Response)
+async def get_board_thumbnail(
+    board_id: str,
+    request: Request,
+    format: str = Query("svg", pattern="^(svg|png)$"),
+    size: int = Query(512, ge=16, le=2048, description="Longest side in pixels"),
+    page: Optional[str] = Query(None, description="tldraw page id (subdocument id on paged boards)"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Render a board preview.
+
+    Rendered in a worker process from the live document and cached until the
+    document changes. Without page, the first page (or first persisted
+    subdocument of a paged board) is rendered.
+    """
+    board = await get_viewable_board(board_id, user, db)
+
+    room_manager = request.app.state.room_manager
+    subdoc_id, page_id = None, page
+    if board.layout == BoardLayout.PAGED.value:
+        page_id = None
+        if page is not None:
+            subdoc_id = await get_existing_subdoc(request, board_id, page)
+        else:
+            subdocs = await room_manager.persistence.list_subdocs(board_id)
+            subdoc_id = subdocs[0][0] if subdocs else None
+    room = await room_manager.get_or_create_room(board_id, subdoc_id)
+
+    try:
+        image = await request.app.state.board_renderer.render(
+            room.key, room.ydoc, format, size, page_id
+        )
+    except RendererUnavailable as exc:
+        raise HTTPException(status_code=503, detail=str(exc))
+    return Response(image, media_type=FORMATS[format], headers={"Cache-Control": "private, no-cache"})
+
+
+@router.get("/{board_id}/subdocs", response_model=list[SubdocResponse])
+async def list_subdocs(
+    board_id: str,
+    request: Request,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    List persisted subdocuments of a paged board.
+
+    Lets clients decide which /ws/canvas/{board_id}/subdocs/{subdoc_id}
+    rooms to join without loading any document state.
+    """
+    board = await get_viewable_board(board_id, user, db)
+    if board.layout != BoardLayout.PAGED.value:
+        raise HTTPException(status_code=400, detail="Board does not use the paged layout")
+
+    persistence = request.app.state.room_manager.persistence
+    return [
+        SubdocResponse(subdoc_id=subdoc_id, size=size, updated_at=updated_at)
+        for subdoc_id, size, updated_at in await persistence.list_subdocs(board_id)
+    ]
+
+
 @router.delete("/{board_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_board(
     board_id: str,
@@ -369,6 +493,8 @@ async def get_share_link(
 @router.get("/{board_id}/permissions", response_model=list[BoardPermissionResponse])
 async def list_permissions(
     board_id: str,
+    response: Response,
+    page: PageParams = Depends(),
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -382,10 +508,13 @@ async def list_permissions(
     if board.owner_id != user.id:
         raise HTTPException(status_code=403, detail="Only owner can view permissions")
 
-    result = await db.execute(
-        select(BoardPermission).where(BoardPermission.board_id == board_id)
+    return await paginate(
+        db,
+        select(BoardPermission).where(BoardPermission.board_id == board_id),
+        (BoardPermission.id,),
+        page,
+        response
     )
-    return result.scalars().all()
 
 
 @router.post("/{board_id}/upload-url", response_model=UploadUrlResponse)
@@ -0,0 +1,145 @@
+import gzip
+from fastapi import APIRouter, Depends, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from database import get_db
+from models import User, TeamMember, TodoItem, TodoList, Tombstone
+from schemas import ChangesResponse, ListResponse, MemberResponse, TeamBundleResponse, TeamWithMembers
+from auth import get_current_user
+from changes import TOMBSTONE_LIST, TOMBSTONE_TODO
+from routers.teams import get_team_or_404, get_member_team_or_404, verify_team_member
+from routers.todos import todo_to_response
+from conditional import team_etag, if_none_match, not_modified
+from config import BUNDLE_GZIP_MIN_BYTES
+
+router = APIRouter(tags=["sync"])
+
+@router.get("/teams/{team_id}/changes", response_model=ChangesResponse)
+async def get_team_changes(
+    team_id: int,
+    since: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Lists and todos of a team changed after cursor `since`, plus deletions.
+
+    since=0, or a cursor the server never handed out, returns the full state
+    with full=true. Store the returned cursor and pass it as `since` next time.
+    """
+    await verify_team_member(current_user.id, team_id, db)
+    team = await get_team_or_404(team_id, db)
+    cursor = team.change_seq
+    full = since == 0 or since > cursor
+
+    lists_query = select(TodoList).where(TodoList.team_id == team_id)
+    todos_query = (
+        select(TodoItem)
+        .options(selectinload(TodoItem.assignee))
+        .join(TodoList, TodoList.id == TodoItem.list_id)
+        .where(TodoList.team_id == team_id)
+    )
+    if not full:
+        lists_query = lists_query.where(TodoList.change_seq > since)
+        todos_query = todos_query.where(TodoItem.change_seq > since)
+
+    lists = (await db.execute(lists_query.order_by(TodoList.change_seq, TodoList.id))).scalars().all()
+    todos = (await db.execute(todos_query.order_by(TodoItem.change_seq, TodoItem.id))).scalars().all()
+
+    deleted = {TOMBSTONE_LIST: [], TOMBSTONE_TODO: []}
+    if not full:
+        result = await db.execute(
+            select(Tombstone.kind, Tombstone.object_id)
+            .where(Tombstone.team_id == team_id, Tombstone.change_seq > since)
+            .order_by(Tombstone.change_seq)
+        )
+        for kind, object_id in result.all():
+            deleted[kind].append(object_id)
+
+    return ChangesResponse(
+        cursor=cursor,
+        full=full,
+        lists=[ListResponse.model_validate(todo_list) for todo_list in lists],
+        todos=[todo_to_response(todo) for todo in todos],
+        deleted_lists=deleted[TOMBSTONE_LIST],
+        deleted_todos=deleted[TOMBSTONE_TODO],
+    )
+
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+@router.get("/teams/{team_id}/bundle", response_model=TeamBundleResponse)
+async def get_team_bundle(
+    team_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Team, members, lists and todos in one response, for a client's cold start.
+
+    Built with a fixed four queries whatever the team's size (team and
+    membership, members, lists, todos with their assignees). Conditional on
+    If-None-Match like the other team reads, and gzipped when the client
+    accepts it and the body is at least BUNDLE_GZIP_MIN_BYTES. Follow up with
+    /changes?since={cursor}.
+    """
+    team = await get_member_team_or_404(team_id, current_user.id, db)
+    etag = team_etag("bundle", team_id, team)
+    if if_none_match(request, etag):
+        return not_modified(etag)
+
+    result = await db.execute(
+        select(TeamMember.joined_at, User.id, User.username)
+        .join(User, User.id == TeamMember.user_id)
+        .where(TeamMember.team_id == team_id)
+        .order_by(TeamMember.id)
+    )
+    members = [
+        MemberResponse(id=user_id, username=username, joined_at=joined_at)
+        for joined_at, user_id, username in result.all()
+    ]
+
+    result = await db.execute(
+        select(TodoList).where(TodoList.team_id == team_id).order_by(TodoList.id)
+    )
+    lists = result.scalars().all()
+
+    result = await db.execute(
+        select(TodoItem, User.username)
+        .join(TodoList, TodoList.id == TodoItem.list_id)
+        .outerjoin(User, User.id == TodoItem.assigned_to)
+        .where(TodoList.team_id == team_id)
+        .order_by(TodoItem.list_id, TodoItem.created_at.desc(), TodoItem.id.desc())
+    )
+    rows = result.all()
+    usernames = {todo.assigned_to: username for todo, username in rows if username is not None}
+
+    bundle = TeamBundleResponse(
+        team=TeamWithMembers(
+            id=team.id,
+            name=team.name,
+            invite_code=team.invite_code,
+            created_at=team.created_at,
+            todo_count=team.todo_count,
+            completed_count=team.completed_count,
+            members=members
+        ),
+        lists=[ListResponse.model_validate(todo_list) for todo_list in lists],
+        todos=[todo_to_response(todo, usernames) for todo, _ in rows],
+        cursor=team.change_seq
+    )
+
+    body = bundle.model_dump_json().encode()
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if len(body) >= BUNDLE_GZIP_MIN_BYTES and accepts_gzip(request):
+        body = gzip.compress(body)
+        headers["Content-Encoding"] = "gzip"
+    return Response(body, media_type="application/json", headers=headers)
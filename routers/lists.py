@@ -1,21 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_
+from sqlalchemy.orm import contains_eager
 from database import get_db
 from models import User, TodoList, TeamMember
-from schemas import ListCreate, ListResponse, ListUpdate
+from schemas import ListCreate, ListResponse, ListUpdate, ListSummary, TeamSummaryResponse
 from auth import get_current_user
-from routers.teams import verify_team_member
+from routers.teams import get_member_team_or_404, verify_team_member
+from changes import next_change_seq, stamp, add_tombstone, TOMBSTONE_LIST
+from pagination import PageParams, paginate
+from conditional import team_etag, check_etag
+from counters import count_overdue, removed_list_counter_values
 from typing import List
 
 router = APIRouter(tags=["lists"])
 
-async def get_list_or_404(list_id: int, db: AsyncSession) -> TodoList:
-    result = await db.execute(select(TodoList).where(TodoList.id == list_id))
-    todo_list = result.scalar_one_or_none()
-    if not todo_list:
+async def get_member_list_or_404(list_id: int, user_id: int, db: AsyncSession) -> TodoList:
+    """
+    Load a list and check the user is in its team, in one query (404, then 403).
+
+    The list's team is loaded with it (todo_list.team).
+    """
+    result = await db.execute(
+        select(TodoList, TeamMember.id)
+        .join(TodoList.team)
+        .options(contains_eager(TodoList.team))
+        .outerjoin(TeamMember, and_(
+            TeamMember.team_id == TodoList.team_id,
+            TeamMember.user_id == user_id
+        ))
+        .where(TodoList.id == list_id)
+    )
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="List not found")
-    return todo_list
+    if row[1] is None:
+        raise HTTPException(status_code=403, detail="Not a team member")
+    return row[0]
 
 @router.post("/teams/{team_id}/lists", response_model=ListResponse)
 async def create_list(
@@ -27,6 +48,7 @@ async def create_list(
     await verify_team_member(current_user.id, team_id, db)
 
     todo_list = TodoList(name=list_data.name, team_id=team_id)
+    stamp(todo_list, await next_change_seq(db, team_id))
     db.add(todo_list)
     await db.commit()
     await db.refresh(todo_list)
@@ -35,15 +57,25 @@ async def create_list(
 @router.get("/teams/{team_id}/lists", response_model=List[ListResponse])
 async def get_team_lists(
     team_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    await verify_team_member(current_user.id, team_id, db)
+    """Lists of a team; paginated, and conditional on If-None-Match."""
+    team = await get_member_team_or_404(team_id, current_user.id, db)
+    not_modified = check_etag(request, response, team_etag("lists", team_id, team))
+    if not_modified:
+        return not_modified
 
-    result = await db.execute(
-        select(TodoList).where(TodoList.team_id == team_id)
+    return await paginate(
+        db,
+        select(TodoList).where(TodoList.team_id == team_id),
+        (TodoList.id,),
+        page,
+        response
     )
-    return result.scalars().all()
 
 @router.put("/lists/{list_id}", response_model=ListResponse)
 async def update_list(
@@ -52,10 +84,10 @@ async def update_list(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo_list = await get_list_or_404(list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
+    todo_list = await get_member_list_or_404(list_id, current_user.id, db)
 
     todo_list.name = list_data.name
+    stamp(todo_list, await next_change_seq(db, todo_list.team_id))
     await db.commit()
     await db.refresh(todo_list)
     return todo_list
@@ -66,8 +98,47 @@ async def delete_list(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo_list = await get_list_or_404(list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
+    todo_list = await get_member_list_or_404(list_id, current_user.id, db)
 
+    seq = await next_change_seq(db, todo_list.team_id, **removed_list_counter_values(todo_list.id))
+    add_tombstone(db, todo_list.team_id, TOMBSTONE_LIST, todo_list.id, seq)
     await db.delete(todo_list)
     await db.commit()
+
+@router.get("/teams/{team_id}/summary", response_model=TeamSummaryResponse)
+async def get_team_summary(
+    team_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Todo, completed and overdue counts per list and for the whole team.
+
+    Reads the stored counters (one row per list); only overdue, which
+    depends on the clock, is counted from the todos (see counters.py).
+    """
+    team = await get_member_team_or_404(team_id, current_user.id, db)
+
+    result = await db.execute(
+        select(TodoList.id, TodoList.name, TodoList.todo_count, TodoList.completed_count)
+        .where(TodoList.team_id == team_id)
+        .order_by(TodoList.id)
+    )
+    rows = result.all()
+    overdue = await count_overdue(db, [row.id for row in rows]) if rows else {}
+
+    return TeamSummaryResponse(
+        todo_count=team.todo_count,
+        completed_count=team.completed_count,
+        overdue_count=sum(overdue.values()),
+        lists=[
+            ListSummary(
+                id=row.id,
+                name=row.name,
+                todo_count=row.todo_count,
+                completed_count=row.completed_count,
+                overdue_count=overdue.get(row.id, 0)
+            )
+            for row in rows
+        ]
+    )
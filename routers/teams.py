@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, and_
 from sqlalchemy.orm import selectinload
 from database import get_db
 from models import User, Team, TeamMember
 from schemas import TeamCreate, TeamResponse, TeamWithMembers, JoinTeam, MemberResponse
 from auth import get_current_user
+from ws_auth import handshake_cache
+from websocket import manager
+from pagination import PageParams, paginate
+from changes import next_change_seq
+from conditional import team_etag, check_etag
 from typing import List
 
 router = APIRouter(prefix="/teams", tags=["teams"])
@@ -17,6 +22,23 @@ async def get_team_or_404(team_id: int, db: AsyncSession) -> Team:
         raise HTTPException(status_code=404, detail="Team not found")
     return team
 
+async def get_member_team_or_404(team_id: int, user_id: int, db: AsyncSession) -> Team:
+    """Load a team and check the user is a member, in one query (404, then 403)."""
+    result = await db.execute(
+        select(Team, TeamMember.id)
+        .outerjoin(TeamMember, and_(
+            TeamMember.team_id == Team.id,
+            TeamMember.user_id == user_id
+        ))
+        .where(Team.id == team_id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Team not found")
+    if row[1] is None:
+        raise HTTPException(status_code=403, detail="Not a team member")
+    return row[0]
+
 async def verify_team_member(user_id: int, team_id: int, db: AsyncSession):
     result = await db.execute(
         select(TeamMember).where(
@@ -41,38 +63,47 @@ async def create_team(
     member = TeamMember(user_id=current_user.id, team_id=team.id)
     db.add(member)
     await db.commit()
+    # Team ids can be reused; drop any "not a member" cached for the id
+    handshake_cache.invalidate_team(team.id)
     await db.refresh(team)
     return team
 
 @router.get("", response_model=List[TeamResponse])
 async def list_my_teams(
+    response: Response,
+    page: PageParams = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
+    return await paginate(
+        db,
         select(Team)
         .join(TeamMember)
-        .where(TeamMember.user_id == current_user.id)
+        .where(TeamMember.user_id == current_user.id),
+        (Team.id,),
+        page,
+        response
     )
-    return result.scalars().all()
 
 @router.get("/{team_id}", response_model=TeamWithMembers)
 async def get_team(
     team_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    # Check team exists first, then membership
+    """Team with its members; conditional on If-None-Match (see conditional.py)."""
+    team = await get_member_team_or_404(team_id, current_user.id, db)
+    not_modified = check_etag(request, response, team_etag("team", team.id, team))
+    if not_modified:
+        return not_modified
+
     result = await db.execute(
-        select(Team)
-        .options(selectinload(Team.members).selectinload(TeamMember.user))
-        .where(Team.id == team_id)
+        select(TeamMember)
+        .options(selectinload(TeamMember.user))
+        .where(TeamMember.team_id == team_id)
     )
-    team = result.scalar_one_or_none()
-    if not team:
-        raise HTTPException(status_code=404, detail="Team not found")
-
-    await verify_team_member(current_user.id, team_id, db)
 
     # Transform to response
     members = [
@@ -80,7 +111,7 @@ async def get_team(
             id=m.user.id,
             username=m.user.username,
             joined_at=m.joined_at
-        ) for m in team.members
+        ) for m in result.scalars().all()
     ]
 
     return TeamWithMembers(
@@ -88,6 +119,8 @@ async def get_team(
         name=team.name,
         invite_code=team.invite_code,
         created_at=team.created_at,
+        todo_count=team.todo_count,
+        completed_count=team.completed_count,
         members=members
     )
 
@@ -116,7 +149,10 @@ async def join_team(
 
     member = TeamMember(user_id=current_user.id, team_id=team.id)
     db.add(member)
+    # The member list changed: move the team's version (and ETag) on
+    await next_change_seq(db, team.id)
     await db.commit()
+    handshake_cache.invalidate_membership(current_user.id, team.id)
     return team
 
 @router.delete("/{team_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -129,3 +165,5 @@ async def delete_team(
     team = await get_team_or_404(team_id, db)
     await db.delete(team)
     await db.commit()
+    handshake_cache.invalidate_team(team_id)
+    manager.forget_team(team_id)
@@ -1,41 +1,118 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, delete, and_, not_
 from sqlalchemy.orm import selectinload
 from database import get_db
-from models import User, TodoItem, TodoList
-from schemas import TodoCreate, TodoResponse, TodoUpdate
+from models import User, TodoItem, TodoList, TeamMember
+from schemas import TodoCreate, TodoResponse, TodoUpdate, TodoBatchOperation, TodoBatchResult
 from auth import get_current_user
-from routers.teams import verify_team_member
-from routers.lists import get_list_or_404
-from typing import List
+from routers.lists import get_member_list_or_404
+from outbox import enqueue_team_event, outbox_dispatcher
+from changes import stamp, stamp_values, add_tombstone, TOMBSTONE_TODO
+from counters import Delta, completed_delta, next_change_seq_with_counters, toggled_delta
+from pagination import PageParams, paginate
+from conditional import team_etag, check_etag
+from config import TODO_BATCH_MAX_OPERATIONS
+from typing import Any, Dict, List, Optional, Tuple
 
 router = APIRouter(tags=["todos"])
 
-async def get_todo_or_404(todo_id: int, db: AsyncSession) -> TodoItem:
+async def get_member_todo_or_404(todo_id: int, user_id: int, db: AsyncSession) -> Tuple[int, int]:
+    """
+    Check a todo exists and the user is in its team, in one query (404, then 403).
+
+    Returns:
+        (list_id, team_id) of the todo
+    """
     result = await db.execute(
-        select(TodoItem)
-        .options(selectinload(TodoItem.assignee))
+        select(TodoItem.list_id, TodoList.team_id, TeamMember.id)
+        .join(TodoList, TodoList.id == TodoItem.list_id)
+        .outerjoin(TeamMember, and_(
+            TeamMember.team_id == TodoList.team_id,
+            TeamMember.user_id == user_id
+        ))
         .where(TodoItem.id == todo_id)
     )
-    todo = result.scalar_one_or_none()
-    if not todo:
+    row = result.first()
+    if not row:
         raise HTTPException(status_code=404, detail="Todo not found")
-    return todo
+    if row.id is None:
+        raise HTTPException(status_code=403, detail="Not a team member")
+    return row.list_id, row.team_id
 
-def todo_to_response(todo: TodoItem) -> TodoResponse:
+def todo_to_response(todo: TodoItem, usernames: Optional[Dict[int, str]] = None) -> TodoResponse:
+    """Response for a todo; usernames (user id -> username) stands in for an unloaded assignee."""
+    if usernames is None:
+        assignee_username = todo.assignee.username if todo.assignee else None
+    else:
+        assignee_username = usernames.get(todo.assigned_to)
     return TodoResponse(
         id=todo.id,
         title=todo.title,
         description=todo.description,
         completed=todo.completed,
         assigned_to=todo.assigned_to,
-        assignee_username=todo.assignee.username if todo.assignee else None,
+        assignee_username=assignee_username,
         due_date=todo.due_date,
         list_id=todo.list_id,
-        created_at=todo.created_at
+        created_at=todo.created_at,
+        updated_at=todo.updated_at,
+        change_seq=todo.change_seq
     )
 
+async def commit_with_event(db: AsyncSession, team_id: int, event: str, todo: TodoItem, todos: Delta = 0) -> TodoResponse:
+    """
+    Commit a todo change together with its change cursor, counters (todos is
+    the todo_count delta) and team event; returns the response.
+    """
+    stamp(todo, await next_change_seq_with_counters(db, team_id, todo.list_id, todos=todos))
+    await db.flush()
+    # assigned_to may have changed; load the matching assignee
+    await db.refresh(todo, ["assignee"])
+    response = todo_to_response(todo)
+    enqueue_team_event(db, team_id, event, response.model_dump(mode="json"))
+    await db.commit()
+    outbox_dispatcher.notify()
+    return response
+
+async def update_with_event(
+    db: AsyncSession,
+    team_id: int,
+    list_id: int,
+    todo_id: int,
+    values: Dict[str, Any],
+    completed: Delta = 0
+) -> TodoResponse:
+    """
+    UPDATE a todo and commit it with its change cursor and todo_updated event.
+
+    completed is the change to the completed counters (see counters.py). The
+    response is built from UPDATE ... RETURNING (assignee username included)
+    rather than reloading the todo.
+    """
+    seq = await next_change_seq_with_counters(db, team_id, list_id, completed=completed)
+    assignee_username = (
+        select(User.username)
+        .where(User.id == TodoItem.assigned_to)
+        .correlate(TodoItem)
+        .scalar_subquery()
+    )
+    result = await db.execute(
+        update(TodoItem)
+        .where(TodoItem.id == todo_id)
+        .values(**values, **stamp_values(seq))
+        .returning(*TodoItem.__table__.columns, assignee_username.label("assignee_username"))
+    )
+    row = result.first()
+    if not row:
+        # Deleted since it was authorized
+        raise HTTPException(status_code=404, detail="Todo not found")
+    response = TodoResponse(**row._mapping)
+    enqueue_team_event(db, team_id, "todo_updated", response.model_dump(mode="json"))
+    await db.commit()
+    outbox_dispatcher.notify()
+    return response
+
 @router.post("/lists/{list_id}/todos", response_model=TodoResponse)
 async def create_todo(
     list_id: int,
@@ -43,8 +120,7 @@ async def create_todo(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo_list = await get_list_or_404(list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
+    todo_list = await get_member_list_or_404(list_id, current_user.id, db)
 
     todo = TodoItem(
         list_id=list_id,
@@ -54,28 +130,33 @@ async def create_todo(
         due_date=todo_data.due_date
     )
     db.add(todo)
-    await db.commit()
-
-    # Reload with relationships
-    todo = await get_todo_or_404(todo.id, db)
-    return todo_to_response(todo)
+    return await commit_with_event(db, todo_list.team_id, "todo_created", todo, todos=1)
 
 @router.get("/lists/{list_id}/todos", response_model=List[TodoResponse])
 async def get_list_todos(
     list_id: int,
+    request: Request,
+    response: Response,
+    page: PageParams = Depends(),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo_list = await get_list_or_404(list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
+    """Todos of a list, newest first; paginated, and conditional on If-None-Match."""
+    todo_list = await get_member_list_or_404(list_id, current_user.id, db)
+    not_modified = check_etag(request, response, team_etag("todos", list_id, todo_list.team))
+    if not_modified:
+        return not_modified
 
-    result = await db.execute(
+    todos = await paginate(
+        db,
         select(TodoItem)
         .options(selectinload(TodoItem.assignee))
-        .where(TodoItem.list_id == list_id)
-        .order_by(TodoItem.created_at.desc())
+        .where(TodoItem.list_id == list_id),
+        (TodoItem.created_at, TodoItem.id),
+        page,
+        response,
+        descending=True
     )
-    todos = result.scalars().all()
     return [todo_to_response(t) for t in todos]
 
 @router.put("/todos/{todo_id}", response_model=TodoResponse)
@@ -85,17 +166,10 @@ async def update_todo(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo = await get_todo_or_404(todo_id, db)
-    todo_list = await get_list_or_404(todo.list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
-
-    update_data = todo_data.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(todo, field, value)
-
-    await db.commit()
-    todo = await get_todo_or_404(todo_id, db)
-    return todo_to_response(todo)
+    list_id, team_id = await get_member_todo_or_404(todo_id, current_user.id, db)
+    values = todo_data.model_dump(exclude_unset=True)
+    completed = completed_delta(todo_id, bool(values["completed"])) if "completed" in values else 0
+    return await update_with_event(db, team_id, list_id, todo_id, values, completed)
 
 @router.patch("/todos/{todo_id}/toggle", response_model=TodoResponse)
 async def toggle_todo(
@@ -103,14 +177,10 @@ async def toggle_todo(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo = await get_todo_or_404(todo_id, db)
-    todo_list = await get_list_or_404(todo.list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
-
-    todo.completed = not todo.completed
-    await db.commit()
-    todo = await get_todo_or_404(todo_id, db)
-    return todo_to_response(todo)
+    list_id, team_id = await get_member_todo_or_404(todo_id, current_user.id, db)
+    return await update_with_event(
+        db, team_id, list_id, todo_id, {"completed": not_(TodoItem.completed)}, toggled_delta(todo_id)
+    )
 
 @router.delete("/todos/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_todo(
@@ -118,9 +188,124 @@ async def delete_todo(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    todo = await get_todo_or_404(todo_id, db)
-    todo_list = await get_list_or_404(todo.list_id, db)
-    await verify_team_member(current_user.id, todo_list.team_id, db)
+    list_id, team_id = await get_member_todo_or_404(todo_id, current_user.id, db)
 
-    await db.delete(todo)
+    seq = await next_change_seq_with_counters(
+        db, team_id, list_id, todos=-1, completed=completed_delta(todo_id, None)
+    )
+    add_tombstone(db, team_id, TOMBSTONE_TODO, todo_id, seq)
+    enqueue_team_event(db, team_id, "todo_deleted", {"id": todo_id, "list_id": list_id})
+    await db.execute(delete(TodoItem).where(TodoItem.id == todo_id))
     await db.commit()
+    outbox_dispatcher.notify()
+
+@router.post("/lists/{list_id}/todos:batch", response_model=List[TodoBatchResult])
+async def batch_todos(
+    list_id: int,
+    operations: List[TodoBatchOperation],
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Apply create/update/toggle/delete operations to a list's todos at once.
+
+    The list is authorized once, the targeted todos are loaded in one query,
+    and all writes go out in one flush and one commit under a single change
+    cursor. Operations apply in order; one naming a todo that isn't in the
+    list (or was deleted earlier in the batch) gets a 404 result without
+    failing the others. Returned todos show their state after the batch.
+    """
+    if len(operations) > TODO_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {TODO_BATCH_MAX_OPERATIONS} operations per batch"
+        )
+    todo_list = await get_member_list_or_404(list_id, current_user.id, db)
+
+    target_ids = {operation.id for operation in operations if operation.op != "create"}
+    result = await db.execute(
+        select(TodoItem).where(TodoItem.list_id == list_id, TodoItem.id.in_(target_ids))
+    )
+    todos = {todo.id: todo for todo in result.scalars().all()}
+    # For the list's and team's completed counters
+    was_completed = {todo.id: bool(todo.completed) for todo in todos.values()}
+
+    # (operation, todo or None if not found, status)
+    applied = []
+    created: List[TodoItem] = []
+    updated: Dict[int, TodoItem] = {}
+    deleted: List[TodoItem] = []
+    for operation in operations:
+        if operation.op == "create":
+            todo = TodoItem(list_id=list_id, **operation.todo.model_dump())
+            db.add(todo)
+            created.append(todo)
+            applied.append((operation, todo, status.HTTP_201_CREATED))
+            continue
+
+        todo = todos.get(operation.id)
+        if todo is None:
+            applied.append((operation, None, status.HTTP_404_NOT_FOUND))
+            continue
+
+        if operation.op == "delete":
+            del todos[todo.id]
+            updated.pop(todo.id, None)
+            deleted.append(todo)
+            applied.append((operation, todo, status.HTTP_204_NO_CONTENT))
+            continue
+
+        if operation.op == "update":
+            for field, value in operation.todo.model_dump(exclude_unset=True).items():
+                setattr(todo, field, value)
+        else:
+            todo.completed = not todo.completed
+        updated[todo.id] = todo
+        applied.append((operation, todo, status.HTTP_200_OK))
+
+    responses: Dict[TodoItem, TodoResponse] = {}
+    if created or updated or deleted:
+        team_id = todo_list.team_id
+        seq = await next_change_seq_with_counters(
+            db, team_id, list_id,
+            todos=len(created) - len(deleted),
+            completed=(
+                sum(bool(todo.completed) for todo in created)
+                + sum(bool(todo.completed) - was_completed[todo.id] for todo in updated.values())
+                - sum(was_completed[todo.id] for todo in deleted)
+            )
+        )
+        for todo in created + list(updated.values()):
+            stamp(todo, seq)
+        for todo in deleted:
+            add_tombstone(db, team_id, TOMBSTONE_TODO, todo.id, seq)
+            await db.delete(todo)
+        await db.flush()
+
+        live = created + list(updated.values())
+        assignee_ids = {todo.assigned_to for todo in live if todo.assigned_to is not None}
+        usernames = {}
+        if assignee_ids:
+            result = await db.execute(select(User.id, User.username).where(User.id.in_(assignee_ids)))
+            usernames = dict(result.all())
+        responses = {todo: todo_to_response(todo, usernames) for todo in live}
+
+        for todo in created:
+            enqueue_team_event(db, team_id, "todo_created", responses[todo].model_dump(mode="json"))
+        for todo in updated.values():
+            enqueue_team_event(db, team_id, "todo_updated", responses[todo].model_dump(mode="json"))
+        for todo in deleted:
+            enqueue_team_event(db, team_id, "todo_deleted", {"id": todo.id, "list_id": list_id})
+        await db.commit()
+        outbox_dispatcher.notify()
+
+    return [
+        TodoBatchResult(
+            op=operation.op,
+            id=operation.id if todo is None else todo.id,
+            status=code,
+            todo=responses.get(todo),
+            detail="Todo not found" if todo is None else None
+        )
+        for operation, todo, code in applied
+    ]
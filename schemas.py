@@ -1,7 +1,7 @@
 import re
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, field_validator, Field
-from typing import Optional, List
+from typing import Optional, List, Literal, Union, Annotated
 
 # Auth
 class UserCreate(BaseModel):
@@ -55,6 +55,8 @@ class TeamResponse(BaseModel):
     name: str
     invite_code: str
     created_at: datetime
+    todo_count: int = 0
+    completed_count: int = 0
 
     class Config:
         from_attributes = True
@@ -82,6 +84,10 @@ class ListResponse(BaseModel):
     name: str
     team_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    change_seq: int = 0
+    todo_count: int = 0
+    completed_count: int = 0
 
     class Config:
         from_attributes = True
@@ -89,6 +95,19 @@ class ListResponse(BaseModel):
 class ListUpdate(BaseModel):
     name: str
 
+class ListSummary(BaseModel):
+    id: int
+    name: str
+    todo_count: int
+    completed_count: int
+    overdue_count: int  # Open todos past their due date
+
+class TeamSummaryResponse(BaseModel):
+    todo_count: int
+    completed_count: int
+    overdue_count: int
+    lists: List[ListSummary]
+
 # Todos
 class TodoCreate(BaseModel):
     title: str
@@ -113,10 +132,58 @@ class TodoResponse(BaseModel):
     due_date: Optional[datetime]
     list_id: int
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    change_seq: int = 0
 
     class Config:
         from_attributes = True
 
+# Batch todo operations (POST /lists/{list_id}/todos:batch)
+class TodoBatchCreate(BaseModel):
+    op: Literal["create"]
+    todo: TodoCreate
+
+class TodoBatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    todo: TodoUpdate
+
+class TodoBatchToggle(BaseModel):
+    op: Literal["toggle"]
+    id: int
+
+class TodoBatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+TodoBatchOperation = Annotated[
+    Union[TodoBatchCreate, TodoBatchUpdate, TodoBatchToggle, TodoBatchDelete],
+    Field(discriminator="op")
+]
+
+class TodoBatchResult(BaseModel):
+    op: str
+    id: int
+    status: int  # HTTP status the single-item endpoint would have returned
+    todo: Optional[TodoResponse] = None  # State after the whole batch; None if deleted or failed
+    detail: Optional[str] = None
+
+# Delta sync
+class ChangesResponse(BaseModel):
+    cursor: int  # Pass as ?since= next time
+    full: bool  # True: lists/todos are the complete state, not a delta
+    lists: List[ListResponse]
+    todos: List[TodoResponse]
+    deleted_lists: List[int]  # Their todos are deleted too
+    deleted_todos: List[int]
+
+# Cold-start bundle (GET /teams/{team_id}/bundle)
+class TeamBundleResponse(BaseModel):
+    team: TeamWithMembers
+    lists: List[ListResponse]
+    todos: List[TodoResponse]
+    cursor: int  # Pass as ?since= to /changes to stay in sync
+
 # WebSocket events
 class WSEvent(BaseModel):
     event: str
@@ -127,6 +194,7 @@ class WSEvent(BaseModel):
 class BoardCreate(BaseModel):
     title: str = "Untitled Board"
     is_public: bool = False
+    layout: str = Field("single", pattern="^(single|paged)$")
 
 
 class BoardResponse(BaseModel):
@@ -134,6 +202,7 @@ class BoardResponse(BaseModel):
     owner_id: int
     title: str
     is_public: bool
+    layout: str = "single"
     created_at: datetime
 
     class Config:
@@ -156,6 +225,49 @@ class BoardPermissionResponse(BaseModel):
         from_attributes = True
 
 
+class SubdocResponse(BaseModel):
+    """A persisted subdocument of a paged board."""
+    subdoc_id: str
+    size: int
+    updated_at: datetime
+
+
+class BoardShapesResponse(BaseModel):
+    """Shapes intersecting a viewport of a board."""
+    board_id: str
+    bbox: List[float]
+    shapes: List[dict]
+
+
+class AdminRoomResponse(BaseModel):
+    """A live canvas room as seen by operators."""
+    board_id: str
+    subdoc_id: Optional[str]
+    clients: int
+    relay_clients: int
+    doc_bytes: int
+    dirty: bool
+    save_pending: bool
+    last_activity: datetime
+    updates_total: int
+    updates_per_second: float
+
+
+class AdminRoomActionResponse(BaseModel):
+    """Result of an admin action on a room."""
+    board_id: str
+    subdoc_id: Optional[str]
+    action: str
+    clients_disconnected: int = 0
+
+
+class AdminCounterRepairResponse(BaseModel):
+    """Result of rebuilding the todo counters."""
+    team_id: Optional[int]  # None: every team
+    lists: int  # Rows rewritten
+    teams: int
+
+
 class ShareLinkResponse(BaseModel):
     board_id: str
     url: str
@@ -108,3 +108,17 @@ async function api(path, options = {}) {
 
     return res;
 }
+
+// Fetch every page of a paginated list endpoint, following X-Next-Cursor
+async function fetchAllPages(url, options = {}) {
+    const items = [];
+    let cursor = null;
+    do {
+        const pageUrl = cursor ? `${url}${url.includes('?') ? '&' : '?'}cursor=${encodeURIComponent(cursor)}` : url;
+        const res = await fetch(pageUrl, options);
+        if (!res.ok) return res;
+        items.push(...await res.json());
+        cursor = res.headers.get('X-Next-Cursor');
+    } while (cursor);
+    return items;
+}
@@ -3,11 +3,15 @@ import pytest_asyncio
 from httpx import AsyncClient, ASGITransport
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.pool import StaticPool
+from sqlalchemy import text
+from unittest.mock import patch
 
 from main import app
 from database import Base, get_db
 from auth import hash_password, create_access_token
 from models import User
+from canvas import BoardPersistence, BoardRenderer, RoomManager
+import canvas.persistence
 
 # Use in-memory SQLite for tests
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -72,3 +76,33 @@ async def auth_headers(create_user):
         token = create_access_token(data={"sub": str(user.id)})
         return {"Authorization": f"Bearer {token}"}
     return _auth_headers
+
+@pytest_asyncio.fixture
+async def room_manager(test_db):
+    """RoomManager on the test database, installed on app.state."""
+    # board_states is managed by raw SQL (see canvas/persistence.py), not the ORM
+    async with test_db() as db:
+        await db.execute(text(
+            "CREATE TABLE IF NOT EXISTS board_states ("
+            "board_id VARCHAR(36) PRIMARY KEY, state BLOB NOT NULL, updated_at DATETIME NOT NULL)"
+        ))
+        await db.execute(text(
+            "CREATE TABLE IF NOT EXISTS board_subdoc_states ("
+            "board_id VARCHAR(36) NOT NULL, subdoc_id VARCHAR(64) NOT NULL, state BLOB NOT NULL, "
+            "updated_at DATETIME NOT NULL, PRIMARY KEY (board_id, subdoc_id))"
+        ))
+        await db.commit()
+
+    with patch.object(canvas.persistence, 'async_session', test_db):
+        manager = RoomManager(BoardPersistence(debounce_seconds=0.01))
+        app.state.room_manager = manager
+        yield manager
+        await manager.stop()
+
+@pytest.fixture
+def board_renderer():
+    """BoardRenderer with a single worker, installed on app.state."""
+    renderer = BoardRenderer(max_workers=1)
+    app.state.board_renderer = renderer
+    yield renderer
+    renderer.close()
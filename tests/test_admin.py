@@ -0,0 +1,112 @@
+"""
+Tests for the admin room introspection API.
+"""
+import pytest
+from httpx import AsyncClient
+from pycrdt import Array, Doc
+from sqlalchemy import update
+
+from auth import create_access_token
+from models import User
+
+
+class FakeSocket:
+    def __init__(self):
+        self.closed_with = None
+
+    async def send_bytes(self, data: bytes):
+        pass
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+@pytest.fixture
+def admin_headers(test_db, create_user):
+    async def _admin_headers() -> dict:
+        user = await create_user("opsadmin", "opsadmin@test.com", "password123")
+        async with test_db() as db:
+            await db.execute(update(User).where(User.id == user.id).values(is_admin=True))
+            await db.commit()
+        return {"Authorization": f"Bearer {create_access_token(data={'sub': str(user.id)})}"}
+    return _admin_headers
+
+
+async def edit(room_manager, board_id: str, source):
+    """Apply a one-shape update through the manager like a client would."""
+    doc = Doc()
+    captured = []
+    doc.observe(lambda event: captured.append(event.update))
+    doc.get("tldraw", type=Array).append({"key": "shape:a", "val": {"id": "shape:a"}})
+    await room_manager.apply_update(board_id, captured[0], source)
+
+
+class TestAdminRooms:
+    async def test_requires_admin(self, client: AsyncClient, auth_headers, room_manager):
+        """Regular users are forbidden."""
+        headers = await auth_headers()
+        response = await client.get("/admin/rooms", headers=headers)
+        assert response.status_code == 403
+
+    async def test_list_rooms(self, client: AsyncClient, admin_headers, room_manager):
+        """Rooms are listed with cached counters."""
+        headers = await admin_headers()
+        socket = FakeSocket()
+        await room_manager.add_client("board-1", socket)
+        await edit(room_manager, "board-1", socket)
+
+        response = await client.get("/admin/rooms", headers=headers)
+        assert response.status_code == 200
+        [room] = response.json()
+        assert room["board_id"] == "board-1"
+        assert room["clients"] == 1
+        assert room["updates_total"] == 1
+        assert room["updates_per_second"] > 0
+        assert room["dirty"] is True
+        assert room["save_pending"] is True
+
+    async def test_flush_room(self, client: AsyncClient, admin_headers, room_manager):
+        """Flush saves immediately and clears the dirty flag."""
+        headers = await admin_headers()
+        socket = FakeSocket()
+        await room_manager.add_client("board-1", socket)
+        await edit(room_manager, "board-1", socket)
+
+        response = await client.post("/admin/rooms/board-1/flush", headers=headers)
+        assert response.status_code == 200
+
+        [room] = (await client.get("/admin/rooms", headers=headers)).json()
+        assert room["dirty"] is False
+        assert room["save_pending"] is False
+        assert room["doc_bytes"] > 0
+
+    async def test_disconnect_room(self, client: AsyncClient, admin_headers, room_manager):
+        """Disconnect closes every client but keeps the room loaded."""
+        headers = await admin_headers()
+        sockets = [FakeSocket(), FakeSocket()]
+        for socket in sockets:
+            await room_manager.add_client("board-1", socket)
+
+        response = await client.post("/admin/rooms/board-1/disconnect", headers=headers)
+        assert response.json()["clients_disconnected"] == 2
+        assert all(socket.closed_with == 1012 for socket in sockets)
+        assert room_manager.get_room("board-1").client_count == 0
+
+    async def test_unload_room(self, client: AsyncClient, admin_headers, room_manager):
+        """Unload saves the room and drops it from memory."""
+        headers = await admin_headers()
+        socket = FakeSocket()
+        await room_manager.add_client("board-1", socket)
+        await edit(room_manager, "board-1", socket)
+
+        response = await client.post("/admin/rooms/board-1/unload", headers=headers)
+        assert response.status_code == 200
+        assert socket.closed_with == 1012
+        assert room_manager.get_room("board-1") is None
+        assert await room_manager.persistence.load("board-1") is not None
+
+    async def test_action_on_unloaded_room(self, client: AsyncClient, admin_headers, room_manager):
+        """Actions on rooms that aren't loaded return 404."""
+        headers = await admin_headers()
+        response = await client.post("/admin/rooms/missing/flush", headers=headers)
+        assert response.status_code == 404
@@ -3,8 +3,27 @@ Integration tests for board endpoints.
 
 Tests CRUD operations, permission sharing, and access control.
 """
+from unittest.mock import patch
+
 import pytest
 from httpx import AsyncClient
+from pycrdt import Array
+
+
+async def board_with_shapes(client: AsyncClient, headers, room_manager):
+    """Create a board with a shape near the origin and one far away."""
+    response = await client.post("/boards", json={"title": "Shapes"}, headers=headers)
+    board_id = response.json()["id"]
+
+    room = await room_manager.get_or_create_room(board_id)
+    store = room.ydoc.get("tldraw", type=Array)
+    for shape_id, x in (("shape:near", 0), ("shape:far", 10000)):
+        store.append({"key": shape_id, "val": {
+            "id": shape_id, "typeName": "shape", "type": "geo",
+            "x": x, "y": 0, "rotation": 0, "index": "a1",
+            "parentId": "page:page", "props": {"w": 100, "h": 100},
+        }})
+    return board_id
 
 
 class TestBoardCRUD:
@@ -351,3 +370,201 @@ class TestPublicBoards:
         # Verify board is no longer public
         link_response = await client.get(f"/boards/{board_id}/link", headers=headers)
         assert link_response.json()["is_public"] is False
+
+
+class TestBoardShapes:
+    """Tests for viewport shape queries."""
+
+    async def test_query_shapes_in_bbox(self, client: AsyncClient, auth_headers, room_manager):
+        """Only shapes intersecting the bbox are returned."""
+        headers = await auth_headers()
+        board_id = await board_with_shapes(client, headers, room_manager)
+
+        response = await client.get(
+            f"/boards/{board_id}/shapes",
+            params={"bbox": "-50,-50,500,500"},
+            headers=headers
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert [s["id"] for s in data["shapes"]] == ["shape:near"]
+
+    async def test_query_shapes_invalid_bbox(self, client: AsyncClient, auth_headers, room_manager):
+        """Malformed bbox is rejected."""
+        headers = await auth_headers()
+        board_id = await board_with_shapes(client, headers, room_manager)
+
+        response = await client.get(
+            f"/boards/{board_id}/shapes",
+            params={"bbox": "1,2,3"},
+            headers=headers
+        )
+        assert response.status_code == 400
+
+    async def test_query_shapes_requires_access(self, client: AsyncClient, auth_headers, room_manager):
+        """Users without access cannot query shapes."""
+        owner_headers = await auth_headers("shapeowner", "shapeowner@test.com", "password123")
+        board_id = await board_with_shapes(client, owner_headers, room_manager)
+
+        other_headers = await auth_headers("shapeother", "shapeother@test.com", "password123")
+        response = await client.get(
+            f"/boards/{board_id}/shapes",
+            params={"bbox": "0,0,10,10"},
+            headers=other_headers
+        )
+        assert response.status_code == 403
+
+
+class TestBoardThumbnail:
+    """Tests for server-rendered board previews."""
+
+    async def test_svg_thumbnail(self, client: AsyncClient, auth_headers, room_manager, board_renderer):
+        """Board owner gets an SVG preview of the live document."""
+        headers = await auth_headers()
+        board_id = await board_with_shapes(client, headers, room_manager)
+
+        response = await client.get(f"/boards/{board_id}/thumbnail", params={"size": 200}, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("image/svg+xml")
+        assert response.text.startswith("<svg")
+
+    async def test_thumbnail_requires_access(self, client: AsyncClient, auth_headers, room_manager, board_renderer):
+        """Users without access cannot render a board."""
+        owner_headers = await auth_headers("thumbowner", "thumbowner@test.com", "password123")
+        board_id = await board_with_shapes(client, owner_headers, room_manager)
+
+        other_headers = await auth_headers("thumbother", "thumbother@test.com", "password123")
+        response = await client.get(f"/boards/{board_id}/thumbnail", headers=other_headers)
+        assert response.status_code == 403
+
+    async def test_thumbnail_unknown_page(self, client: AsyncClient, auth_headers, room_manager, board_renderer):
+        """Thumbnails of paged boards don't create rooms for arbitrary pages."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        for page, status_code in (("page:ghost", 404), ("page/../x", 400)):
+            response = await client.get(f"/boards/{board_id}/thumbnail", params={"page": page}, headers=headers)
+            assert response.status_code == status_code
+        assert room_manager.get_room(board_id, "page:ghost") is None
+
+
+class TestPagedBoards:
+    """Tests for the subdocument-per-page board layout."""
+
+    async def test_create_paged_board(self, client: AsyncClient, auth_headers):
+        """Boards can opt into the paged layout."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        assert response.status_code == 201
+        assert response.json()["layout"] == "paged"
+
+    async def test_invalid_layout_rejected(self, client: AsyncClient, auth_headers):
+        """Unknown layouts are rejected."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "tiled"}, headers=headers)
+        assert response.status_code == 422
+
+    async def test_subdocs_persist_independently(self, client: AsyncClient, auth_headers, room_manager):
+        """Each subdocument is its own room and its own persisted row."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        page1 = await room_manager.get_or_create_room(board_id, "page:1")
+        page2 = await room_manager.get_or_create_room(board_id, "page:2")
+        assert page1 is not page2
+        page1.ydoc.get("tldraw", type=Array).append({"key": "shape:a", "val": {
+            "id": "shape:a", "typeName": "shape", "x": 0, "y": 0,
+            "parentId": "page:1", "props": {"w": 10, "h": 10},
+        }})
+        await room_manager.persistence.save(board_id, page1.ydoc, "page:1")
+
+        response = await client.get(f"/boards/{board_id}/subdocs", headers=headers)
+        assert response.status_code == 200
+        assert [s["subdoc_id"] for s in response.json()] == ["page:1"]
+
+        response = await client.get(
+            f"/boards/{board_id}/shapes",
+            params={"bbox": "0,0,5,5", "page": "page:1"},
+            headers=headers
+        )
+        assert [s["id"] for s in response.json()["shapes"]] == ["shape:a"]
+
+    async def test_unknown_page_is_not_created(self, client: AsyncClient, auth_headers, room_manager):
+        """Shape queries don't create rooms or subdocuments for arbitrary pages."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        for page, status_code in (("page:ghost", 404), ("../../etc", 400), ("p" * 65, 400)):
+            response = await client.get(
+                f"/boards/{board_id}/shapes",
+                params={"bbox": "0,0,5,5", "page": page},
+                headers=headers
+            )
+            assert response.status_code == status_code
+        assert room_manager.get_room(board_id, "page:ghost") is None
+
+    async def test_unmodified_rooms_are_not_saved(self, client: AsyncClient, auth_headers, room_manager):
+        """Unloading a room nobody edited writes no state."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        await room_manager.get_or_create_room(board_id, "page:read")
+        assert await room_manager.unload_room(board_id, "page:read")
+
+        response = await client.get(f"/boards/{board_id}/subdocs", headers=headers)
+        assert response.json() == []
+
+    async def test_unload_forgets_saved_state(self, client: AsyncClient, auth_headers, room_manager):
+        """Per-document save bookkeeping doesn't outlive the room."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        room = await room_manager.get_or_create_room(board_id, "page:1")
+        await room_manager.persistence.save(board_id, room.ydoc, "page:1")
+        assert room_manager.persistence.encoded_at(board_id, "page:1") is not None
+        assert await room_manager.unload_room(board_id, "page:1")
+
+        assert room_manager.persistence.encoded_at(board_id, "page:1") is None
+        assert room_manager.persistence.saved_size(board_id, "page:1") == 0
+
+    async def test_reconnect_during_unload_keeps_room(self, client: AsyncClient, auth_headers, room_manager):
+        """A client rejoining while the final save runs keeps the room and its bookkeeping."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        room = await room_manager.get_or_create_room(board_id, "page:1")
+        room.record_update(1)
+        persistence = room_manager.persistence
+        save = persistence.save
+
+        class Rejoining:
+            async def send_bytes(self, data):
+                pass
+
+        async def save_then_rejoin(*args):
+            await save(*args)
+            rejoined = await room_manager.add_client(board_id, Rejoining(), "page:1")
+            assert rejoined is room
+
+        with patch.object(persistence, "save", save_then_rejoin):
+            await room_manager.unload_room(board_id, "page:1")
+
+        assert room_manager.get_room(board_id, "page:1") is room
+        assert persistence.encoded_at(board_id, "page:1") is not None
+
+    async def test_paged_shapes_require_page(self, client: AsyncClient, auth_headers, room_manager):
+        """Shape queries on paged boards must name a page."""
+        headers = await auth_headers()
+        response = await client.post("/boards", json={"layout": "paged"}, headers=headers)
+        board_id = response.json()["id"]
+
+        response = await client.get(
+            f"/boards/{board_id}/shapes", params={"bbox": "0,0,5,5"}, headers=headers
+        )
+        assert response.status_code == 400
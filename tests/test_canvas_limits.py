@@ -0,0 +1,71 @@
+"""
+Unit tests for per-connection canvas inbound limits.
+"""
+from unittest.mock import patch
+
+from canvas.limits import (
+    InboundLimiter, TokenBucket, CLOSE_FRAME_TOO_LARGE, CLOSE_RATE_LIMITED
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_burst_then_deficit(self):
+        clock = FakeClock()
+        with patch("canvas.limits.time.monotonic", clock):
+            bucket = TokenBucket(rate=10, capacity=5)
+            for _ in range(5):
+                assert bucket.consume(1) == 0.0
+            # Sixth token puts the bucket 1 token (0.1s) in deficit
+            assert bucket.consume(1) == 0.1
+
+    def test_refills_over_time(self):
+        clock = FakeClock()
+        with patch("canvas.limits.time.monotonic", clock):
+            bucket = TokenBucket(rate=10, capacity=5)
+            bucket.consume(5)
+            clock.now += 0.5
+            assert bucket.consume(5) == 0.0
+
+
+class TestInboundLimiter:
+    def _limiter(self):
+        return InboundLimiter(
+            max_frame_bytes=100,
+            messages_per_second=10,
+            bytes_per_second=1000,
+            burst_seconds=1,
+            max_throttle_seconds=0.5
+        )
+
+    def test_oversized_frame_closes(self):
+        limiter = self._limiter()
+        assert limiter.admit(101) == (CLOSE_FRAME_TOO_LARGE, 0.0)
+
+    def test_within_limits(self):
+        clock = FakeClock()
+        with patch("canvas.limits.time.monotonic", clock):
+            limiter = self._limiter()
+            assert limiter.admit(50) == (None, 0.0)
+
+    def test_throttles_then_closes(self):
+        clock = FakeClock()
+        with patch("canvas.limits.time.monotonic", clock):
+            limiter = self._limiter()
+            for _ in range(10):
+                limiter.admit(1)
+            code, delay = limiter.admit(1)
+            assert code is None
+            assert delay > 0
+
+            # Keep flooding without waiting: deficit grows past the throttle cap
+            for _ in range(5):
+                code, delay = limiter.admit(1)
+            assert code == CLOSE_RATE_LIMITED
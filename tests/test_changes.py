@@ -0,0 +1,113 @@
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.fixture
+async def team_with_list(client: AsyncClient, auth_headers):
+    """Create a team with one list; return (headers, team_id, list_id)."""
+    headers = await auth_headers("syncuser", "syncuser@test.com", "password")
+    team_id = (await client.post("/teams", json={"name": "Sync Team"}, headers=headers)).json()["id"]
+    list_id = (await client.post(f"/teams/{team_id}/lists", json={"name": "Sync List"}, headers=headers)).json()["id"]
+    return headers, team_id, list_id
+
+
+async def get_changes(client: AsyncClient, headers: dict, team_id: int, since: int = 0) -> dict:
+    response = await client.get(f"/teams/{team_id}/changes", params={"since": since}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestTeamChanges:
+    async def test_full_sync(self, client: AsyncClient, team_with_list):
+        headers, team_id, list_id = team_with_list
+        await client.post(f"/lists/{list_id}/todos", json={"title": "First"}, headers=headers)
+
+        data = await get_changes(client, headers, team_id)
+        assert data["full"] is True
+        assert [l["id"] for l in data["lists"]] == [list_id]
+        assert [t["title"] for t in data["todos"]] == ["First"]
+        assert data["cursor"] == data["todos"][0]["change_seq"]
+
+    async def test_delta_returns_only_changes(self, client: AsyncClient, team_with_list):
+        headers, team_id, list_id = team_with_list
+        await client.post(f"/lists/{list_id}/todos", json={"title": "Kept"}, headers=headers)
+        edited = (await client.post(f"/lists/{list_id}/todos", json={"title": "Edited"}, headers=headers)).json()
+        removed = (await client.post(f"/lists/{list_id}/todos", json={"title": "Removed"}, headers=headers)).json()
+        cursor = (await get_changes(client, headers, team_id))["cursor"]
+
+        await client.patch(f"/todos/{edited['id']}/toggle", headers=headers)
+        await client.delete(f"/todos/{removed['id']}", headers=headers)
+
+        data = await get_changes(client, headers, team_id, cursor)
+        assert data["full"] is False
+        assert data["lists"] == []
+        assert [t["id"] for t in data["todos"]] == [edited["id"]]
+        assert data["todos"][0]["completed"] is True
+        assert data["deleted_todos"] == [removed["id"]]
+        assert data["cursor"] == cursor + 2
+
+        # Nothing new since the latest cursor
+        data = await get_changes(client, headers, team_id, data["cursor"])
+        assert data["todos"] == [] and data["deleted_todos"] == []
+
+    async def test_deleted_list_tombstone(self, client: AsyncClient, team_with_list):
+        headers, team_id, list_id = team_with_list
+        cursor = (await get_changes(client, headers, team_id))["cursor"]
+        await client.delete(f"/lists/{list_id}", headers=headers)
+
+        data = await get_changes(client, headers, team_id, cursor)
+        assert data["deleted_lists"] == [list_id]
+
+    async def test_unknown_cursor_returns_full_state(self, client: AsyncClient, team_with_list):
+        headers, team_id, _ = team_with_list
+        data = await get_changes(client, headers, team_id, since=10_000)
+        assert data["full"] is True
+        assert len(data["lists"]) == 1
+
+    async def test_requires_membership(self, client: AsyncClient, team_with_list, auth_headers):
+        _, team_id, _ = team_with_list
+        other = await auth_headers("syncother", "syncother@test.com", "password")
+        response = await client.get(f"/teams/{team_id}/changes", headers=other)
+        assert response.status_code == 403
+
+
+class TestTeamBundle:
+    async def test_bundle_contents(self, client: AsyncClient, team_with_list, auth_headers):
+        headers, team_id, list_id = team_with_list
+        user_id = (await client.get("/auth/me", headers=headers)).json()["id"]
+        second = (await client.post(f"/teams/{team_id}/lists", json={"name": "Second"}, headers=headers)).json()["id"]
+        await client.post(f"/lists/{list_id}/todos", json={"title": "Old", "assigned_to": user_id}, headers=headers)
+        await client.post(f"/lists/{list_id}/todos", json={"title": "New"}, headers=headers)
+        await client.post(f"/lists/{second}/todos", json={"title": "Other"}, headers=headers)
+
+        response = await client.get(f"/teams/{team_id}/bundle", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["team"]["id"] == team_id
+        assert [m["username"] for m in data["team"]["members"]] == ["syncuser"]
+        assert [l["id"] for l in data["lists"]] == [list_id, second]
+        assert [t["title"] for t in data["todos"]] == ["New", "Old", "Other"]
+        assert data["todos"][1]["assignee_username"] == "syncuser"
+        assert data["cursor"] == (await get_changes(client, headers, team_id))["cursor"]
+
+    async def test_bundle_gzip_and_etag(self, client: AsyncClient, team_with_list):
+        headers, team_id, list_id = team_with_list
+        for i in range(20):
+            await client.post(f"/lists/{list_id}/todos", json={"title": f"Todo {i}"}, headers=headers)
+
+        response = await client.get(f"/teams/{team_id}/bundle", headers={**headers, "Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert len(response.json()["todos"]) == 20
+
+        response = await client.get(f"/teams/{team_id}/bundle", headers={**headers, "Accept-Encoding": "identity"})
+        assert "content-encoding" not in response.headers
+
+        etag = response.headers["etag"]
+        response = await client.get(f"/teams/{team_id}/bundle", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+
+    async def test_bundle_requires_membership(self, client: AsyncClient, team_with_list, auth_headers):
+        _, team_id, _ = team_with_list
+        other = await auth_headers("bundleother", "bundleother@test.com", "password")
+        response = await client.get(f"/teams/{team_id}/bundle", headers=other)
+        assert response.status_code == 403
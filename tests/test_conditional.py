@@ -0,0 +1,67 @@
+"""
+Tests for ETag / If-None-Match on polled read endpoints.
+"""
+import pytest
+from httpx import AsyncClient
+
+
+@pytest.fixture
+async def team_with_list(client: AsyncClient, auth_headers):
+    headers = await auth_headers("etaguser", "etaguser@test.com", "password")
+    team = (await client.post("/teams", json={"name": "ETags"}, headers=headers)).json()
+    list_id = (await client.post(f"/teams/{team['id']}/lists", json={"name": "Polled"}, headers=headers)).json()["id"]
+    return headers, team, list_id
+
+
+async def revalidate(client: AsyncClient, url: str, headers: dict, if_none_match: str) -> int:
+    response = await client.get(url, headers={**headers, "If-None-Match": if_none_match})
+    if response.status_code == 304:
+        assert response.content == b""
+        assert response.headers["etag"] in if_none_match
+    return response.status_code
+
+
+class TestConditionalGet:
+    async def test_unchanged_resources_not_modified(self, client: AsyncClient, team_with_list):
+        headers, team, list_id = team_with_list
+        for url in (f"/teams/{team['id']}", f"/teams/{team['id']}/lists", f"/lists/{list_id}/todos"):
+            response = await client.get(url, headers=headers)
+            assert response.status_code == 200
+            etag = response.headers["etag"]
+            assert etag.startswith('W/"')
+            assert await revalidate(client, url, headers, etag) == 304
+            assert await revalidate(client, url, headers, f'"other", {etag}') == 304
+            assert await revalidate(client, url, headers, 'W/"stale"') == 200
+
+    async def test_todo_changes_move_etag(self, client: AsyncClient, team_with_list):
+        headers, _, list_id = team_with_list
+        url = f"/lists/{list_id}/todos"
+        etag = (await client.get(url, headers=headers)).headers["etag"]
+
+        todo = (await client.post(url, json={"title": "New"}, headers=headers)).json()
+        assert await revalidate(client, url, headers, etag) == 200
+        etag = (await client.get(url, headers=headers)).headers["etag"]
+
+        await client.patch(f"/todos/{todo['id']}/toggle", headers=headers)
+        assert await revalidate(client, url, headers, etag) == 200
+
+    async def test_join_moves_team_etag(self, client: AsyncClient, team_with_list, auth_headers):
+        headers, team, _ = team_with_list
+        url = f"/teams/{team['id']}"
+        etag = (await client.get(url, headers=headers)).headers["etag"]
+
+        joiner = await auth_headers("etagjoiner", "etagjoiner@test.com", "password")
+        await client.post("/teams/join", json={"invite_code": team["invite_code"]}, headers=joiner)
+
+        response = await client.get(url, headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json()["members"]) == 2
+
+    async def test_etag_does_not_bypass_membership(self, client: AsyncClient, team_with_list, auth_headers):
+        headers, team, _ = team_with_list
+        url = f"/teams/{team['id']}/lists"
+        etag = (await client.get(url, headers=headers)).headers["etag"]
+
+        other = await auth_headers("etagother", "etagother@test.com", "password")
+        response = await client.get(url, headers={**other, "If-None-Match": etag})
+        assert response.status_code == 403
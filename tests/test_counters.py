@@ -0,0 +1,108 @@
+"""
+Tests for denormalized todo counters on lists and teams.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import update
+
+from models import TodoList, User
+
+
+@pytest.fixture
+async def team_list(client: AsyncClient, auth_headers):
+    headers = await auth_headers("counter", "counter@test.com", "password")
+    team_id = (await client.post("/teams", json={"name": "Counted"}, headers=headers)).json()["id"]
+    list_id = (await client.post(f"/teams/{team_id}/lists", json={"name": "Tally"}, headers=headers)).json()["id"]
+    return headers, team_id, list_id
+
+
+async def counts(client: AsyncClient, headers: dict, team_id: int) -> tuple:
+    """((team todos, completed, overdue), {list_id: (todos, completed, overdue)})"""
+    summary = (await client.get(f"/teams/{team_id}/summary", headers=headers)).json()
+    return (
+        (summary["todo_count"], summary["completed_count"], summary["overdue_count"]),
+        {l["id"]: (l["todo_count"], l["completed_count"], l["overdue_count"]) for l in summary["lists"]}
+    )
+
+
+class TestTodoCounters:
+    async def test_single_todo_writes(self, client: AsyncClient, team_list):
+        headers, team_id, list_id = team_list
+        first = (await client.post(f"/lists/{list_id}/todos", json={"title": "One"}, headers=headers)).json()
+        second = (await client.post(f"/lists/{list_id}/todos", json={"title": "Two"}, headers=headers)).json()
+        assert await counts(client, headers, team_id) == ((2, 0, 0), {list_id: (2, 0, 0)})
+
+        await client.patch(f"/todos/{first['id']}/toggle", headers=headers)
+        # Setting completed to its current value changes nothing
+        await client.put(f"/todos/{first['id']}", json={"completed": True}, headers=headers)
+        await client.put(f"/todos/{second['id']}", json={"completed": True}, headers=headers)
+        assert await counts(client, headers, team_id) == ((2, 2, 0), {list_id: (2, 2, 0)})
+
+        await client.patch(f"/todos/{second['id']}/toggle", headers=headers)
+        await client.delete(f"/todos/{first['id']}", headers=headers)
+        assert await counts(client, headers, team_id) == ((1, 0, 0), {list_id: (1, 0, 0)})
+
+        lists = (await client.get(f"/teams/{team_id}/lists", headers=headers)).json()
+        assert (lists[0]["todo_count"], lists[0]["completed_count"]) == (1, 0)
+
+    async def test_batch_and_list_delete(self, client: AsyncClient, team_list):
+        headers, team_id, list_id = team_list
+        other = (await client.post(f"/teams/{team_id}/lists", json={"name": "Other"}, headers=headers)).json()["id"]
+        await client.post(f"/lists/{other}/todos", json={"title": "Elsewhere"}, headers=headers)
+        done = (await client.post(f"/lists/{list_id}/todos", json={"title": "Done"}, headers=headers)).json()
+        await client.patch(f"/todos/{done['id']}/toggle", headers=headers)
+        open_todo = (await client.post(f"/lists/{list_id}/todos", json={"title": "Open"}, headers=headers)).json()
+
+        await client.post(f"/lists/{list_id}/todos:batch", json=[
+            {"op": "create", "todo": {"title": "New"}},
+            {"op": "toggle", "id": open_todo["id"]},
+            {"op": "delete", "id": done["id"]},
+        ], headers=headers)
+        assert await counts(client, headers, team_id) == (
+            (3, 1, 0), {list_id: (2, 1, 0), other: (1, 0, 0)}
+        )
+
+        await client.delete(f"/lists/{list_id}", headers=headers)
+        assert await counts(client, headers, team_id) == ((1, 0, 0), {other: (1, 0, 0)})
+        team = (await client.get(f"/teams/{team_id}", headers=headers)).json()
+        assert (team["todo_count"], team["completed_count"]) == (1, 0)
+
+    async def test_overdue_counted_by_query(self, client: AsyncClient, team_list):
+        headers, team_id, list_id = team_list
+        past = (datetime.utcnow() - timedelta(days=1)).isoformat()
+        future = (datetime.utcnow() + timedelta(days=1)).isoformat()
+        await client.post(f"/lists/{list_id}/todos", json={"title": "Late", "due_date": past}, headers=headers)
+        await client.post(f"/lists/{list_id}/todos", json={"title": "Later", "due_date": future}, headers=headers)
+        finished = (await client.post(f"/lists/{list_id}/todos", json={"title": "Finished", "due_date": past}, headers=headers)).json()
+        await client.patch(f"/todos/{finished['id']}/toggle", headers=headers)
+
+        assert await counts(client, headers, team_id) == ((3, 1, 1), {list_id: (3, 1, 1)})
+
+    async def test_summary_requires_membership(self, client: AsyncClient, team_list, auth_headers):
+        _, team_id, _ = team_list
+        other = await auth_headers("counterother", "counterother@test.com", "password")
+        response = await client.get(f"/teams/{team_id}/summary", headers=other)
+        assert response.status_code == 403
+
+
+class TestCounterRepair:
+    async def test_repair_rebuilds_counters(self, client: AsyncClient, team_list, test_db):
+        headers, team_id, list_id = team_list
+        todo = (await client.post(f"/lists/{list_id}/todos", json={"title": "Real"}, headers=headers)).json()
+        await client.patch(f"/todos/{todo['id']}/toggle", headers=headers)
+        async with test_db() as db:
+            await db.execute(update(TodoList).where(TodoList.id == list_id).values(todo_count=7, completed_count=5))
+            await db.execute(update(User).where(User.username == "counter").values(is_admin=True))
+            await db.commit()
+
+        response = await client.post("/admin/counters/repair", params={"team_id": team_id}, headers=headers)
+        assert response.status_code == 200
+        assert response.json() == {"team_id": team_id, "lists": 1, "teams": 1}
+        assert await counts(client, headers, team_id) == ((1, 1, 0), {list_id: (1, 1, 0)})
+
+    async def test_repair_requires_admin(self, client: AsyncClient, team_list):
+        headers, _, _ = team_list
+        response = await client.post("/admin/counters/repair", headers=headers)
+        assert response.status_code == 403
@@ -0,0 +1,100 @@
+"""
+Unit tests for the WebSocket heartbeat scheduler.
+"""
+import asyncio
+
+from heartbeat import HeartbeatScheduler, TEXT_PING, EMPTY_UPDATE, HEARTBEAT_CLOSE_CODE
+
+
+class FakeSocket:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.sent: list = []
+        self.close_code = None
+
+    async def send_text(self, text: str):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(text)
+
+    async def send_bytes(self, data: bytes):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+class TestHeartbeatScheduler:
+    async def test_pings_with_each_sockets_frame(self):
+        scheduler = HeartbeatScheduler(interval=1, max_missed=2)
+        team, canvas = FakeSocket(), FakeSocket()
+        scheduler.watch(team, TEXT_PING, lambda: None)
+        scheduler.watch(canvas, EMPTY_UPDATE, lambda: None)
+
+        assert await scheduler.tick() == 0
+        assert team.sent == [TEXT_PING]
+        assert canvas.sent == [EMPTY_UPDATE]
+
+    async def test_silent_socket_reaped_after_max_missed(self):
+        scheduler = HeartbeatScheduler(interval=1, max_missed=2)
+        ws = FakeSocket()
+        dead = []
+        scheduler.watch(ws, TEXT_PING, lambda: dead.append(ws))
+
+        assert await scheduler.tick() == 0
+        assert await scheduler.tick() == 0
+        assert await scheduler.tick() == 1
+        await asyncio.sleep(0.01)
+
+        assert dead == [ws]
+        assert ws.close_code == HEARTBEAT_CLOSE_CODE
+        assert len(scheduler) == 0
+
+    async def test_beat_keeps_socket_alive(self):
+        scheduler = HeartbeatScheduler(interval=1, max_missed=1)
+        ws = FakeSocket()
+        scheduler.watch(ws, TEXT_PING, lambda: None)
+
+        for _ in range(5):
+            assert await scheduler.tick() == 0
+            scheduler.beat(ws)
+        assert len(ws.sent) == 5
+
+    async def test_failed_ping_reaps_immediately(self):
+        scheduler = HeartbeatScheduler(interval=1, max_missed=3)
+        ws = FakeSocket(fail=True)
+        released = asyncio.Event()
+
+        async def on_dead():
+            released.set()
+
+        scheduler.watch(ws, TEXT_PING, on_dead)
+        assert await scheduler.tick() == 1
+        await asyncio.sleep(0.01)
+        assert released.is_set()
+        assert ws.close_code == HEARTBEAT_CLOSE_CODE
+
+    async def test_failing_on_dead_does_not_stop_reaping(self):
+        scheduler = HeartbeatScheduler(interval=1, max_missed=3)
+        first, second = FakeSocket(fail=True), FakeSocket(fail=True)
+
+        def broken():
+            raise RuntimeError("cleanup failed")
+
+        scheduler.watch(first, TEXT_PING, broken)
+        scheduler.watch(second, TEXT_PING, broken)
+        assert await scheduler.tick() == 2
+        await asyncio.sleep(0.01)
+        assert first.close_code == second.close_code == HEARTBEAT_CLOSE_CODE
+        assert len(scheduler) == 0
+
+    async def test_unwatched_socket_not_pinged(self):
+        scheduler = HeartbeatScheduler(interval=1, max_missed=1)
+        ws = FakeSocket()
+        scheduler.watch(ws, TEXT_PING, lambda: None)
+        scheduler.unwatch(ws)
+
+        assert await scheduler.tick() == 0
+        assert ws.sent == []
@@ -0,0 +1,79 @@
+"""
+Tests for canvas metrics and the /metrics endpoint.
+"""
+from httpx import AsyncClient
+from pycrdt import Doc, Array
+
+from canvas.metrics import Counter, Histogram
+
+
+class TestMetricTypes:
+    def test_counter_render(self):
+        counter = Counter("test_total", "A test counter")
+        counter.inc()
+        counter.inc(2.5)
+        assert list(counter.render()) == [
+            "# HELP test_total A test counter",
+            "# TYPE test_total counter",
+            "test_total 3.5",
+        ]
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("test_seconds", "A test histogram", buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value)
+        lines = list(histogram.render())
+        assert 'test_seconds_bucket{le="0.1"} 1' in lines
+        assert 'test_seconds_bucket{le="1"} 3' in lines
+        assert 'test_seconds_bucket{le="+Inf"} 4' in lines
+        assert "test_seconds_count 4" in lines
+
+
+class TestMetricsEndpoint:
+    async def test_metrics_include_rooms(self, client: AsyncClient, room_manager, monkeypatch):
+        import main
+        monkeypatch.setattr(main, "METRICS_TOKEN", "s3cret")
+        room = await room_manager.get_or_create_room("board-metrics")
+        source = Doc()
+        source.get("tldraw", type=Array).append({"key": "shape:a", "val": {"id": "shape:a"}})
+
+        class Sink:
+            async def send_bytes(self, data):
+                pass
+
+        sink = Sink()
+        await room_manager.add_client("board-metrics", sink)
+        await room_manager.apply_update("board-metrics", source.get_update(), sink)
+
+        response = await client.get("http://test/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+
+    async def test_metrics_disabled_without_token(self, client: AsyncClient, monkeypatch):
+        import main
+        monkeypatch.setattr(main, "METRICS_TOKEN", None)
+
+        response = await client.get("http://test/metrics")
+        assert response.status_code == 404
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert "# TYPE canvas_updates_total counter" in body
+        assert "canvas_rooms 1" in body
+        assert f'canvas_room_updates_total{{board_id="board-metrics",subdoc=""}} 1' in body
+        assert room.updates_total == 1
+
+    async def test_metrics_token(self, client: AsyncClient, monkeypatch):
+        import main
+        monkeypatch.setattr(main, "METRICS_TOKEN", "s3cret")
+
+        response = await client.get("http://test/metrics")
+        assert response.status_code == 401
+
+        response = await client.get("http://test/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+
+    async def test_metrics_disabled_without_token(self, client: AsyncClient, monkeypatch):
+        import main
+        monkeypatch.setattr(main, "METRICS_TOKEN", None)
+
+        response = await client.get("http://test/metrics")
+        assert response.status_code == 404
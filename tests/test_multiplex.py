@@ -0,0 +1,197 @@
+"""
+Tests for the multiplexed /ws endpoint.
+
+Checks single-handshake auth, team and board channel subscriptions, and
+handle-prefixed binary routing of board updates.
+"""
+import uuid
+import pytest
+import pytest_asyncio
+from starlette.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+from pycrdt import Doc, Array
+
+import main
+import database
+import multiplex
+import websocket
+import ws_auth
+import canvas.persistence
+import canvas.websocket_handler
+from database import Base
+from auth import create_access_token
+from models import Board
+from tests.test_websocket import create_test_user, create_test_team, add_team_member, receive_presence
+
+
+@pytest_asyncio.fixture
+async def mux_test_db():
+    """Fresh database with every module's async_session patched."""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "CREATE TABLE board_states (board_id VARCHAR(36) PRIMARY KEY, "
+            "state BLOB NOT NULL, updated_at DATETIME NOT NULL)"
+        ))
+
+    session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ws_auth.handshake_cache.clear()
+    with patch.object(database, 'async_session', session_maker), \
+            patch.object(ws_auth, 'async_session', session_maker), \
+            patch.object(multiplex, 'async_session', session_maker), \
+            patch.object(canvas.persistence, 'async_session', session_maker), \
+            patch.object(canvas.websocket_handler, 'async_session', session_maker):
+        yield session_maker
+    ws_auth.handshake_cache.clear()
+
+    await engine.dispose()
+
+
+async def create_test_board(session_maker, owner_id: int) -> str:
+    async with session_maker() as db:
+        board = Board(id=str(uuid.uuid4()), owner_id=owner_id, title="Mux Board")
+        db.add(board)
+        await db.commit()
+        return board.id
+
+
+def make_update(shape_id: str) -> bytes:
+    doc = Doc()
+    doc.get("tldraw", type=Array).append({"key": shape_id, "val": {"id": shape_id}})
+    return doc.get_update()
+
+
+class TestMultiplexAuth:
+    async def test_invalid_token_rejected(self, mux_test_db):
+        with TestClient(main.app) as test_client:
+            with pytest.raises(Exception) as exc_info:
+                with test_client.websocket_connect("/ws?token=invalid"):
+                    pass
+            assert "4001" in str(exc_info.value)
+
+    async def test_team_subscription_requires_membership(self, mux_test_db):
+        owner = await create_test_user(mux_test_db, "muxowner", "muxowner@test.com", "password")
+        team = await create_test_team(mux_test_db, "Mux Team", owner.id)
+        outsider = await create_test_user(mux_test_db, "muxout", "muxout@test.com", "password")
+        token = create_access_token(data={"sub": str(outsider.id)})
+
+        with TestClient(main.app) as test_client:
+            with test_client.websocket_connect(f"/ws?token={token}") as ws:
+                ws.send_json({"action": "subscribe", "channel": f"team:{team.id}"})
+                data = ws.receive_json()
+                assert data["event"] == "error"
+                assert data["code"] == 4003
+
+    async def test_reconnect_served_from_handshake_cache(self, mux_test_db):
+        user = await create_test_user(mux_test_db, "muxcache", "muxcache@test.com", "password")
+        team = await create_test_team(mux_test_db, "Mux Cache", user.id)
+        token = create_access_token(data={"sub": str(user.id)})
+        channel = f"team:{team.id}"
+
+        def no_database():
+            raise AssertionError("handshake hit the database")
+
+        def subscribe(test_client):
+            with test_client.websocket_connect(f"/ws?token={token}") as ws:
+                ws.send_json({"action": "subscribe", "channel": channel})
+                assert ws.receive_json() == {"event": "subscribed", "channel": channel}
+
+        with TestClient(main.app) as test_client:
+            subscribe(test_client)
+            # Token and membership are cached by the first connect
+            with patch.object(ws_auth, 'async_session', no_database):
+                subscribe(test_client)
+
+
+class TestMultiplexChannels:
+    async def test_team_events_carry_channel(self, mux_test_db):
+        user1 = await create_test_user(mux_test_db, "mux1", "mux1@test.com", "password")
+        team = await create_test_team(mux_test_db, "Mux Events", user1.id)
+        user2 = await create_test_user(mux_test_db, "mux2", "mux2@test.com", "password")
+        await add_team_member(mux_test_db, user2.id, team.id)
+        channel = f"team:{team.id}"
+
+        with TestClient(main.app) as test_client:
+            with test_client.websocket_connect(f"/ws?token={create_access_token(data={'sub': str(user1.id)})}") as ws1:
+                ws1.send_json({"action": "subscribe", "channel": channel})
+                assert ws1.receive_json() == {"event": "subscribed", "channel": channel}
+                assert ws1.receive_json()["event"] == "online_users"
+
+                # Second user joins via the legacy per-team endpoint
+                token2 = create_access_token(data={"sub": str(user2.id)})
+                with test_client.websocket_connect(f"/ws/teams/{team.id}?token={token2}") as ws2:
+                    ws2.receive_json()
+                    data = receive_presence(ws1, "online", "mux2")
+                    assert data["channel"] == channel
+
+    async def test_board_updates_routed_by_handle(self, mux_test_db):
+        user = await create_test_user(mux_test_db, "muxboard", "muxboard@test.com", "password")
+        team = await create_test_team(mux_test_db, "Board Team", user.id)
+        board_a = await create_test_board(mux_test_db, user.id)
+        board_b = await create_test_board(mux_test_db, user.id)
+        token = create_access_token(data={"sub": str(user.id)})
+
+        # Keep presence deltas out of the binary frames this test reads
+        with TestClient(main.app) as test_client, patch.object(websocket, 'PRESENCE_COALESCE_SECONDS', 60):
+            with test_client.websocket_connect(f"/ws?token={token}") as ws1, \
+                    test_client.websocket_connect(f"/ws?token={token}") as ws2:
+                handles = {}
+                for ws in (ws1, ws2):
+                    for board_id in (board_a, board_b):
+                        ws.send_json({"action": "subscribe", "channel": f"board:{board_id}"})
+                        data = ws.receive_json()
+                        assert data["event"] == "subscribed"
+                        handles[(ws, board_id)] = data["handle"]
+                        # Initial sync frame for the board
+                        ws.receive_bytes()
+                    ws.send_json({"action": "subscribe", "channel": f"team:{team.id}"})
+                    ws.receive_json()
+                    ws.receive_json()
+
+                update = make_update("shape:a")
+                ws1.send_bytes(handles[(ws1, board_b)].to_bytes(2, "big") + update)
+
+                frame = ws2.receive_bytes()
+                assert int.from_bytes(frame[:2], "big") == handles[(ws2, board_b)]
+                assert frame[2:] == update
+
+                room = main.app.state.room_manager._rooms[board_b]
+                assert [e["key"] for e in room.ydoc.get("tldraw", type=Array)] == ["shape:a"]
+
+    async def test_unsubscribe(self, mux_test_db):
+        user = await create_test_user(mux_test_db, "muxunsub", "muxunsub@test.com", "password")
+        board_id = await create_test_board(mux_test_db, user.id)
+        token = create_access_token(data={"sub": str(user.id)})
+        channel = f"board:{board_id}"
+
+        with TestClient(main.app) as test_client:
+            with test_client.websocket_connect(f"/ws?token={token}") as ws:
+                ws.send_json({"action": "subscribe", "channel": channel})
+                ws.receive_json()
+                ws.receive_bytes()
+                ws.send_json({"action": "unsubscribe", "channel": channel})
+                assert ws.receive_json() == {"event": "unsubscribed", "channel": channel}
+
+                room = main.app.state.room_manager._rooms[board_id]
+                assert not room.clients
+
+    async def test_pong_is_accepted(self, mux_test_db):
+        user = await create_test_user(mux_test_db, "muxpong", "muxpong@test.com", "password")
+        board_id = await create_test_board(mux_test_db, user.id)
+        token = create_access_token(data={"sub": str(user.id)})
+        channel = f"board:{board_id}"
+
+        with TestClient(main.app) as test_client:
+            with test_client.websocket_connect(f"/ws?token={token}") as ws:
+                ws.send_json({"action": "pong"})
+                ws.send_json({"action": "subscribe", "channel": channel})
+                # No error for the pong; the next frame answers the subscribe
+                assert ws.receive_json()["event"] == "subscribed"
@@ -0,0 +1,86 @@
+"""
+Tests for keyset pagination of list endpoints.
+"""
+import pytest
+from httpx import AsyncClient
+
+from pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+
+async def get_all_pages(client: AsyncClient, url: str, headers: dict, limit: int) -> list:
+    """Follow X-Next-Cursor to the last page; return each page's items."""
+    pages = []
+    params = {"limit": limit}
+    while True:
+        response = await client.get(url, params=params, headers=headers)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return pages
+        params["cursor"] = cursor
+
+
+@pytest.fixture
+async def team_list(client: AsyncClient, auth_headers):
+    headers = await auth_headers("pager", "pager@test.com", "password")
+    team_id = (await client.post("/teams", json={"name": "Pages"}, headers=headers)).json()["id"]
+    list_id = (await client.post(f"/teams/{team_id}/lists", json={"name": "Paged"}, headers=headers)).json()["id"]
+    return headers, team_id, list_id
+
+
+class TestKeysetPagination:
+    async def test_todos_paged_newest_first(self, client: AsyncClient, team_list):
+        headers, _, list_id = team_list
+        for i in range(5):
+            await client.post(f"/lists/{list_id}/todos", json={"title": f"Todo {i}"}, headers=headers)
+
+        pages = await get_all_pages(client, f"/lists/{list_id}/todos", headers, limit=2)
+        assert [[t["title"] for t in page] for page in pages] == [
+            ["Todo 4", "Todo 3"], ["Todo 2", "Todo 1"], ["Todo 0"]
+        ]
+
+    async def test_exact_last_page_has_no_cursor(self, client: AsyncClient, team_list):
+        headers, team_id, _ = team_list
+        await client.post(f"/teams/{team_id}/lists", json={"name": "Second"}, headers=headers)
+
+        pages = await get_all_pages(client, f"/teams/{team_id}/lists", headers, limit=2)
+        assert [[l["name"] for l in page] for page in pages] == [["Paged", "Second"]]
+
+    async def test_teams_paged(self, client: AsyncClient, team_list):
+        headers, team_id, _ = team_list
+        other = (await client.post("/teams", json={"name": "Other"}, headers=headers)).json()["id"]
+
+        pages = await get_all_pages(client, "/teams", headers, limit=1)
+        assert [[t["id"] for t in page] for page in pages] == [[team_id], [other]]
+
+    async def test_boards_include_shared(self, client: AsyncClient, auth_headers):
+        owner = await auth_headers("bowner", "bowner@test.com", "password")
+        viewer = await auth_headers("bviewer", "bviewer@test.com", "password")
+        viewer_id = (await client.get("/auth/me", headers=viewer)).json()["id"]
+        shared = (await client.post("/boards", json={"title": "Shared"}, headers=owner)).json()["id"]
+        await client.post(
+            f"/boards/{shared}/share",
+            json={"user_id": viewer_id, "level": "view"},
+            headers=owner
+        )
+        for title in ("Mine 1", "Mine 2"):
+            await client.post("/boards", json={"title": title}, headers=viewer)
+
+        pages = await get_all_pages(client, "/boards", viewer, limit=2)
+        assert [[b["title"] for b in page] for page in pages] == [["Mine 2", "Mine 1"], ["Shared"]]
+
+    async def test_invalid_cursor(self, client: AsyncClient, team_list):
+        headers, team_id, list_id = team_list
+        for cursor in ("not-a-cursor", encode_cursor([1, 2])):
+            response = await client.get(f"/teams/{team_id}/lists", params={"cursor": cursor}, headers=headers)
+            assert response.status_code == 400
+
+        response = await client.get(f"/lists/{list_id}/todos", params={"cursor": encode_cursor([1, 2])}, headers=headers)
+        assert response.status_code == 400
+
+    async def test_limit_bounds(self, client: AsyncClient, team_list):
+        headers, team_id, _ = team_list
+        for limit in (0, 10_000):
+            response = await client.get(f"/teams/{team_id}/lists", params={"limit": limit}, headers=headers)
+            assert response.status_code == 422
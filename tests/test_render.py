@@ -0,0 +1,71 @@
+"""
+Tests for server-side board rendering.
+"""
+from xml.etree import ElementTree
+
+import pytest
+from pycrdt import Array, Doc
+
+from canvas.render import BoardRenderer, RendererUnavailable, document_fingerprint, png_available, render_svg
+
+
+def shape(shape_id: str, shape_type: str, x: float, y: float, **props) -> dict:
+    return {
+        "id": shape_id, "typeName": "shape", "type": shape_type,
+        "x": x, "y": y, "rotation": 0, "index": "a1", "parentId": "page:page",
+        "opacity": 1, "props": props,
+    }
+
+
+def board(*records: dict) -> Doc:
+    doc = Doc()
+    store = doc.get("tldraw", type=Array)
+    store.append({"key": "page:page", "val": {"id": "page:page", "typeName": "page", "index": "a1"}})
+    for record in records:
+        store.append({"key": record["id"], "val": record})
+    return doc
+
+
+class TestRenderSvg:
+    def test_renders_shapes(self):
+        doc = board(
+            shape("shape:box", "geo", 0, 0, w=100, h=50, geo="rectangle", color="red", fill="solid"),
+            shape("shape:label", "text", 200, 0, text="Hello <world>", size="m"),
+        )
+        svg = render_svg(doc.get_update(), size=256)
+
+        root = ElementTree.fromstring(svg)
+        assert max(int(root.get("width")), int(root.get("height"))) == 256
+        assert "#e03131" in svg
+        assert "Hello &lt;world&gt;" in svg
+
+    def test_empty_board(self):
+        svg = render_svg(Doc().get_update())
+        assert ElementTree.fromstring(svg).tag.endswith("svg")
+
+    def test_other_pages_are_skipped(self):
+        other = shape("shape:other", "geo", 0, 0, w=10, h=10, color="blue")
+        other["parentId"] = "page:second"
+        doc = board(shape("shape:box", "geo", 0, 0, w=10, h=10, color="red"), other)
+
+        svg = render_svg(doc.get_update())
+        assert "#e03131" in svg
+        assert "#4465e9" not in svg
+
+
+class TestBoardRenderer:
+    async def test_cached_until_document_changes(self, board_renderer):
+        doc = board(shape("shape:box", "geo", 0, 0, w=100, h=50, color="red"))
+        first = await board_renderer.render("board", doc, "svg", 128)
+        assert await board_renderer.render("board", doc, "svg", 128) is first
+
+        # Deleting only changes the delete set, not the state vector
+        fingerprint = document_fingerprint(doc)
+        del doc.get("tldraw", type=Array)[1]
+        assert document_fingerprint(doc) != fingerprint
+        assert b"#e03131" not in await board_renderer.render("board", doc, "svg", 128)
+
+    @pytest.mark.skipif(png_available(), reason="cairosvg is installed")
+    async def test_png_requires_cairosvg(self, board_renderer):
+        with pytest.raises(RendererUnavailable):
+            await board_renderer.render("board", board(), "png")
@@ -0,0 +1,106 @@
+"""
+Tests for RoomManager client fan-out.
+
+Uses in-process fake sockets; rooms are created empty without persistence.
+"""
+from pycrdt import Doc, Array
+
+from canvas import RoomManager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent: list[bytes] = []
+
+    async def send_bytes(self, data: bytes):
+        self.sent.append(data)
+
+
+class NullPersistence:
+    async def load(self, board_id, subdoc_id=None):
+        return None
+
+    async def save_debounced(self, board_id, ydoc, subdoc_id=None):
+        pass
+
+    async def flush_pending(self):
+        pass
+
+
+def updates(count: int) -> list[bytes]:
+    doc = Doc()
+    captured = []
+    doc.observe(lambda event: captured.append(event.update))
+    store = doc.get("tldraw", type=Array)
+    for i in range(count):
+        store.append({"key": f"shape:{i}", "val": {"id": f"shape:{i}"}})
+    return captured
+
+
+class TestOverflowRelay:
+    async def test_viewers_beyond_cap_join_relay(self):
+        manager = RoomManager(NullPersistence(), client_cap=2)
+        editor, viewer, overflow = FakeSocket(), FakeSocket(), FakeSocket()
+
+        await manager.add_client("board", editor)
+        await manager.add_client("board", viewer, read_only=True)
+        room = await manager.add_client("board", overflow, read_only=True)
+
+        assert room.clients == {editor, viewer}
+        assert room.relay.clients == {overflow}
+        assert room.client_count == 3
+
+    async def test_editors_are_never_relayed(self):
+        manager = RoomManager(NullPersistence(), client_cap=1)
+        first, second = FakeSocket(), FakeSocket()
+
+        await manager.add_client("board", first, read_only=True)
+        room = await manager.add_client("board", second)
+
+        assert second in room.clients
+        assert not room.relay.clients
+
+    async def test_relay_receives_one_merged_update(self):
+        manager = RoomManager(NullPersistence(), client_cap=1)
+        editor, overflow = FakeSocket(), FakeSocket()
+        await manager.add_client("board", editor)
+        room = await manager.add_client("board", overflow, read_only=True)
+
+        for update in updates(3):
+            await manager.apply_update("board", update, editor)
+        assert overflow.sent == []
+
+        await room.relay.flush()
+        assert len(overflow.sent) == 1
+
+        replica = Doc()
+        replica.apply_update(overflow.sent[0])
+        assert len(replica.get("tldraw", type=Array)) == 3
+
+    async def test_remove_client_from_relay(self):
+        manager = RoomManager(NullPersistence(), client_cap=0)
+        overflow = FakeSocket()
+        room = await manager.add_client("board", overflow, read_only=True)
+        manager.remove_client("board", overflow)
+        assert room.client_count == 0
+
+    async def test_viewer_leaving_mid_flush(self):
+        manager = RoomManager(NullPersistence(), client_cap=0)
+
+        class LeavingSocket(FakeSocket):
+            async def send_bytes(self, data: bytes):
+                await super().send_bytes(data)
+                manager.remove_client("board", self)
+
+        class DeadSocket(FakeSocket):
+            async def send_bytes(self, data: bytes):
+                raise ConnectionError
+
+        viewers = [LeavingSocket(), DeadSocket(), FakeSocket()]
+        for viewer in viewers:
+            room = await manager.add_client("board", viewer, read_only=True)
+        room.relay.enqueue(updates(1)[0])
+
+        await room.relay.flush()
+        assert [len(viewer.sent) for viewer in viewers] == [1, 0, 1]
+        assert room.relay.clients == {viewers[2]}
@@ -0,0 +1,195 @@
+"""
+Unit tests for the canvas shape spatial index.
+
+Builds Y.Docs in the YKeyValue layout used by the frontend and checks that
+the index follows inserts, moves, deletes and parent transforms.
+"""
+import math
+from pycrdt import Array, Doc
+
+from canvas.spatial_index import GridIndex, ShapeIndex
+from canvas.store import StoreObserver
+
+
+def shape(shape_id: str, x: float, y: float, w: float = 100, h: float = 100, **extra) -> dict:
+    record = {
+        "id": shape_id,
+        "typeName": "shape",
+        "type": "geo",
+        "x": x,
+        "y": y,
+        "rotation": 0,
+        "index": "a1",
+        "parentId": "page:page",
+        "props": {"w": w, "h": h},
+    }
+    record.update(extra)
+    return record
+
+
+def kv_set(store: Array, record: dict):
+    """Mimic YKeyValue.set: push the new entry, then delete the old one."""
+    key = record["id"]
+    old = [i for i, entry in enumerate(store) if entry["key"] == key]
+    store.append({"key": key, "val": record})
+    for i in reversed(old):
+        del store[i]
+
+
+def kv_delete(store: Array, key: str):
+    for i in reversed([i for i, entry in enumerate(store) if entry["key"] == key]):
+        del store[i]
+
+
+class TestGridIndex:
+    def test_query_returns_intersecting_items(self):
+        grid = GridIndex(cell_size=10)
+        grid.insert("a", (0, 0, 5, 5))
+        grid.insert("b", (50, 50, 60, 60))
+        assert grid.query((4, 4, 20, 20)) == {"a"}
+        assert grid.query((-100, -100, 100, 100)) == {"a", "b"}
+
+    def test_move_and_remove(self):
+        grid = GridIndex(cell_size=10)
+        grid.insert("a", (0, 0, 5, 5))
+        grid.insert("a", (100, 100, 105, 105))
+        assert grid.query((0, 0, 10, 10)) == set()
+        assert grid.query((100, 100, 101, 101)) == {"a"}
+        grid.remove("a")
+        assert len(grid) == 0
+        assert grid.query((100, 100, 101, 101)) == set()
+
+    def test_huge_items_are_not_hashed(self):
+        grid = GridIndex(cell_size=10)
+        grid.insert("huge", (0, 0, 1e6, 1e6))
+        grid.insert("a", (0, 0, 5, 5))
+        assert grid.query((500, 500, 510, 510)) == {"huge"}
+        assert grid.query((0, 0, 1, 1)) == {"huge", "a"}
+        grid.remove("huge")
+        assert grid.query((500, 500, 510, 510)) == set()
+
+
+class TestShapeIndex:
+    def test_initial_state_is_indexed(self):
+        source = Doc()
+        store = source.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0))
+        kv_set(store, shape("shape:b", 5000, 5000))
+        store.append({"key": "page:page", "val": {"id": "page:page", "typeName": "page"}})
+
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        ydoc.apply_update(source.get_update())
+
+        assert len(index) == 2
+        ids = [r["id"] for r in index.query((-10, -10, 200, 200))]
+        assert ids == ["shape:a"]
+
+    def test_move_updates_bounds(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0))
+        kv_set(store, shape("shape:a", 1000, 1000))
+
+        assert index.query((0, 0, 50, 50)) == []
+        assert [r["id"] for r in index.query((1050, 1050, 1060, 1060))] == ["shape:a"]
+        assert len(index) == 1
+
+    def test_delete_removes_shape(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0))
+        kv_set(store, shape("shape:b", 10, 10))
+        kv_delete(store, "shape:a")
+
+        assert [r["id"] for r in index.query((0, 0, 200, 200))] == ["shape:b"]
+
+    def test_child_of_frame_uses_page_space(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:frame", 1000, 1000, w=500, h=500, type="frame"))
+        kv_set(store, shape("shape:child", 10, 10, w=20, h=20, parentId="shape:frame"))
+
+        assert index.get_bounds("shape:child") == (1010, 1010, 1030, 1030)
+
+        # Moving the frame moves its children
+        kv_set(store, shape("shape:frame", 0, 0, w=500, h=500, type="frame"))
+        assert index.get_bounds("shape:child") == (10, 10, 30, 30)
+
+    def test_rotation_expands_bounds(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0, w=100, h=100, rotation=math.pi / 4))
+
+        min_x, min_y, max_x, max_y = index.get_bounds("shape:a")
+        assert math.isclose(max_x - min_x, 100 * math.sqrt(2), rel_tol=1e-6)
+        assert math.isclose(max_y - min_y, 100 * math.sqrt(2), rel_tol=1e-6)
+
+    def test_pointless_shapes_use_segments(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        record = shape("shape:draw", 100, 100, type="draw")
+        record["props"] = {"segments": [{"type": "free", "points": [{"x": 0, "y": 0}, {"x": 40, "y": 30}]}]}
+        kv_set(store, record)
+
+        assert index.get_bounds("shape:draw") == (100, 100, 140, 130)
+
+    def test_query_filters_by_page(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0))
+        kv_set(store, shape("shape:b", 0, 0, parentId="page:other"))
+
+        ids = [r["id"] for r in index.query((0, 0, 10, 10), page_id="page:other")]
+        assert ids == ["shape:b"]
+
+    def test_malformed_shapes_are_skipped(self):
+        """Bad geometry from an editor neither breaks the update nor later loads."""
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:ok", 0, 0))
+        kv_set(store, shape("shape:text", "abc", 0))
+        kv_set(store, shape("shape:inf", 0, 0, w=float("inf")))
+        bad_points = shape("shape:points", 0, 0, type="draw")
+        bad_points["props"] = {"segments": [{"points": [{"x": "1", "y": None}]}]}
+        kv_set(store, bad_points)
+        kv_set(store, shape("shape:overflow", 1e308, 0, w=1e308))
+
+        assert [r["id"] for r in index.query((-10, -10, 10, 10))] == ["shape:ok"]
+
+        reloaded = Doc()
+        reloaded_index = ShapeIndex(reloaded)
+        reloaded.apply_update(ydoc.get_update())
+        assert len(reloaded_index) == 1
+
+    def test_shape_made_invalid_is_removed(self):
+        ydoc = Doc()
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0))
+        kv_set(store, shape("shape:a", None, 0, rotation="spin"))
+        assert index.get_bounds("shape:a") is None
+
+    def test_observer_errors_do_not_escape(self):
+        class Failing(StoreObserver):
+            def _put(self, key, record):
+                raise RuntimeError("boom")
+
+            def _drop(self, key):
+                raise RuntimeError("boom")
+
+        ydoc = Doc()
+        Failing(ydoc)
+        index = ShapeIndex(ydoc)
+        store = ydoc.get("tldraw", type=Array)
+        kv_set(store, shape("shape:a", 0, 0))
+        assert index.get_bounds("shape:a") == (0, 0, 100, 100)
+        kv_delete(store, "shape:a")
+        assert index.get_bounds("shape:a") is None
@@ -0,0 +1,181 @@
+"""
+Tests for projecting canvas TODO shapes into todo_items.
+"""
+import json
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from pycrdt import Array, Doc
+from sqlalchemy import select
+
+import canvas.todo_projection
+from canvas.todo_projection import TodoProjection, todo_fields
+from models import OutboxEvent, Team, TeamMember, TodoItem, TodoList
+
+
+def todo_shape(backend_id, title="Task", completed=False) -> dict:
+    return {
+        "id": "shape:todo", "typeName": "shape", "type": "todo",
+        "x": 0, "y": 0, "rotation": 0, "index": "a1", "parentId": "page:page",
+        "props": {
+            "w": 280, "h": 100, "title": title, "completed": completed,
+            "dueDate": None, "assigneeId": None, "assigneeName": None,
+            "priority": "medium", "backendId": backend_id, "listId": None,
+        },
+    }
+
+
+def kv_set(store: Array, record: dict) -> None:
+    """YKeyValue.set as the frontend does it: push the new entry, delete the old one."""
+    old = [i for i, entry in enumerate(store) if entry["key"] == record["id"]]
+    store.append({"key": record["id"], "val": record})
+    for index in reversed(old):
+        del store[index]
+
+
+@pytest_asyncio.fixture
+async def todo_setup(test_db, create_user):
+    """A team with a member, a list and one item; returns (session factory, member, item id)."""
+    member = await create_user("projmember", "projmember@test.com", "password123")
+    async with test_db() as db:
+        team = Team(name="Projection", todo_count=1)
+        db.add(team)
+        await db.flush()
+        db.add(TeamMember(user_id=member.id, team_id=team.id))
+        todo_list = TodoList(team_id=team.id, name="List", todo_count=1)
+        db.add(todo_list)
+        await db.flush()
+        item = TodoItem(list_id=todo_list.id, title="Task")
+        db.add(item)
+        await db.commit()
+        item_id = item.id
+
+    with patch.object(canvas.todo_projection, 'async_session', test_db):
+        yield test_db, member, item_id
+
+
+async def load_item(test_db, item_id):
+    async with test_db() as db:
+        result = await db.execute(select(TodoItem).where(TodoItem.id == item_id))
+        return result.scalar_one_or_none()
+
+
+async def load_counters(test_db):
+    """(todo_count, completed_count) of the only list and of its team."""
+    async with test_db() as db:
+        result = await db.execute(
+            select(TodoList.todo_count, TodoList.completed_count, Team.todo_count, Team.completed_count)
+            .join(Team, Team.id == TodoList.team_id)
+        )
+        row = result.one()
+        return tuple(row[:2]), tuple(row[2:])
+
+
+async def load_events(test_db):
+    """(event, payload) of every queued outbox event, oldest first."""
+    async with test_db() as db:
+        result = await db.execute(select(OutboxEvent.event, OutboxEvent.payload).order_by(OutboxEvent.id))
+        return [(event, json.loads(payload)) for event, payload in result.all()]
+
+
+class TestTodoFields:
+    def test_ids_must_be_finite_integers(self):
+        for backend_id in (float("inf"), float("nan"), 1.5, True, "7", 2 ** 63):
+            assert todo_fields(todo_shape(backend_id)) is None
+        assert todo_fields(todo_shape(7.0))[0] == 7
+
+    def test_bad_assignee_is_ignored(self):
+        record = todo_shape(7)
+        record["props"]["assigneeId"] = float("inf")
+        assert todo_fields(record)[1][3] is None
+
+
+class TestTodoProjection:
+    async def test_loaded_state_is_not_projected(self, todo_setup):
+        """Shapes present when a room loads only set the baseline."""
+        test_db, member, item_id = todo_setup
+        source = Doc()
+        kv_set(source.get("tldraw", type=Array), todo_shape(item_id, title="Stale"))
+
+        doc = Doc()
+        projection = TodoProjection(doc)
+        doc.apply_update(source.get_update())
+
+        assert not projection.has_pending
+        assert (await load_item(test_db, item_id)).title == "Task"
+
+    async def test_edits_are_batched(self, todo_setup):
+        """Several edits by a member collapse into one write of the latest values."""
+        test_db, member, item_id = todo_setup
+        doc = Doc()
+        projection = TodoProjection(doc)
+        store = doc.get("tldraw", type=Array)
+        kv_set(store, todo_shape(item_id))
+
+        projection.editor_id = member.id
+        kv_set(store, todo_shape(item_id, title="Renamed"))
+        kv_set(store, todo_shape(item_id, title="Renamed", completed=True))
+        projection.editor_id = None
+
+        assert await projection.flush() == 1
+        item = await load_item(test_db, item_id)
+        assert item.title == "Renamed"
+        assert item.completed is True
+        assert await load_counters(test_db) == ((1, 1), (1, 1))
+
+    async def test_non_member_edits_are_dropped(self, todo_setup, create_user):
+        """Board editors outside the item's team can't modify it."""
+        test_db, member, item_id = todo_setup
+        outsider = await create_user("projoutsider", "projoutsider@test.com", "password123")
+        doc = Doc()
+        projection = TodoProjection(doc)
+        store = doc.get("tldraw", type=Array)
+        kv_set(store, todo_shape(item_id))
+
+        projection.editor_id = outsider.id
+        kv_set(store, todo_shape(item_id, title="Hijacked"))
+        projection.editor_id = None
+
+        assert await projection.flush() == 0
+        assert (await load_item(test_db, item_id)).title == "Task"
+
+    async def test_deleting_shape_deletes_item(self, todo_setup):
+        """Removing a linked shape deletes its item."""
+        test_db, member, item_id = todo_setup
+        doc = Doc()
+        projection = TodoProjection(doc)
+        store = doc.get("tldraw", type=Array)
+        kv_set(store, todo_shape(item_id))
+
+        projection.editor_id = member.id
+        del store[0]
+        projection.editor_id = None
+
+        assert await projection.flush() == 1
+        assert await load_item(test_db, item_id) is None
+        assert await load_counters(test_db) == ((0, 0), (0, 0))
+
+    async def test_writes_enqueue_team_events(self, todo_setup):
+        """Projected edits and deletes reach team sockets through the outbox."""
+        test_db, member, item_id = todo_setup
+        doc = Doc()
+        projection = TodoProjection(doc)
+        store = doc.get("tldraw", type=Array)
+        kv_set(store, todo_shape(item_id))
+
+        projection.editor_id = member.id
+        kv_set(store, todo_shape(item_id, title="Renamed", completed=True))
+        projection.editor_id = None
+        assert await projection.flush() == 1
+
+        projection.editor_id = member.id
+        del store[0]
+        projection.editor_id = None
+        assert await projection.flush() == 1
+
+        (updated, payload), (deleted, deleted_payload) = await load_events(test_db)
+        assert updated == "todo_updated"
+        assert (payload["id"], payload["title"], payload["completed"]) == (item_id, "Renamed", True)
+        assert deleted == "todo_deleted"
+        assert deleted_payload == {"id": item_id, "list_id": payload["list_id"]}
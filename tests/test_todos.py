@@ -1,6 +1,10 @@
 import pytest
+from sqlalchemy import event
 from httpx import AsyncClient
 from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import outbox
 
 @pytest.fixture
 async def list_with_user(client: AsyncClient, auth_headers):
@@ -144,3 +148,130 @@ class TestDeleteTodo:
         other_headers = await auth_headers("othertodouser", "othertodo@test.com", "password")
         response = await client.delete(f"/todos/{todo_id}", headers=other_headers)
         assert response.status_code == 403
+
+
+class FakeTeamManager:
+    def __init__(self):
+        self.events = []
+
+    async def broadcast_todo_event(self, team_id, event_type, todo_data, exclude_ws=None):
+        self.events.append((team_id, event_type, todo_data))
+
+
+async def dispatch_events(test_db, batch_size: int = 100) -> list:
+    """Drain the outbox; return the (team_id, event, data) broadcasts."""
+    team_manager = FakeTeamManager()
+    dispatcher = outbox.OutboxDispatcher(team_manager, batch_size=batch_size)
+    with patch.object(outbox, 'async_session', test_db):
+        await dispatcher.dispatch()
+        # Sent events are removed from the outbox
+        assert await dispatcher.dispatch() == 0
+    return team_manager.events
+
+
+class TestTodoEvents:
+
+    async def test_mutations_emit_events(self, client: AsyncClient, list_with_user, test_db):
+        headers, list_id, user_id = list_with_user
+        todo = (await client.post(f"/lists/{list_id}/todos", json={"title": "Evented"}, headers=headers)).json()
+        await client.put(f"/todos/{todo['id']}", json={"assigned_to": user_id}, headers=headers)
+        await client.patch(f"/todos/{todo['id']}/toggle", headers=headers)
+        await client.delete(f"/todos/{todo['id']}", headers=headers)
+
+        events = await dispatch_events(test_db, batch_size=3)
+        assert [e[1] for e in events] == ["todo_created", "todo_updated", "todo_updated", "todo_deleted"]
+        assert events[0][2] == todo
+        assert events[1][2]["assignee_username"] == "todouser"
+        assert events[2][2]["completed"] is True
+        assert events[3][2] == {"id": todo["id"], "list_id": list_id}
+
+    async def test_rejected_change_emits_nothing(self, client: AsyncClient, list_with_user, auth_headers, test_db):
+        headers, list_id, _ = list_with_user
+        todo = (await client.post(f"/lists/{list_id}/todos", json={"title": "Mine"}, headers=headers)).json()
+        await dispatch_events(test_db)
+
+        other = await auth_headers("eventother", "eventother@test.com", "password")
+        response = await client.put(f"/todos/{todo['id']}", json={"title": "Hijacked"}, headers=other)
+        assert response.status_code == 403
+        assert await dispatch_events(test_db) == []
+
+
+class TestBatchTodos:
+    async def test_mixed_operations(self, client: AsyncClient, list_with_user, test_db):
+        headers, list_id, user_id = list_with_user
+        kept = (await client.post(f"/lists/{list_id}/todos", json={"title": "Kept"}, headers=headers)).json()
+        gone = (await client.post(f"/lists/{list_id}/todos", json={"title": "Gone"}, headers=headers)).json()
+        await dispatch_events(test_db)
+
+        response = await client.post(f"/lists/{list_id}/todos:batch", json=[
+            {"op": "create", "todo": {"title": "New", "assigned_to": user_id}},
+            {"op": "update", "id": kept["id"], "todo": {"title": "Renamed"}},
+            {"op": "toggle", "id": kept["id"]},
+            {"op": "delete", "id": gone["id"]},
+            {"op": "toggle", "id": gone["id"]},
+        ], headers=headers)
+        assert response.status_code == 200
+        results = response.json()
+        assert [r["status"] for r in results] == [201, 200, 200, 204, 404]
+        assert results[0]["todo"]["assignee_username"] == "todouser"
+        # Both operations on kept report its state after the batch
+        assert results[1]["todo"] == results[2]["todo"]
+        assert results[2]["todo"]["title"] == "Renamed" and results[2]["todo"]["completed"] is True
+        assert results[3]["todo"] is None
+        assert results[4]["detail"] == "Todo not found"
+        # One change cursor for the whole batch
+        assert results[0]["todo"]["change_seq"] == results[1]["todo"]["change_seq"]
+
+        todos = (await client.get(f"/lists/{list_id}/todos", headers=headers)).json()
+        assert sorted(t["title"] for t in todos) == ["New", "Renamed"]
+
+        events = await dispatch_events(test_db)
+        assert [e[1] for e in events] == ["todo_created", "todo_updated", "todo_deleted"]
+
+    async def test_todo_of_other_list_not_found(self, client: AsyncClient, list_with_user):
+        headers, list_id, _ = list_with_user
+        team_id = (await client.get("/teams", headers=headers)).json()[0]["id"]
+        other_list = (await client.post(f"/teams/{team_id}/lists", json={"name": "Other"}, headers=headers)).json()["id"]
+        todo = (await client.post(f"/lists/{other_list}/todos", json={"title": "Elsewhere"}, headers=headers)).json()
+
+        response = await client.post(f"/lists/{list_id}/todos:batch", json=[
+            {"op": "delete", "id": todo["id"]}
+        ], headers=headers)
+        assert response.json()[0]["status"] == 404
+        assert len((await client.get(f"/lists/{other_list}/todos", headers=headers)).json()) == 1
+
+    async def test_requires_membership(self, client: AsyncClient, list_with_user, auth_headers):
+        _, list_id, _ = list_with_user
+        other = await auth_headers("batchother", "batchother@test.com", "password")
+        response = await client.post(f"/lists/{list_id}/todos:batch", json=[
+            {"op": "create", "todo": {"title": "Intruder"}}
+        ], headers=other)
+        assert response.status_code == 403
+
+    async def test_invalid_operation(self, client: AsyncClient, list_with_user):
+        headers, list_id, _ = list_with_user
+        response = await client.post(f"/lists/{list_id}/todos:batch", json=[
+            {"op": "archive", "id": 1}
+        ], headers=headers)
+        assert response.status_code == 422
+
+
+class TestMutationRoundTrips:
+    async def test_toggle_statements(self, client: AsyncClient, list_with_user, test_db):
+        headers, list_id, user_id = list_with_user
+        todo = (await client.post(f"/lists/{list_id}/todos", json={"title": "Counted", "assigned_to": user_id}, headers=headers)).json()
+
+        statements = []
+        engine = test_db.kw["bind"].sync_engine
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            response = await client.patch(f"/todos/{todo['id']}/toggle", headers=headers)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert response.json()["completed"] is True
+        assert response.json()["assignee_username"] == "todouser"
+        # Current user, joined authorization, change cursor with team
+        # counters, list counters, UPDATE ... RETURNING, outbox insert
+        assert len(statements) == 6
@@ -1,3 +1,6 @@
+import asyncio
+import json
+
 import pytest
 import pytest_asyncio
 from httpx import AsyncClient
@@ -8,6 +11,8 @@ from unittest.mock import patch
 
 import main
 import database
+import websocket
+import ws_auth
 from database import Base
 from auth import hash_password, create_access_token
 from models import User, Team, TeamMember
@@ -31,10 +36,14 @@ async def ws_test_db():
 
     test_async_session = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
-    # Patch both the database module and main module's async_session
+    # Patch both the database module and the handshake cache's async_session;
+    # cached handshakes from other tests' databases must not leak in
+    ws_auth.handshake_cache.clear()
     with patch.object(database, 'async_session', test_async_session):
-        with patch.object(main, 'async_session', test_async_session):
-            yield test_async_session
+        with patch.object(ws_auth, 'async_session', test_async_session):
+            with patch.object(websocket, 'PRESENCE_COALESCE_SECONDS', 0.05):
+                yield test_async_session
+    ws_auth.handshake_cache.clear()
 
     await engine.dispose()
 
@@ -76,6 +85,14 @@ async def add_team_member(session_maker, user_id: int, team_id: int):
         await db.commit()
 
 
+def receive_presence(ws, change: str, username: str) -> dict:
+    """Receive frames until a presence_delta lists username under change ('online'/'offline')."""
+    while True:
+        data = ws.receive_json()
+        if data["event"] == "presence_delta" and username in [u["username"] for u in data["data"][change]]:
+            return data
+
+
 class TestWebSocketConnect:
     async def test_websocket_connect(self, ws_test_db):
         """Test WebSocket connection with valid token."""
@@ -152,7 +169,7 @@ class TestWebSocketOnlineUsers:
 
 class TestWebSocketMemberOnline:
     async def test_websocket_member_online(self, ws_test_db):
-        """Test that existing connections receive member_online broadcast when new user joins."""
+        """Test that existing connections see a new user come online."""
         # Create owner and team
         member1 = await create_test_user(ws_test_db, "member1", "member1@test.com", "password")
         team = await create_test_team(ws_test_db, "Broadcast Team", member1.id)
@@ -175,15 +192,13 @@ class TestWebSocketMemberOnline:
                     # ws2 receives their online_users
                     ws2.receive_json()
 
-                    # ws1 should receive member_online broadcast
-                    data = ws1.receive_json()
-                    assert data["event"] == "member_online"
-                    assert data["data"]["username"] == "member2"
+                    # ws1 gets a presence_delta with member2 online
+                    receive_presence(ws1, "online", "member2")
 
 
 class TestWebSocketMemberOffline:
     async def test_websocket_member_offline(self, ws_test_db):
-        """Test that remaining connections receive member_offline broadcast when user leaves."""
+        """Test that remaining connections see a leaving user go offline."""
         # Create owner and team
         stayer = await create_test_user(ws_test_db, "stayer", "stayer@test.com", "password")
         team = await create_test_team(ws_test_db, "Offline Test Team", stayer.id)
@@ -203,10 +218,246 @@ class TestWebSocketMemberOffline:
                 # Second user connects then disconnects
                 with test_client.websocket_connect(f"/ws/teams/{team.id}?token={token2}") as ws2:
                     ws2.receive_json()  # ws2 receives online_users
-                    ws1.receive_json()  # ws1 receives member_online
+                    receive_presence(ws1, "online", "leaver")
                 # ws2 context exits here, triggering disconnect
 
-                # ws1 should receive member_offline broadcast
-                data = ws1.receive_json()
-                assert data["event"] == "member_offline"
-                assert data["data"]["username"] == "leaver"
+                data = receive_presence(ws1, "offline", "leaver")
+                assert data["data"]["online"] == []
+
+
+class FakeTeamSocket:
+    def __init__(self, delay: float = 0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.frames: list[str] = []
+        self.closed = False
+
+    async def send_text(self, text: str):
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.frames.append(text)
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message: dict):
+        await self.send_text(websocket.encode_message(message))
+
+    def events(self) -> list[dict]:
+        return [json.loads(frame) for frame in self.frames]
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+class TestBroadcast:
+    def _manager(self, sockets):
+        manager = websocket.ConnectionManager()
+        for i, ws in enumerate(sockets):
+            manager._register(ws, 1, i, f"user{i}")
+        return manager
+
+    async def test_sends_one_encoding_to_all(self):
+        sockets = [FakeTeamSocket(), FakeTeamSocket()]
+        manager = self._manager(sockets)
+
+        await manager.broadcast(1, {"event": "todo_created", "data": {"title": "é"}})
+        assert sockets[0].frames == sockets[1].frames == ['{"event":"todo_created","data":{"title":"é"}}']
+
+    async def test_sends_concurrently(self):
+        sockets = [FakeTeamSocket(delay=0.05) for _ in range(10)]
+        manager = self._manager(sockets)
+
+        started = asyncio.get_running_loop().time()
+        await manager.broadcast(1, {"event": "ping"})
+        assert asyncio.get_running_loop().time() - started < 0.25
+        assert all(ws.frames for ws in sockets)
+
+    async def test_failed_and_slow_sockets_are_evicted(self):
+        healthy, broken, stalled = FakeTeamSocket(), FakeTeamSocket(fail=True), FakeTeamSocket(delay=1)
+        manager = self._manager([healthy, broken, stalled])
+
+        with patch.object(websocket, 'TEAM_WS_SEND_TIMEOUT_SECONDS', 0.05), \
+                patch.object(websocket, 'PRESENCE_COALESCE_SECONDS', 0):
+            await manager.broadcast(1, {"event": "ping"})
+            await asyncio.sleep(0.01)
+
+        assert set(manager.active_connections[1]) == {healthy}
+        assert broken.closed and stalled.closed
+        # Their users had no other sockets, so the rest of the team hears they left
+        delta = healthy.events()[-1]
+        assert delta["event"] == "presence_delta"
+        assert sorted(u["user_id"] for u in delta["data"]["offline"]) == [1, 2]
+
+
+class TestPresence:
+    @pytest_asyncio.fixture
+    async def manager(self):
+        manager = websocket.ConnectionManager()
+        with patch.object(websocket, 'PRESENCE_COALESCE_SECONDS', 0.02):
+            yield manager
+            await manager.stop()
+
+    async def test_user_with_two_sockets_listed_once(self, manager):
+        watcher, tab1, tab2 = FakeTeamSocket(), FakeTeamSocket(), FakeTeamSocket()
+
+        await manager.connect(watcher, 1, 1, "watcher")
+        await manager.connect(tab1, 1, 2, "alice")
+        await manager.connect(tab2, 1, 2, "alice")
+        await asyncio.sleep(0.05)
+
+        assert tab2.events()[0]["data"]["users"] == [
+            {"user_id": 1, "username": "watcher"}, {"user_id": 2, "username": "alice"}
+        ]
+        assert watcher.events()[-1] == {
+            "event": "presence_delta",
+            "data": {"online": [{"user_id": 1, "username": "watcher"}, {"user_id": 2, "username": "alice"}],
+                     "offline": []},
+        }
+
+    async def test_offline_only_after_last_socket(self, manager):
+        tab1, tab2 = FakeTeamSocket(), FakeTeamSocket()
+        await manager.connect(tab1, 1, 2, "alice")
+        await manager.connect(tab2, 1, 2, "alice")
+
+        assert manager.disconnect(tab1) is False
+        assert manager.online_users(1) == [{"user_id": 2, "username": "alice"}]
+        assert manager.disconnect(tab2) is True
+        assert manager.online_users(1) == []
+        assert 1 not in manager.active_connections and 1 not in manager.presence
+
+    async def test_disconnect_unknown_socket(self, manager):
+        assert manager.disconnect(FakeTeamSocket()) is False
+
+    async def test_teams_are_independent(self, manager):
+        team_a, team_b = FakeTeamSocket(), FakeTeamSocket()
+        await manager.connect(team_a, 1, 2, "alice")
+        await manager.connect(team_b, 2, 2, "alice")
+
+        assert manager.disconnect(team_a) is True
+        assert manager.online_users(2) == [{"user_id": 2, "username": "alice"}]
+
+    async def test_reconnect_storm_is_one_delta_per_socket(self, manager):
+        sockets = [FakeTeamSocket() for _ in range(20)]
+        for i, ws in enumerate(sockets):
+            await manager.connect(ws, 1, i, f"user{i}")
+        await asyncio.sleep(0.05)
+
+        # online_users on connect plus a single coalesced delta
+        assert all(len(ws.frames) == 2 for ws in sockets)
+        assert len(sockets[0].events()[-1]["data"]["online"]) == 20
+
+    async def test_reconnect_within_window_is_silent(self, manager):
+        watcher, flaky = FakeTeamSocket(), FakeTeamSocket()
+        await manager.connect(watcher, 1, 1, "watcher")
+        await manager.connect(flaky, 1, 2, "flaky")
+        await asyncio.sleep(0.05)
+        frames = len(watcher.frames)
+
+        manager.disconnect(flaky)
+        await manager.connect(FakeTeamSocket(), 1, 2, "flaky")
+        await asyncio.sleep(0.05)
+        assert len(watcher.frames) == frames
+
+    async def test_snapshot(self, manager):
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice")
+
+        with patch.object(websocket, 'PRESENCE_SNAPSHOT_INTERVAL_SECONDS', 0.02):
+            await manager.start()
+            await asyncio.sleep(0.05)
+
+        assert {"event": "presence_snapshot", "data": {"users": [{"user_id": 1, "username": "alice"}]}} in ws.events()
+
+
+class TestEventReplay:
+    async def _events(self, manager, team_id: int, count: int):
+        for i in range(count):
+            await manager.broadcast_todo_event(team_id, "todo_updated", {"id": i})
+
+    async def test_events_carry_consecutive_seqs(self):
+        manager = websocket.ConnectionManager()
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice")
+        await self._events(manager, 1, 3)
+
+        base = ws.events()[0]["data"]["seq"]
+        assert [e["seq"] for e in ws.events()[1:]] == [base + 1, base + 2, base + 3]
+        assert manager.current_seq(1) == base + 3
+        # Other teams have their own sequence
+        assert manager.current_seq(2) == base
+
+    async def test_reconnect_replays_missed_events(self):
+        manager = websocket.ConnectionManager()
+        await self._events(manager, 1, 5)
+        last_seq = manager.current_seq(1) - 2
+
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice", last_seq=last_seq)
+        replayed = ws.events()[1:]
+        assert [e["seq"] for e in replayed] == [last_seq + 1, last_seq + 2]
+        assert [e["data"]["id"] for e in replayed] == [3, 4]
+
+    async def test_reconnect_up_to_date(self):
+        manager = websocket.ConnectionManager()
+        await self._events(manager, 1, 2)
+
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice", last_seq=manager.current_seq(1))
+        assert [e["event"] for e in ws.events()] == ["online_users"]
+
+    async def test_resync_when_events_left_buffer(self):
+        with patch.object(websocket, 'TEAM_EVENT_BUFFER_SIZE', 3):
+            manager = websocket.ConnectionManager()
+            first = manager.current_seq(1)
+            await self._events(manager, 1, 5)
+
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice", last_seq=first + 1)
+        assert ws.events()[-1] == {"event": "resync_required", "data": {"seq": first + 5}}
+
+    async def test_resync_for_seq_from_another_process(self):
+        manager = websocket.ConnectionManager()
+        await self._events(manager, 1, 1)
+
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice", last_seq=manager.current_seq(1) + 100)
+        assert ws.events()[-1]["event"] == "resync_required"
+
+    async def test_idle_team_buffer_is_dropped(self):
+        manager = websocket.ConnectionManager()
+        ws = FakeTeamSocket()
+        await manager.connect(ws, 1, 1, "alice")
+        await self._events(manager, 1, 2)
+        last_seq = manager.current_seq(1)
+
+        with patch.object(websocket, 'TEAM_EVENT_REPLAY_SECONDS', 0):
+            # Still connected: kept
+            manager._prune_event_buffers()
+            assert manager.events_since(1, last_seq - 1) is not None
+
+            manager.disconnect(ws)
+            manager._prune_event_buffers()
+        assert 1 not in manager._event_buffers
+
+        # Later events don't reuse seqs; older clients resync
+        await self._events(manager, 1, 1)
+        assert manager.current_seq(1) == last_seq + 1
+        assert manager.events_since(1, last_seq - 1) is None
+
+    async def test_forget_team(self):
+        manager = websocket.ConnectionManager()
+        await self._events(manager, 1, 2)
+        manager.forget_team(1)
+        assert (manager._event_seqs, manager._event_buffers) == ({}, {})
+
+    async def test_endpoint_accepts_last_seq(self, ws_test_db):
+        user = await create_test_user(ws_test_db, "resumer", "resumer@test.com", "password")
+        team = await create_test_team(ws_test_db, "Resume Team", user.id)
+        token = create_access_token(data={"sub": str(user.id)})
+
+        with TestClient(main.app) as test_client:
+            with test_client.websocket_connect(f"/ws/teams/{team.id}?token={token}&last_seq=0") as ws:
+                assert ws.receive_json()["event"] == "online_users"
+                assert ws.receive_json()["event"] == "resync_required"
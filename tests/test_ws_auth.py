@@ -0,0 +1,108 @@
+"""
+Tests for cached team WebSocket handshake authorization.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from httpx import AsyncClient
+
+import ws_auth
+from auth import create_access_token
+from ws_auth import HandshakeCache, TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class CountingSessions:
+    """Wraps a session maker and counts sessions opened."""
+
+    def __init__(self, session_maker):
+        self.session_maker = session_maker
+        self.opened = 0
+
+    def __call__(self):
+        self.opened += 1
+        return self.session_maker()
+
+
+@pytest.fixture
+def sessions(test_db):
+    counting = CountingSessions(test_db)
+    ws_auth.handshake_cache.clear()
+    with patch.object(ws_auth, 'async_session', counting):
+        yield counting
+    ws_auth.handshake_cache.clear()
+
+
+class TestTTLCache:
+    def test_entries_expire(self):
+        clock = FakeClock()
+        with patch("ws_auth.time.monotonic", clock):
+            cache = TTLCache(ttl=10, max_size=10)
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=2)
+            clock.now += 5
+            assert cache.get("a") == 1
+            assert cache.get("b") is None
+            clock.now += 5
+            assert cache.get("a") is None
+
+    def test_oldest_evicted_over_max_size(self):
+        cache = TTLCache(ttl=10, max_size=2)
+        for key in "abc":
+            cache.set(key, key)
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == "c"
+
+
+class TestHandshakeCache:
+    async def test_token_lookup_cached(self, create_user, sessions):
+        user = await create_user("cached", "cached@test.com", "password")
+        token = create_access_token(data={"sub": str(user.id)})
+        cache = HandshakeCache()
+
+        assert await cache.user_for_token(token) == (user.id, "cached")
+        assert await cache.user_for_token(token) == (user.id, "cached")
+        assert sessions.opened == 1
+
+    async def test_invalid_token_and_unknown_user(self, sessions):
+        cache = HandshakeCache()
+        assert await cache.user_for_token("not-a-token") is None
+        unknown = create_access_token(data={"sub": "999"})
+        assert await cache.user_for_token(unknown) is None
+        # Failures are looked up again, not cached
+        assert await cache.user_for_token(unknown) is None
+        assert sessions.opened == 2
+
+    async def test_expired_token_rejected(self, create_user, sessions):
+        user = await create_user("expiring", "expiring@test.com", "password")
+        token = create_access_token(data={"sub": str(user.id)}, expires_delta=timedelta(seconds=-1))
+        cache = HandshakeCache()
+        # Rejected while decoding, before any query
+        assert await cache.user_for_token(token) is None
+        assert sessions.opened == 0
+
+    async def test_join_invalidates_membership(self, client: AsyncClient, auth_headers, sessions):
+        owner = await auth_headers("hsowner", "hsowner@test.com", "password")
+        team = (await client.post("/teams", json={"name": "Handshake"}, headers=owner)).json()
+        joiner = await auth_headers("hsjoiner", "hsjoiner@test.com", "password")
+        joiner_id = (await client.get("/auth/me", headers=joiner)).json()["id"]
+
+        assert await ws_auth.handshake_cache.is_member(joiner_id, team["id"]) is False
+        assert await ws_auth.handshake_cache.is_member(joiner_id, team["id"]) is False
+        assert sessions.opened == 1
+
+        await client.post("/teams/join", json={"invite_code": team["invite_code"]}, headers=joiner)
+        assert await ws_auth.handshake_cache.is_member(joiner_id, team["id"]) is True
+
+        await client.delete(f"/teams/{team['id']}", headers=joiner)
+        assert await ws_auth.handshake_cache.is_member(joiner_id, team["id"]) is False
+        assert sessions.opened == 3
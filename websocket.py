@@ -1,56 +1,306 @@
+from collections import deque
 from fastapi import WebSocket
-from typing import Dict, Set
+from typing import Deque, Dict, List, Optional, Set, Tuple
+import asyncio
 import json
+import time
+
+from config import (
+    TEAM_WS_SEND_TIMEOUT_SECONDS,
+    PRESENCE_COALESCE_SECONDS,
+    PRESENCE_SNAPSHOT_INTERVAL_SECONDS,
+    TEAM_EVENT_BUFFER_SIZE,
+    TEAM_EVENT_REPLAY_SECONDS,
+)
+
+
+def encode_message(message: dict) -> str:
+    """Encode a message the way WebSocket.send_json does, once for all recipients."""
+    return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+
+async def _send_text(websocket: WebSocket, text: str) -> bool:
+    try:
+        await asyncio.wait_for(websocket.send_text(text), TEAM_WS_SEND_TIMEOUT_SECONDS)
+        return True
+    except Exception:
+        return False
+
+
+async def _close_quietly(websocket: WebSocket):
+    try:
+        await asyncio.wait_for(websocket.close(code=1011), TEAM_WS_SEND_TIMEOUT_SECONDS)
+    except Exception:
+        pass  # Already gone
 
 class ConnectionManager:
+    """
+    Team WebSocket registry with per-user presence.
+
+    Indexed by team (fan-out), by user within a team (presence) and by
+    socket (disconnect/eviction), so no operation scans other teams' sockets.
+    A user is online in a team while at least one of their sockets is open
+    there.
+
+    Presence transitions are not broadcast one by one: changes within
+    PRESENCE_COALESCE_SECONDS are sent as one presence_delta per team, so a
+    reconnect storm costs O(n) frames instead of O(n²). A presence_snapshot
+    every PRESENCE_SNAPSHOT_INTERVAL_SECONDS corrects any client drift.
+
+    Team events (broadcast_todo_event) carry a per-team "seq" and the last
+    TEAM_EVENT_BUFFER_SIZE of them are kept, encoded, in a ring buffer. A
+    client reconnecting with last_seq gets the events it missed replayed, or
+    resync_required if they have left the buffer. Sequences start from the
+    process start time in milliseconds, so a client's last_seq from before a
+    restart is always older than the new buffer and forces a resync.
+    Presence frames are not sequenced.
+
+    A team's buffer is dropped once it has no sockets and nothing happened
+    for TEAM_EVENT_REPLAY_SECONDS (checked with each presence snapshot), or
+    when the team is deleted (forget_team). The base is raised past the
+    dropped seq, so the team's next events can't reuse seqs clients saw and
+    reconnects from before the drop resync.
+    """
+
     def __init__(self):
-        # team_id -> set of (websocket, user_id, username)
-        self.active_connections: Dict[int, Set[tuple]] = {}
+        # team_id -> {websocket: user_id}
+        self.active_connections: Dict[int, Dict[WebSocket, int]] = {}
+        # team_id -> {user_id: [username, open socket count]}
+        self.presence: Dict[int, Dict[int, list]] = {}
+        # websocket -> (team_id, user_id)
+        self._sockets: Dict[WebSocket, Tuple[int, int]] = {}
+        # team_id -> {user_id: [username, online at window start, online now]}
+        self._presence_changes: Dict[int, Dict[int, list]] = {}
+        # team_id -> task sending that team's presence_delta when the window ends
+        self._presence_flushes: Dict[int, asyncio.Task] = {}
+        self._snapshot_task: Optional[asyncio.Task] = None
+        # team_id -> last event seq; every team starts from _seq_base
+        self._seq_base = int(time.time() * 1000)
+        self._event_seqs: Dict[int, int] = {}
+        # team_id -> recent (seq, encoded event), oldest first
+        self._event_buffers: Dict[int, Deque[Tuple[int, str]]] = {}
+        # team_id -> time.monotonic() of the team's last event or disconnect
+        self._event_activity: Dict[int, float] = {}
+        # Background closes of evicted sockets (referenced so they aren't collected)
+        self._closing: Set[asyncio.Task] = set()
 
-    async def connect(self, websocket: WebSocket, team_id: int, user_id: int, username: str):
-        await websocket.accept()
-        if team_id not in self.active_connections:
-            self.active_connections[team_id] = set()
-        self.active_connections[team_id].add((websocket, user_id, username))
+    async def start(self):
+        """Start the periodic presence snapshot task."""
+        self._snapshot_task = asyncio.create_task(self._snapshot_loop())
 
-        # Broadcast user joined
-        await self.broadcast(team_id, {
-            "event": "member_online",
-            "data": {"user_id": user_id, "username": username}
-        }, exclude_ws=websocket)
+    async def stop(self):
+        """Stop the snapshot task and drop any unsent presence deltas."""
+        tasks = [self._snapshot_task, *self._presence_flushes.values()]
+        for task in tasks:
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._snapshot_task = None
+        self._presence_flushes.clear()
+        self._presence_changes.clear()
 
-        # Send current online users to new connection
-        online_users = [
-            {"user_id": uid, "username": uname}
-            for ws, uid, uname in self.active_connections[team_id]
+    def online_users(self, team_id: int) -> List[dict]:
+        """Users with at least one open socket in a team, each listed once."""
+        return [
+            {"user_id": user_id, "username": entry[0]}
+            for user_id, entry in self.presence.get(team_id, {}).items()
         ]
+
+    def _register(self, websocket: WebSocket, team_id: int, user_id: int, username: str) -> bool:
+        """Add a socket; return True if the user just came online in the team."""
+        self.active_connections.setdefault(team_id, {})[websocket] = user_id
+        self._sockets[websocket] = (team_id, user_id)
+        members = self.presence.setdefault(team_id, {})
+        entry = members.get(user_id)
+        if entry is None:
+            members[user_id] = [username, 1]
+            return True
+        entry[0] = username
+        entry[1] += 1
+        return False
+
+    def _unregister(self, websocket: WebSocket) -> Optional[Tuple[int, int, str]]:
+        """Remove a socket; return (team_id, user_id, username) if the user went offline."""
+        registered = self._sockets.pop(websocket, None)
+        if registered is None:
+            return None
+        team_id, user_id = registered
+
+        connections = self.active_connections.get(team_id)
+        if connections is not None:
+            connections.pop(websocket, None)
+            if not connections:
+                del self.active_connections[team_id]
+        if team_id in self._event_activity:
+            # The replay window runs from the last socket leaving
+            self._event_activity[team_id] = time.monotonic()
+
+        members = self.presence.get(team_id, {})
+        entry = members.get(user_id)
+        if entry is None:
+            return None
+        entry[1] -= 1
+        if entry[1] > 0:
+            return None
+        del members[user_id]
+        if not members:
+            del self.presence[team_id]
+        return team_id, user_id, entry[0]
+
+    def current_seq(self, team_id: int) -> int:
+        """Seq of the team's latest event (the base if it has none yet)."""
+        return self._event_seqs.get(team_id, self._seq_base)
+
+    def forget_team(self, team_id: int):
+        """Drop a team's event buffer (team deleted or idle past the replay window)."""
+        seq = self._event_seqs.pop(team_id, None)
+        self._event_buffers.pop(team_id, None)
+        self._event_activity.pop(team_id, None)
+        if seq is not None:
+            self._seq_base = max(self._seq_base, seq)
+
+    def _prune_event_buffers(self):
+        cutoff = time.monotonic() - TEAM_EVENT_REPLAY_SECONDS
+        for team_id, active_at in list(self._event_activity.items()):
+            if active_at < cutoff and team_id not in self.active_connections:
+                self.forget_team(team_id)
+
+    def events_since(self, team_id: int, last_seq: int) -> Optional[List[str]]:
+        """
+        Encoded events after last_seq, oldest first.
+
+        Returns:
+            None if some of them are no longer buffered (or last_seq is not
+            a seq this process could have issued): the client must resync
+        """
+        current = self.current_seq(team_id)
+        if last_seq == current:
+            return []
+        buffer = self._event_buffers.get(team_id)
+        if last_seq > current or not buffer or buffer[0][0] > last_seq + 1:
+            return None
+        return [text for seq, text in buffer if seq > last_seq]
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        team_id: int,
+        user_id: int,
+        username: str,
+        last_seq: Optional[int] = None
+    ):
+        """
+        Accept and register a socket, then send it the team's state.
+
+        Args:
+            last_seq: Seq of the last event the client saw before reconnecting;
+                missed events are replayed after online_users. Replayed and
+                live events may interleave, so clients should order by seq
+        """
+        await websocket.accept()
+        if self._register(websocket, team_id, user_id, username):
+            self._presence_changed(team_id, user_id, username, online=True)
+        # Taken with registration, so every later event is delivered live
+        seq = self.current_seq(team_id)
+        missed = None if last_seq is None else self.events_since(team_id, last_seq)
+
+        # Send current online users to new connection
         await websocket.send_json({
             "event": "online_users",
-            "data": {"users": online_users}
+            "data": {"users": self.online_users(team_id), "seq": seq}
         })
 
-    def disconnect(self, websocket: WebSocket, team_id: int, user_id: int, username: str):
-        if team_id in self.active_connections:
-            self.active_connections[team_id].discard((websocket, user_id, username))
-            if not self.active_connections[team_id]:
-                del self.active_connections[team_id]
+        if last_seq is None:
+            return
+        if missed is None:
+            await websocket.send_json({"event": "resync_required", "data": {"seq": seq}})
+            return
+        for text in missed:
+            await websocket.send_text(text)
+
+    def disconnect(self, websocket: WebSocket) -> bool:
+        """
+        Remove a socket, queueing an offline change if it was the user's last.
+
+        Returns:
+            True if the user went offline in the team
+        """
+        offline = self._unregister(websocket)
+        if offline is None:
+            return False
+        self._presence_changed(*offline, online=False)
+        return True
+
+    def _presence_changed(self, team_id: int, user_id: int, username: str, online: bool):
+        changes = self._presence_changes.setdefault(team_id, {})
+        change = changes.get(user_id)
+        if change is None:
+            changes[user_id] = [username, not online, online]
+        else:
+            change[0], change[2] = username, online
+
+        if team_id not in self._presence_flushes:
+            self._presence_flushes[team_id] = asyncio.create_task(self._flush_presence(team_id))
+
+    async def _flush_presence(self, team_id: int):
+        await asyncio.sleep(PRESENCE_COALESCE_SECONDS)
+        # Changes made while this delta is sent open a new window
+        del self._presence_flushes[team_id]
+        changes = self._presence_changes.pop(team_id, {})
+
+        online, offline = [], []
+        for user_id, (username, was_online, is_online) in changes.items():
+            if was_online == is_online:
+                continue  # Reconnected (or came and went) within the window
+            (online if is_online else offline).append({"user_id": user_id, "username": username})
+        if online or offline:
+            await self.broadcast(team_id, {
+                "event": "presence_delta",
+                "data": {"online": online, "offline": offline}
+            })
+
+    async def _snapshot_loop(self):
+        """Background task sending each team its full presence on one timer."""
+        while True:
+            await asyncio.sleep(PRESENCE_SNAPSHOT_INTERVAL_SECONDS)
+            self._prune_event_buffers()
+            for team_id in list(self.presence):
+                await self.broadcast(team_id, {
+                    "event": "presence_snapshot",
+                    "data": {"users": self.online_users(team_id)}
+                })
 
     async def broadcast(self, team_id: int, message: dict, exclude_ws: WebSocket = None):
+        """
+        Send a message to every socket of a team concurrently.
+
+        The message is encoded once; sockets that fail or don't accept the
+        frame within TEAM_WS_SEND_TIMEOUT_SECONDS are evicted together and
+        closed in the background.
+        """
+        await self._broadcast_text(team_id, encode_message(message), exclude_ws)
+
+    async def _broadcast_text(self, team_id: int, text: str, exclude_ws: WebSocket = None):
         if team_id not in self.active_connections:
             return
 
-        for ws, user_id, username in self.active_connections[team_id].copy():
-            if ws != exclude_ws:
-                try:
-                    await ws.send_json(message)
-                except:
-                    self.active_connections[team_id].discard((ws, user_id, username))
-
-    async def broadcast_offline(self, team_id: int, user_id: int, username: str):
-        await self.broadcast(team_id, {
-            "event": "member_offline",
-            "data": {"user_id": user_id, "username": username}
-        })
+        targets = [ws for ws in self.active_connections[team_id] if ws != exclude_ws]
+        if not targets:
+            return
+
+        results = await asyncio.gather(*(_send_text(ws, text) for ws in targets))
+
+        for ws, sent in zip(targets, results):
+            if sent:
+                continue
+            # The team may have changed while sends were in flight
+            self.disconnect(ws)
+            task = asyncio.create_task(_close_quietly(ws))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
 
     async def broadcast_todo_event(
         self,
@@ -64,6 +314,7 @@ class ConnectionManager:
 
         This enables real-time sync between canvas TODO shapes and backend.
         Frontend listens for these events and updates shapes via mergeRemoteChanges().
+        The event gets the team's next seq and is kept for replay on reconnect.
 
         Args:
             team_id: Team ID to broadcast to
@@ -71,9 +322,16 @@ class ConnectionManager:
             todo_data: TODO item data (id, title, completed, due_date, etc.)
             exclude_ws: Optional WebSocket to exclude from broadcast
         """
-        await self.broadcast(team_id, {
-            "event": event_type,
-            "data": todo_data
-        }, exclude_ws=exclude_ws)
+        seq = self.current_seq(team_id) + 1
+        self._event_seqs[team_id] = seq
+        text = encode_message({"event": event_type, "seq": seq, "data": todo_data})
+
+        buffer = self._event_buffers.get(team_id)
+        if buffer is None:
+            buffer = self._event_buffers[team_id] = deque(maxlen=TEAM_EVENT_BUFFER_SIZE)
+        buffer.append((seq, text))
+        self._event_activity[team_id] = time.monotonic()
+
+        await self._broadcast_text(team_id, text, exclude_ws)
 
 manager = ConnectionManager()
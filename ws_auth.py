@@ -0,0 +1,131 @@
+"""
+Cached handshake authorization for team WebSockets.
+
+Every /ws/teams connect (and every reconnect), and every team subscription on
+the multiplexed /ws, needs the token's user and the user's membership of the
+team. Both are cached in memory for
+WS_AUTH_CACHE_TTL_SECONDS, so a reconnect storm is served almost entirely
+without database queries:
+- Decoded tokens: token -> (user_id, username), never past the token's expiry.
+  Invalid tokens and unknown users are not cached
+- Memberships: (user_id, team_id) -> bool, including non-members
+
+Membership changes invalidate the affected entries (join_team, delete_team);
+the TTL bounds staleness for anything else. Each cache holds at most
+WS_AUTH_CACHE_SIZE entries, evicting the oldest.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+from jose import JWTError, jwt
+from sqlalchemy import select
+
+from config import SECRET_KEY, ALGORITHM, WS_AUTH_CACHE_TTL_SECONDS, WS_AUTH_CACHE_SIZE
+from database import async_session
+from models import User, TeamMember
+
+
+class TTLCache:
+    """Size-bounded mapping whose entries expire."""
+
+    def __init__(self, ttl: float, max_size: int):
+        self._ttl = ttl
+        self._max_size = max_size
+        # key -> (time.monotonic() expiry, value), oldest first
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return default
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value for the cache's TTL, or for ttl if that is shorter."""
+        ttl = self._ttl if ttl is None else min(ttl, self._ttl)
+        if ttl <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]):
+        for key in [key for key in self._entries if predicate(key)]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+class HandshakeCache:
+    """Token and team membership lookups for WebSocket handshakes."""
+
+    def __init__(self, ttl: Optional[float] = None, max_size: Optional[int] = None):
+        ttl = WS_AUTH_CACHE_TTL_SECONDS if ttl is None else ttl
+        max_size = WS_AUTH_CACHE_SIZE if max_size is None else max_size
+        self._tokens = TTLCache(ttl, max_size)
+        self._memberships = TTLCache(ttl, max_size)
+
+    async def user_for_token(self, token: str) -> Optional[Tuple[int, str]]:
+        """(user_id, username) for a valid token of an existing user, else None."""
+        cached = self._tokens.get(token)
+        if cached is not None:
+            return cached
+
+        try:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            user_id = int(payload.get("sub"))
+        except (JWTError, TypeError, ValueError):
+            return None
+
+        async with async_session() as db:
+            result = await db.execute(select(User.username).where(User.id == user_id))
+            username = result.scalar_one_or_none()
+        if username is None:
+            return None
+
+        identity = (user_id, username)
+        expires = payload.get("exp")
+        self._tokens.set(token, identity, expires - time.time() if expires is not None else None)
+        return identity
+
+    async def is_member(self, user_id: int, team_id: int) -> bool:
+        cached = self._memberships.get((user_id, team_id))
+        if cached is not None:
+            return cached
+
+        async with async_session() as db:
+            result = await db.execute(
+                select(TeamMember.id).where(
+                    TeamMember.user_id == user_id,
+                    TeamMember.team_id == team_id
+                )
+            )
+            member = result.scalar_one_or_none() is not None
+        self._memberships.set((user_id, team_id), member)
+        return member
+
+    def invalidate_membership(self, user_id: int, team_id: int):
+        """Forget one cached membership (user joined or left a team)."""
+        self._memberships.discard((user_id, team_id))
+
+    def invalidate_team(self, team_id: int):
+        """Forget every cached membership of a team (team deleted)."""
+        self._memberships.discard_where(lambda key: key[1] == team_id)
+
+    def clear(self):
+        self._tokens.clear()
+        self._memberships.clear()
+
+
+handshake_cache = HandshakeCache()